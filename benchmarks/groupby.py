@@ -0,0 +1,114 @@
+"""
+Compares the group-by kernels of the counting stats against counting play by play, as they did before.
+
+usage: python benchmarks/groupby.py [rows ...] [--loop-limit rows]
+
+Histories are synthetic (Zipf distributed artists and tracks), 1M, 5M and 20M plays by default.
+Counting play by play is slow, on histories longer than --loop-limit (1M default) it is timed on
+the first --loop-limit plays and scaled up to the full length; those times are marked with '*'.
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stats  # noqa: E402
+from filemgr.table import HistoryTable  # noqa: E402
+from stats.accumulators import _ranked  # noqa: E402
+from stats.engine import Accumulator, aggregate  # noqa: E402
+
+
+def _track(item):
+    return f"{item['artistName']} - {item['trackName']}"
+
+
+# key and filter of every stat when counted play by play
+LOOPS = {
+    'play_counts': (_track, None),
+    'play_counts_by_artist': (lambda item: item['artistName'], None),
+    'play_counts_by_album': (lambda item: f"{item['artistName']} - {item['albumName']}", None),
+    'location_counts': (lambda item: item['connCountry'], None),
+    'platform_usage': (lambda item: item['platform'], None),
+    'most_skipped_artist': (lambda item: item['artistName'], lambda item: item['skipped']),
+    'immediate_skips': (_track, lambda item: item['skipped'] and item['ms'] < 30 * 1000),
+    'instant_skips': (_track, lambda item: item['skipped'] and item['ms'] < 1000),
+}
+
+
+class _LoopCounter(Accumulator):
+
+    def __init__(self, key, where):
+        self.key, self.where = key, where
+        self.counts = defaultdict(int)
+
+    def add(self, item, track):
+        if self.where is None or self.where(item):
+            self.counts[self.key(item)] += 1
+
+    def result(self):
+        return _ranked(self.counts)
+
+
+def synthetic_history(rows: int, artists: int = 20000, tracks_per_artist: int = 15, seed: int = 0) -> HistoryTable:
+    rng = np.random.default_rng(seed)
+    artist = (rng.zipf(1.3, rows) - 1) % artists
+    # tracks and albums belong to their artist
+    track = artist * tracks_per_artist + (rng.zipf(1.5, rows) - 1) % tracks_per_artist
+    album = artist * 3 + track % 3
+    columns = {
+        'end_time': np.sort(rng.integers(1_400_000_000, 1_700_000_000, rows)),
+        'ms_played': rng.integers(0, 400_000, rows),
+        'shuffle': rng.integers(-1, 2, rows).astype(np.int8),
+        'skipped': rng.integers(-1, 2, rows).astype(np.int8),
+        'artist': artist.astype(np.int32),
+        'album': album.astype(np.int32),
+        'track': track.astype(np.int32),
+        'platform': rng.integers(0, 5, rows).astype(np.int32),
+        'country': rng.integers(0, 30, rows).astype(np.int32),
+        'reason_start': rng.integers(0, 4, rows).astype(np.int32),
+        'reason_end': rng.integers(0, 4, rows).astype(np.int32),
+    }
+    vocab = {
+        'artist': [f'Artist {i}' for i in range(artists)],
+        'album': [f'Album {i}' for i in range(artists * 3)],
+        'track': [f'Track {i}' for i in range(artists * tracks_per_artist)],
+        'platform': ['android', 'ios', 'windows', 'web', 'osx'],
+        'country': [f'C{i}' for i in range(30)],
+        'reason_start': ['clickrow', 'playbtn', 'trackdone', 'fwdbtn'],
+        'reason_end': ['trackdone', 'fwdbtn', 'endplay', 'logout'],
+    }
+    return HistoryTable(columns, vocab, time_sorted=True)
+
+
+def _time(function) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main(sizes: list[int], loop_limit: int) -> None:
+    print(f"{'stat':<24}{'rows':>10}{'loop (s)':>12}{'kernel (s)':>12}{'speedup':>10}")
+    for rows in sizes:
+        history = synthetic_history(rows)
+        sample = history[:min(rows, loop_limit)]
+        for name, (key, where) in LOOPS.items():
+            kernel, result = _time(lambda: getattr(stats, name)(history))
+            loop, expected = _time(lambda: aggregate(sample, _LoopCounter(key, where)))
+            if len(sample) == rows and list(result.items()) != list(expected.items()):
+                raise AssertionError(f'{name} differs from counting play by play')
+            loop *= rows / len(sample)
+            estimated = '*' if len(sample) < rows else ' '
+            print(f"{name:<24}{rows:>10}{loop:>11.2f}{estimated}{kernel:>12.3f}{loop / kernel:>9.0f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='group-by kernels against counting play by play')
+    parser.add_argument('rows', nargs='*', type=int, default=[1_000_000, 5_000_000, 20_000_000])
+    parser.add_argument('--loop-limit', type=int, default=1_000_000)
+    arguments = parser.parse_args()
+    main(arguments.rows, arguments.loop_limit)
@@ -0,0 +1,81 @@
+"""
+Compares the streaming history loader against the previous json.load based one.
+
+usage: python benchmarks/ingest.py <extracted data package directory> [repeats]
+
+Every run happens in a fresh interpreter so peak RSS is measured for that loader alone.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from time import strptime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_with_json_load(root: str) -> list:
+    # the loader as it was before streaming ingestion: whole documents in memory, list of dicts out
+    files = sorted(f for f in os.listdir(root) if f.startswith('Streaming_History'))
+    all_ = []
+    for file in files:
+        with open(os.path.join(root, file), encoding='UTF-8') as f:
+            for item in json.load(f):
+                if (item.get('master_metadata_track_name')
+                        and not item.get('episode_name')
+                        and not item.get('audiobook_title')):
+                    all_.append({
+                        'endTime': strptime(item['ts'], '%Y-%m-%dT%H:%M:%SZ'),
+                        'artistName': item['master_metadata_album_artist_name'],
+                        'albumName': item['master_metadata_album_album_name'],
+                        'trackName': item['master_metadata_track_name'],
+                        'msPlayed': timedelta(milliseconds=item['ms_played']),
+                        'platform': item['platform'],
+                        'connCountry': item['conn_country'],
+                        'reasonStart': item['reason_start'],
+                        'reasonEnd': item['reason_end'],
+                        'shuffle': item['shuffle'],
+                        'skipped': item['skipped']
+                    })
+    return all_
+
+
+def _load_streaming(root: str):
+    sys.path.insert(0, ROOT)
+    from filemgr.data import MyData
+    return MyData(root_path=root.rstrip('/') + '/').streaming_history
+
+
+LOADERS = {
+    'json.load': _load_with_json_load,
+    'streaming': _load_streaming,
+}
+
+
+def _run(loader: str, root: str) -> None:
+    start = time.perf_counter()
+    rows = len(LOADERS[loader](root))
+    wall = time.perf_counter() - start
+    # ru_maxrss is in KiB on linux
+    print(json.dumps({'rows': rows, 'wall': wall, 'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))
+
+
+def main(root: str, repeats: int = 3) -> None:
+    print(f"{'loader':<12}{'rows':>10}{'wall (s)':>12}{'peak RSS (MiB)':>18}")
+    for loader in LOADERS:
+        runs = [
+            json.loads(subprocess.check_output([sys.executable, __file__, '--run', loader, root]))
+            for _ in range(repeats)
+        ]
+        best = min(runs, key=lambda r: r['wall'])
+        print(f"{loader:<12}{best['rows']:>10}{best['wall']:>12.2f}{max(r['rss'] for r in runs) / 1024:>18.1f}")
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--run':
+        _run(sys.argv[2], sys.argv[3])
+    else:
+        main(sys.argv[1], *map(int, sys.argv[2:3]))
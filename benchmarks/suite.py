@@ -0,0 +1,160 @@
+"""
+Times loading a Data Package, every public statistic and writing the report, on synthetic exports of several sizes,
+and records the times to JSON so runs of different commits can be compared.
+
+usage: python benchmarks/suite.py [rows ...] [--artists N] [--zipf S] [--years N] [--repeat N] [--no-pdf]
+                                  [--output FILE] [--compare FILE]
+
+Exports are written by benchmarks/synthetic.py into a temporary directory (100k and 1M records by default).
+Every step is run --repeat times and its fastest time is kept. Results go to benchmarks/results/<commit>.json
+unless --output says otherwise; --compare prints them next to the times of an earlier run.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from io import StringIO
+from typing import Any, Callable, Optional
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import stats.functions  # noqa: E402
+from filemgr.data import COMPONENTS, MyData  # noqa: E402
+from report import (  # noqa: E402
+    GROUPS, PRINTED_GROUPS, SONG_STATS, compute_report, figure_pages, write_pdf, write_song_stats, write_text
+)
+from synthetic import generate_export  # noqa: E402
+
+
+def _best(function: Callable[[], Any], repeat: int) -> tuple[float, Any]:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def public_stats() -> dict[str, Callable]:
+    """
+    The statistics of stats.functions, by name.
+    """
+    return {name: function for name, function in inspect.getmembers(stats.functions, inspect.isfunction)
+            if function.__module__ == stats.functions.__name__ and not name.startswith('_')}
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(rows: int, arguments: argparse.Namespace, directory: str) -> dict[str, float]:
+    """
+    Seconds every step took on an export of `rows` records, by step name.
+    """
+    root = os.path.join(directory, str(rows))
+    generate_export(root, rows, arguments.artists, arguments.zipf, years=arguments.years)
+    times = {}
+
+    times['load'], data = _best(lambda: MyData(root_path=root + '/', components=COMPONENTS), arguments.repeat)
+    history = data.streaming_history
+
+    for name, function in public_stats().items():
+        if name == 'artist_history_over_time':
+            top = list(stats.functions.play_counts_by_artist(history, top_k=10))
+            call = lambda: function(history, top)  # noqa: E731
+        else:
+            call = lambda: function(history)  # noqa: E731
+        times[f'stats.{name}'], _ = _best(call, arguments.repeat)
+
+    start, end = stats.functions.history_range(history)
+    times['report.compute'], results = _best(
+        lambda: compute_report(history, start, end, GROUPS, song_stats=True), arguments.repeat
+    )
+    times['report.text'], _ = _best(lambda: write_text(results, start, end, PRINTED_GROUPS, StringIO()),
+                                    arguments.repeat)
+    times['report.song_stats'], _ = _best(
+        lambda: write_song_stats(results[SONG_STATS], os.path.join(directory, 'song_stats.csv')), arguments.repeat
+    )
+    if arguments.pdf:
+        text = StringIO()
+        write_text(results, start, end, PRINTED_GROUPS, text)
+        times['report.pdf'], _ = _best(
+            lambda: write_pdf(figure_pages(results, history, start, end), os.path.join(directory, 'report.pdf'),
+                              workers=1, report_text=text.getvalue()),
+            arguments.repeat
+        )
+    return times
+
+
+def compare(results: dict[str, Any], previous: dict[str, Any]) -> None:
+    """
+    Prints the times of two runs side by side, steps that got more than 10% slower are marked with '!'.
+    """
+    print(f"{'step':<44}{'rows':>10}{'before (s)':>12}{'now (s)':>12}{'ratio':>8}")
+    for rows, times in results['times'].items():
+        before = previous['times'].get(rows, {})
+        for step, seconds in times.items():
+            if step not in before:
+                continue
+            ratio = seconds / before[step] if before[step] else float('inf')
+            flag = '!' if ratio > 1.1 else ' '
+            print(f'{step:<44}{rows:>10}{before[step]:>12.4f}{seconds:>12.4f}{ratio:>7.2f}{flag}')
+
+
+def main(arguments: argparse.Namespace) -> None:
+    results = {
+        'commit': _commit(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': f'{platform.system()} {platform.machine()}, {os.cpu_count()} cores',
+        'parameters': {'artists': arguments.artists, 'zipf': arguments.zipf, 'years': arguments.years,
+                       'repeat': arguments.repeat},
+        'times': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in arguments.rows:
+            times = run_size(rows, arguments, directory)
+            results['times'][str(rows)] = times
+            slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)[:5]
+            print(f'{rows} rows: ' + ', '.join(f'{step} {seconds:.3f}s' for step, seconds in slowest))
+
+    output = arguments.output or os.path.join(ROOT, 'benchmarks', 'results', f"{results['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    print(f'results written to {output}')
+
+    if arguments.compare:
+        with open(arguments.compare, encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='time loading, the statistics and the report on synthetic exports')
+    parser.add_argument('rows', nargs='*', type=int, default=[100_000, 1_000_000])
+    parser.add_argument('--artists', type=int, default=5_000)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--years', type=float, default=8)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--no-pdf', action='store_false', dest='pdf', help='do not time writing the PDF report')
+    parser.add_argument('--output', metavar='FILE')
+    parser.add_argument('--compare', metavar='FILE', help='results of an earlier run to compare with')
+    main(parser.parse_args())
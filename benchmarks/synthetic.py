@@ -0,0 +1,225 @@
+"""
+Writes a synthetic Spotify Data Package: Streaming_History_Audio_*.json, Playlist*.json and YourLibrary.json
+as the real export has them, with plays of Zipf distributed artists (and tracks of every artist) over a time span.
+
+usage: python benchmarks/synthetic.py DIR [--rows N] [--artists N] [--zipf S] [--start YYYY-MM-DD] [--years N]
+                                      [--playlists N] [--seed N] [--zip PATH]
+
+With --zip the files are also packed into a zip that load_zipped_data reads.
+"""
+import argparse
+import json
+import os
+import zipfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+PLATFORMS = ['android', 'ios', 'windows', 'osx', 'linux', 'web_player', 'cast_tv']
+COUNTRIES = ['DE', 'US', 'GB', 'FR', 'NL', 'SE', 'ES', 'IT']
+REASONS_START = ['trackdone', 'clickrow', 'fwdbtn', 'playbtn', 'backbtn', 'appload', 'remote']
+REASONS_END = ['trackdone', 'fwdbtn', 'endplay', 'logout', 'backbtn', 'remote']
+TITLE_SUFFIXES = ['', '', '', '', ' (Remix)', ' - Live', ' (feat. Guest)', ' - Remastered']
+# share of listening per hour of the day, quiet at night
+HOURS = np.array([2, 1, 1, 1, 1, 2, 4, 6, 7, 6, 5, 5, 6, 5, 5, 6, 7, 8, 8, 8, 7, 6, 4, 3], dtype=float)
+# the export zip keeps its files in this folder, load_zipped_data reads them from there
+ARCHIVE_ROOT = 'Spotify Extended Streaming History/'
+
+
+def _zipf(rng: np.random.Generator, n: int, s: float, size) -> np.ndarray:
+    # ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** s
+    weights = 1.0 / np.arange(1, n + 1) ** s
+    return rng.choice(n, size=size, p=weights / weights.sum())
+
+
+class _Catalog:
+    """
+    Artists, each with a few albums and tracks (track names repeat between artists, as they do in real life).
+    """
+
+    def __init__(self, rng: np.random.Generator, artists: int):
+        self.artists = [f'Artist {i}' for i in range(artists)]
+        self.tracks_per_artist = rng.integers(1, 40, artists)
+        self.albums_per_artist = rng.integers(1, 6, artists)
+
+    def track(self, artist: int, number: int) -> tuple[str, str, str]:
+        """name, album and uri of the number-th track of an artist"""
+        name = f'Song {number % 97}{TITLE_SUFFIXES[(artist + number) % len(TITLE_SUFFIXES)]}'
+        album = f'{self.artists[artist]} Album {number % int(self.albums_per_artist[artist])}'
+        return name, album, f'spotify:track:{artist:08x}{number:06x}'
+
+
+def _ts(seconds: np.ndarray) -> list[str]:
+    return [f'{t}Z' for t in np.datetime_as_string(seconds.astype('datetime64[s]')).tolist()]
+
+
+def _plays(rng: np.random.Generator, catalog: _Catalog, rows: int, zipf: float, start: int, span: int,
+           podcasts: float) -> dict[str, np.ndarray]:
+    # the random columns of all plays, in time order; records are only made from them a file at a time
+    artist = _zipf(rng, len(catalog.artists), zipf, rows)
+    # favourite tracks of every artist are played the most, too
+    number = _zipf(rng, int(catalog.tracks_per_artist.max()), 1.2, rows) % catalog.tracks_per_artist[artist]
+    days = rng.integers(0, span // 86400, rows)
+    seconds = start + days * 86400 + rng.choice(24, rows, p=HOURS / HOURS.sum()) * 3600 + rng.integers(0, 3600, rows)
+    order = np.argsort(seconds, kind='stable')
+
+    full = rng.random(rows) < 0.6
+    return {
+        'artist': artist[order],
+        'number': number[order],
+        'seconds': seconds[order],
+        'full': full,
+        'ms_played': np.where(full, rng.integers(120_000, 330_000, rows), rng.integers(0, 120_000, rows)),
+        'skipped': rng.choice([1, 0, -1], rows, p=[0.25, 0.6, 0.15]),
+        'podcast': rng.random(rows) < podcasts,
+    }
+
+
+def _records(catalog: _Catalog, plays: dict[str, np.ndarray], begin: int, end: int) -> list[dict]:
+    columns = [plays[name][begin:end].tolist() for name in ('artist', 'number', 'full', 'ms_played', 'skipped',
+                                                            'podcast')]
+    records = []
+    for i, ts, (a, n, full, ms, skip, podcast) in zip(range(begin, end), _ts(plays['seconds'][begin:end]),
+                                                      zip(*columns)):
+        name, album, uri = catalog.track(a, n)
+        records.append({
+            'ts': ts,
+            'platform': PLATFORMS[i * 7 % len(PLATFORMS)] if i % 5 else PLATFORMS[a % len(PLATFORMS)],
+            'ms_played': ms,
+            'conn_country': COUNTRIES[a % len(COUNTRIES)] if i % 11 else COUNTRIES[i % len(COUNTRIES)],
+            'ip_addr': '192.0.2.1',
+            'master_metadata_track_name': None if podcast else name,
+            'master_metadata_album_artist_name': None if podcast else catalog.artists[a],
+            'master_metadata_album_album_name': None if podcast else album,
+            'spotify_track_uri': None if podcast else uri,
+            'episode_name': f'Episode {i}' if podcast else None,
+            'episode_show_name': 'The Show' if podcast else None,
+            'spotify_episode_uri': f'spotify:episode:{i:022x}' if podcast else None,
+            'audiobook_title': None,
+            'audiobook_uri': None,
+            'audiobook_chapter_uri': None,
+            'audiobook_chapter_title': None,
+            'reason_start': REASONS_START[0] if full else REASONS_START[i % len(REASONS_START)],
+            'reason_end': REASONS_END[0] if full else REASONS_END[1 + i % (len(REASONS_END) - 1)],
+            'shuffle': bool(i % 3),
+            'skipped': None if skip == -1 else bool(skip),
+            'offline': False,
+            'offline_timestamp': int(plays['seconds'][i]) * 1000 if i % 50 == 0 else None,
+            'incognito_mode': False,
+        })
+    return records
+
+
+def _write_json(path: str, value, rows_per_line: bool = False) -> None:
+    with open(path, 'w', encoding='UTF-8') as f:
+        if rows_per_line:
+            # like the export: an array with one record per line
+            f.write('[\n' + ',\n'.join(json.dumps(record, ensure_ascii=False) for record in value) + '\n]')
+        else:
+            json.dump(value, f, ensure_ascii=False, indent=2)
+
+
+def _year(seconds: int) -> int:
+    return datetime.fromtimestamp(int(seconds), timezone.utc).year
+
+
+def generate_export(directory: str, rows: int = 100_000, artists: int = 5_000, zipf: float = 1.1,
+                    start: str = '2015-01-01', years: float = 8, playlists: int = 20, podcasts: float = 0.02,
+                    rows_per_file: int = 20_000, seed: int = 0) -> list[str]:
+    """
+    Writes a synthetic Data Package to `directory`.
+
+    :param rows: streaming history records, including the `podcasts` share of podcast episodes the loader skips
+    :param artists: distinct artists the plays are spread over
+    :param zipf: skew of the artist popularity (0 uniform, larger for a few artists taking most of the plays)
+    :param start: date of the first possible play, the plays are spread over `years` from there
+    :param playlists: number of playlists (the library holds a share of the played tracks, albums and artists)
+    :param rows_per_file: records per streaming history file, the export splits them the same way
+
+    :return: names of the files written
+    """
+    rng = np.random.default_rng(seed)
+    catalog = _Catalog(rng, artists)
+    first = int(datetime.strptime(start, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+    plays = _plays(rng, catalog, rows, zipf, first, max(int(years * 365.25 * 86400), 86400), podcasts)
+    seconds = plays['seconds']
+
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for part, begin in enumerate(range(0, rows, rows_per_file)):
+        end = min(begin + rows_per_file, rows)
+        name = f'Streaming_History_Audio_{_year(seconds[begin])}-{_year(seconds[end - 1])}_{part}.json'
+        _write_json(os.path.join(directory, name), _records(catalog, plays, begin, end), rows_per_line=True)
+        files.append(name)
+
+    # playlists and the library pick from the played tracks
+    played = [r for r in _records(catalog, plays, 0, min(rows, 10_000)) if r['master_metadata_track_name']]
+    items = [{
+        'track': {
+            'trackName': r['master_metadata_track_name'],
+            'artistName': r['master_metadata_album_artist_name'],
+            'albumName': r['master_metadata_album_album_name'],
+            'trackUri': r['spotify_track_uri'],
+        },
+        'episode': None,
+        'audiobook': None,
+        'localTrack': None,
+        'addedDate': r['ts'][:10],
+    } for r in played]
+    lists = []
+    for i in range(playlists):
+        chosen = rng.choice(len(items), min(len(items), int(rng.integers(5, 200))), replace=False) if items else []
+        lists.append({
+            'name': f'Playlist {i}',
+            'lastModifiedDate': max((items[j]['addedDate'] for j in chosen), default=start),
+            'collaborators': [],
+            'items': [items[j] for j in sorted(chosen)],
+            'description': None if i % 3 else f'Songs for mood {i}',
+            'numberOfFollowers': int(i % 4),
+        })
+    _write_json(os.path.join(directory, 'Playlist1.json'), {'playlists': lists})
+    files.append('Playlist1.json')
+
+    liked = played[::7]
+    _write_json(os.path.join(directory, 'YourLibrary.json'), {
+        'tracks': [{'artist': r['master_metadata_album_artist_name'], 'album': r['master_metadata_album_album_name'],
+                    'track': r['master_metadata_track_name'], 'uri': r['spotify_track_uri']} for r in liked],
+        'albums': [{'artist': r['master_metadata_album_artist_name'], 'album': r['master_metadata_album_album_name'],
+                    'uri': f'spotify:album:{i:022x}'} for i, r in enumerate(liked[::5])],
+        'shows': [],
+        'episodes': [],
+        'bannedTracks': [],
+        'artists': [{'name': name, 'uri': f'spotify:artist:{i:022x}'} for i, name in enumerate(catalog.artists[:50])],
+        'bannedArtists': [],
+        'other': [],
+    })
+    files.append('YourLibrary.json')
+    return files
+
+
+def zip_export(directory: str, files: list[str], path: str) -> None:
+    """
+    Packs the files of a synthetic Data Package into a zip, laid out as the export zip.
+    """
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name in files:
+            archive.write(os.path.join(directory, name), ARCHIVE_ROOT + name)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='write a synthetic Spotify Data Package')
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--artists', type=int, default=5_000)
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--start', default='2015-01-01')
+    parser.add_argument('--years', type=float, default=8)
+    parser.add_argument('--playlists', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--zip', metavar='PATH')
+    arguments = parser.parse_args()
+    written = generate_export(arguments.directory, arguments.rows, arguments.artists, arguments.zipf,
+                              arguments.start, arguments.years, arguments.playlists, seed=arguments.seed)
+    if arguments.zip:
+        zip_export(arguments.directory, written, arguments.zip)
+    print(f'{len(written)} files written to {arguments.directory}')
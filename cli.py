@@ -0,0 +1,227 @@
+"""
+Writes statistics reports for Spotify Data Packages without asking anything, for scripts and batch jobs.
+
+usage: python cli.py ARCHIVE [ARCHIVE ...] [--start DATE] [--end DATE] [--output DIR]
+                     [--groups GROUP ...] [--format FORMAT ...] [--song-format FORMAT] [--song-sort ORDER]
+                     [--jobs N] [--no-cache] [--database] [--profile FILE]
+
+Every archive gets its own directory in --output, named after the zip, holding the report in each format:
+report.txt, song_stats.csv (.csv.gz, .parquet or .arrow, see --song-format), report.json and report.pdf.
+
+Exit codes:
+    0  every report was written
+    1  a report failed while it was computed or written
+    2  the arguments are invalid
+    3  an archive could not be read, has no streaming history, or no plays from --start to --end
+With several archives the highest code wins.
+
+--database keeps the history of every archive in a SQLite database next to it (<archive>.sqlite, loaded again
+when the archive changes) and queries the statistics stats.sql has from it instead of computing them in memory.
+
+--profile records the time and memory every phase takes (see instrumentation) to a trace file
+and prints the slowest phases; archives and PDF pages are then processed one at a time.
+"""
+import argparse
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from io import StringIO
+from time import struct_time
+from typing import Optional
+
+import matplotlib
+
+import instrumentation
+
+# reports are rendered without a display
+matplotlib.use('Agg')
+
+from export import COLUMNAR_FORMATS, SONG_FORMATS, pa  # noqa: E402
+from filemgr import HistoryDatabase, load_zipped_data  # noqa: E402
+from filemgr.table import HistoryTable  # noqa: E402
+from instrumentation import phase  # noqa: E402
+from report import (  # noqa: E402
+    GROUPS, SONG_STATS, compute_report, figure_pages, write_json, write_pdf, write_song_stats, write_text
+)
+from stats import history_range  # noqa: E402
+from stats.engine import restrict  # noqa: E402
+from stats.songs import SORT_ORDERS  # noqa: E402
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_UNREADABLE = 3
+
+FORMATS = ('text', 'csv', 'json', 'pdf')
+_DATE_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d')
+
+
+def _date(value: str, end_of_day: bool = False) -> struct_time:
+    for date_format in _DATE_FORMATS:
+        try:
+            parsed = time.strptime(value, date_format)
+        except ValueError:
+            continue
+        if end_of_day and date_format == '%Y-%m-%d':
+            # a date alone includes the whole day
+            parsed = time.strptime(value + ' 23:59:59', '%Y-%m-%d %H:%M:%S')
+        return parsed
+    raise argparse.ArgumentTypeError(f"invalid date '{value}', expected YYYY-MM-DD or 'YYYY-MM-DD HH:MM'")
+
+
+def _end_date(value: str) -> struct_time:
+    return _date(value, end_of_day=True)
+
+
+def _parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Write statistics reports for Spotify Data Packages.')
+    parser.add_argument('archives', nargs='+', metavar='ARCHIVE', help='zipped data package(s)')
+    parser.add_argument('--start', type=_date, help='first date of the report (default: earliest play)')
+    parser.add_argument('--end', type=_end_date,
+                        help='last date of the report, a date alone up to 23:59:59 of that day (default: latest play)')
+    parser.add_argument('--output', default='reports', metavar='DIR',
+                        help="directory the reports are written to (default: 'reports')")
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS), metavar='GROUP',
+                        help=f"parts of the report to compute: {', '.join(GROUPS)} (default: all)")
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=['text'], dest='formats', metavar='FORMAT',
+                        help=f"files to write: {', '.join(FORMATS)} (default: text)")
+    parser.add_argument('--song-format', choices=SONG_FORMATS, default='csv', metavar='FORMAT',
+                        help=f"file type of the song stats: {', '.join(SONG_FORMATS)} (default: csv; "
+                             f"{' and '.join(COLUMNAR_FORMATS)} need pyarrow)")
+    parser.add_argument('--song-sort', choices=SORT_ORDERS, default='first', metavar='ORDER',
+                        help=f"order of the song stats rows: {', '.join(SORT_ORDERS)} (default: first, "
+                             f"by when the track was first played)")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', help='archives processed in parallel (default: 1)')
+    parser.add_argument('--no-cache', action='store_false', dest='cache',
+                        help='do not read or write the parsed history cache next to the archives')
+    parser.add_argument('--database', action='store_true',
+                        help='query the heavier statistics with SQL from a database of the history kept next to '
+                             'the archives (<archive>.sqlite)')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='record the time and memory of every phase to a trace file and print the slowest')
+    return parser
+
+
+def _database(archive: str, history: HistoryTable) -> HistoryDatabase:
+    # the database next to the archive, loaded with its history unless it already holds this version of the archive
+    stat = os.stat(archive)
+    source = f'{os.path.basename(archive)}:{stat.st_size}:{stat.st_mtime_ns}'
+    database = HistoryDatabase(os.path.splitext(archive)[0] + '.sqlite')
+    if database.source() != source:
+        database.load(history, source)
+    return database
+
+
+def run(archive: str, directory: str, start: Optional[struct_time], end: Optional[struct_time],
+        groups: list[str], formats: list[str], cache: bool = True, pdf_workers: Optional[int] = None,
+        song_format: str = 'csv', song_sort: str = 'first', database: bool = False) -> tuple[int, str]:
+    """
+    Writes the report of one archive to `directory`.
+
+    :param song_format: file type of the song stats (see export.SONG_FORMATS)
+    :param song_sort: order of the song stats rows (see stats.songs.SORT_ORDERS)
+    :param pdf_workers: processes plotting the pages of the PDF, all cores by default
+    :param database: query the statistics of report.SQL_STATS from a database of the history next to the archive
+
+    :return: exit code and a line describing the outcome
+    """
+    try:
+        with phase('load', archive=archive):
+            data = load_zipped_data(archive, cache=cache)
+    except Exception as e:
+        return EXIT_UNREADABLE, f'{archive}: cannot read archive ({e})'
+    history = data.streaming_history
+    if not len(history):
+        return EXIT_UNREADABLE, f'{archive}: no streaming history in archive'
+
+    queried = None
+    try:
+        first, last = history_range(history)
+        start, end = start or first, end or last
+        window = restrict(history, (start, end))
+        if not len(window):
+            return EXIT_UNREADABLE, (f'{archive}: no plays between {time.strftime("%Y-%m-%d %H:%M", start)} '
+                                     f'and {time.strftime("%Y-%m-%d %H:%M", end)}')
+        if database:
+            # of the whole history, the statistics are queried for the window
+            with phase('database'):
+                queried = _database(archive, history)
+        history = window
+
+        # graphs are only plotted, and dumped to JSON
+        if not {'pdf', 'json'} & set(formats):
+            groups = [group for group in groups if group != 'graphs']
+        with phase('report.compute'):
+            results = compute_report(history, start, end, groups, song_stats='csv' in formats, database=queried)
+        os.makedirs(directory, exist_ok=True)
+
+        text = StringIO()
+        if {'text', 'pdf'} & set(formats):
+            with phase('report.text'):
+                write_text(results, start, end, groups, text)
+        if 'text' in formats:
+            with open(os.path.join(directory, 'report.txt'), 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+        if 'csv' in formats:
+            with phase('report.song_stats'):
+                write_song_stats(results[SONG_STATS], os.path.join(directory, f'song_stats.{song_format}'),
+                                 song_sort)
+        if 'json' in formats:
+            with phase('report.json'):
+                write_json(results, os.path.join(directory, 'report.json'))
+        if 'pdf' in formats:
+            pages = figure_pages(results, history, start, end) if 'graphs' in groups else []
+            with phase('report.pdf'):
+                write_pdf(pages, os.path.join(directory, 'report.pdf'), pdf_workers, report_text=text.getvalue())
+    except Exception:
+        return EXIT_FAILED, f'{archive}: report failed\n{traceback.format_exc()}'
+    finally:
+        if queried is not None:
+            queried.close()
+
+    return EXIT_OK, f'{archive}: report written to {directory}'
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = _parser()
+    args = parser.parse_args(argv)
+
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.start and args.end and args.start > args.end:
+        parser.error('--start is after --end')
+    names = [os.path.splitext(os.path.basename(archive))[0] for archive in args.archives]
+    if len(set(names)) != len(names):
+        parser.error('archives must have different file names, their reports are named after them')
+    if 'csv' in args.formats and args.song_format in COLUMNAR_FORMATS and pa is None:
+        parser.error(f'--song-format {args.song_format} needs pyarrow, which is not installed')
+
+    if args.profile:
+        instrumentation.enable(args.profile)
+    # phases are only recorded in this process
+    workers = 1 if instrumentation.enabled() else min(args.jobs, len(args.archives))
+    # archives processed in parallel plot their PDF pages on their own
+    pdf_workers = 1 if workers > 1 or instrumentation.enabled() else None
+    jobs = [
+        (archive, os.path.join(args.output, name), args.start, args.end, args.groups, args.formats, args.cache,
+         pdf_workers, args.song_format, args.song_sort, args.database)
+        for archive, name in zip(args.archives, names)
+    ]
+    code = EXIT_OK
+    with ProcessPoolExecutor(workers) if workers > 1 else nullcontext() as pool:
+        outcomes = pool.map(run, *zip(*jobs)) if pool else (run(*job) for job in jobs)
+        for outcome, message in outcomes:
+            print(message, file=sys.stdout if outcome == EXIT_OK else sys.stderr)
+            code = max(code, outcome)
+
+    if instrumentation.enabled():
+        print(f'profile written to {instrumentation.write_trace()}', file=sys.stderr)
+        instrumentation.summary(sys.stderr)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Writes the song stats export (a stats.songs.SongTable) a chunk of rows at a time, so only one chunk is ever
+turned into strings: as CSV, gzipped CSV, or, with pyarrow installed, as Parquet or Arrow (IPC file) tables
+with the times as timestamps instead of text.
+"""
+import csv
+import gzip
+from typing import Optional
+
+from stats.songs import FIELDS, SongTable
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only the Parquet and Arrow files need pyarrow
+    pa = pq = None
+
+SONG_FORMATS = ('csv', 'csv.gz', 'parquet', 'arrow')
+# the formats written with pyarrow
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+_CHUNK = 65536
+
+
+def song_format(path: str) -> str:
+    """
+    The format of a song stats file named `path`, told by its extension (CSV if it has none of SONG_FORMATS).
+    """
+    for file_format in sorted(SONG_FORMATS, key=len, reverse=True):
+        if path.lower().endswith('.' + file_format):
+            return file_format
+    if path.lower().endswith('.feather'):
+        return 'arrow'
+    return 'csv'
+
+
+def write_songs(songs: SongTable, path: str, sort: str = 'first', file_format: Optional[str] = None,
+                chunk_size: int = _CHUNK) -> int:
+    """
+    Writes the rows of a SongTable to `path` in the given sort order (see stats.songs.SORT_ORDERS).
+
+    :param file_format: one of SONG_FORMATS, taken from the extension of `path` by default
+    :param chunk_size: rows formatted and written at a time
+
+    :return: number of rows written
+    """
+    file_format = file_format or song_format(path)
+    if file_format not in SONG_FORMATS:
+        raise ValueError(f"unknown song stats format '{file_format}', expected one of {', '.join(SONG_FORMATS)}")
+    if file_format in COLUMNAR_FORMATS and pa is None:
+        raise ImportError(f'writing {file_format} files needs pyarrow (pip install pyarrow)')
+
+    if file_format == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            _write_csv(songs, f, sort, chunk_size)
+    elif file_format == 'csv.gz':
+        with gzip.open(path, 'wt', newline='', encoding='utf-8') as f:
+            _write_csv(songs, f, sort, chunk_size)
+    elif file_format == 'parquet':
+        with pq.ParquetWriter(path, _schema()) as writer:
+            for chunk in songs.chunks(sort, chunk_size):
+                writer.write_table(pa.Table.from_batches([_batch(chunk)]))
+    else:
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, _schema()) as writer:
+            for chunk in songs.chunks(sort, chunk_size):
+                writer.write_batch(_batch(chunk))
+    return len(songs)
+
+
+def _write_csv(songs: SongTable, f, sort: str, chunk_size: int) -> None:
+    writer = csv.writer(f)
+    writer.writerow(FIELDS)
+    for rows in songs.rows(sort, chunk_size):
+        writer.writerows(rows)
+
+
+def _schema() -> 'pa.Schema':
+    return pa.schema([
+        ('Artist', pa.string()),
+        ('Track Name', pa.string()),
+        ('Times Played', pa.int64()),
+        ('First Played', pa.timestamp('s')),
+        ('Last Played', pa.timestamp('s')),
+        ('Skipped', pa.int64()),
+        ('Instant Skips', pa.int64()),
+        ('User Started', pa.int64()),
+    ])
+
+
+def _batch(chunk: SongTable) -> 'pa.RecordBatch':
+    artists, tracks = chunk.vocab['artist'], chunk.vocab['track']
+    return pa.record_batch([
+        pa.array([artists[code] for code in chunk.artist.tolist()], pa.string()),
+        pa.array([tracks[code] for code in chunk.track.tolist()], pa.string()),
+        pa.array(chunk.plays, pa.int64()),
+        pa.array(chunk.first_played.astype('datetime64[s]'), pa.timestamp('s')),
+        pa.array(chunk.last_played.astype('datetime64[s]'), pa.timestamp('s')),
+        pa.array(chunk.skipped, pa.int64()),
+        pa.array(chunk.instant_skips, pa.int64()),
+        pa.array(chunk.user_started, pa.int64()),
+    ], schema=_schema())
@@ -1 +1,4 @@
+from .database import HistoryDatabase
 from .functions import load_zipped_data
+from .store import HistoryStore
+from .table import HistoryTable
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import zlib
+from typing import Optional
+
+import numpy as np
+
+from .columns import map_column, write_column
+from .table import DTYPES, TEXT_COLUMNS, HistoryTable
+
+# bump whenever the layout of the cached columns changes, older caches are then rebuilt
+CACHE_VERSION = 4
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _checksum(column: np.ndarray) -> int:
+    # CRC-32 of the column as it is stored, little endian
+    return zlib.crc32(column.astype(column.dtype.newbyteorder('<'), copy=False))
+
+
+def _file_state(path: str) -> list[int]:
+    # changes with every write to the file; the ctime cannot be set back the way the mtime can
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino]
+
+
+def _encode(value) -> np.ndarray:
+    return np.frombuffer(json.dumps(value).encode('UTF-8'), dtype=np.uint8)
+
+
+def _decode(array: np.ndarray):
+    return json.loads(array.tobytes().decode('UTF-8'))
+
+
+class HistoryCache:
+    """
+    Parsed streaming history of an archive, kept next to it as a directory of column files (see filemgr.columns)
+    that are memory-mapped when the cache is loaded, so the statistics run over the files' pages
+    and every process reporting on the same archive shares them.
+
+    <archive>.statipy/meta.json               fingerprint of the archive, row count, time order, vocabularies,
+                                              and a checksum and the file state of every column
+    <archive>.statipy/<column>.<sha256>.bin   columns, named by the archive's SHA-256 (a prefix of it)
+
+    The cache is keyed by the archive's size, modification time and SHA-256;
+    when the size and time are unchanged the archive is trusted without hashing it again.
+    Caches of a different archive or format version, and ones that cannot be read, are ignored (and overwritten on `store`).
+    Columns are named by the archive they hold, so a process that replaces the cache of a changed archive
+    does not change the columns others have mapped; meta.json is replaced last and only names complete columns.
+
+    A column is checked against its checksum whenever its file changed (size, modification time, inode or the
+    change time, which every write sets) since it was written or last checked, and the cache is rebuilt if
+    it does not match; the columns of an unchanged cache are not read when it is loaded.
+
+    :param archive: path to the zip the history is parsed from
+    """
+
+    def __init__(self, archive: str):
+        self.archive = archive
+        self.path = os.path.splitext(archive)[0] + '.statipy'
+        self._meta = os.path.join(self.path, 'meta.json')
+
+    def _fingerprint(self) -> dict:
+        stat = os.stat(self.archive)
+        return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+    def _column_path(self, name: str, sha256: str) -> str:
+        return os.path.join(self.path, f'{name}.{sha256[:16]}.bin')
+
+    def load(self) -> Optional[HistoryTable]:
+        """
+        Returns the cached history, or None if there is no valid cache for the archive as it is now.
+        The columns of the history are read-only arrays over the cache files.
+        """
+        try:
+            with open(self._meta, encoding='UTF-8') as f:
+                meta = json.load(f)
+            fingerprint = self._fingerprint()
+            if meta['version'] != CACHE_VERSION or meta['size'] != fingerprint['size']:
+                return None
+            touched = meta['mtime'] != fingerprint['mtime']
+            if touched and meta['sha256'] != _sha256(self.archive):
+                return None
+
+            paths = {name: self._column_path(name, meta['sha256']) for name in HistoryTable.COLUMNS}
+            if not self._valid(meta, paths):
+                return None
+            columns = {name: map_column(path, DTYPES[name], meta['rows']) for name, path in paths.items()}
+            changed = {name: _file_state(path) for name, path in paths.items()}
+            changed = {name: state for name, state in changed.items() if state != meta['checked'][name]}
+            if any(_checksum(columns[name]) != meta['checksums'][name] for name in changed):
+                return None
+            # the columns are the ones written, so the order is known from then and not checked again
+            table = HistoryTable(columns, meta['vocab'], meta['time_sorted'])
+        except (OSError, ValueError, KeyError, TypeError):
+            # missing, truncated or otherwise unreadable
+            return None
+
+        if touched or changed:
+            # same content, remember the new times so neither the archive nor the columns are read again
+            try:
+                self._write_meta({**meta, 'mtime': fingerprint['mtime'], 'checked': {**meta['checked'], **changed}})
+            except OSError:
+                pass
+        return table
+
+    @staticmethod
+    def _valid(meta: dict, paths: dict[str, str]) -> bool:
+        # only what can be checked without reading the columns: they would have to be read in full otherwise
+        for name, path in paths.items():
+            if os.path.getsize(path) != meta['rows'] * np.dtype(DTYPES[name]).itemsize:
+                return False
+        return all(len(meta['vocab'][name]) == meta['vocab_sizes'][name] for name in TEXT_COLUMNS)
+
+    def _write_meta(self, meta: dict) -> None:
+        temporary = self._meta + '.tmp'
+        try:
+            with open(temporary, 'w', encoding='UTF-8') as f:
+                json.dump(meta, f)
+            # readers never see a half written cache
+            os.replace(temporary, self._meta)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def store(self, table: HistoryTable) -> None:
+        """
+        Writes the history to the cache; a cache that cannot be written is skipped.
+        """
+        sha256 = _sha256(self.archive)
+        meta = {**self._fingerprint(), 'sha256': sha256, 'rows': len(table), 'time_sorted': table.time_sorted,
+                'vocab': table.vocab, 'vocab_sizes': {name: len(values) for name, values in table.vocab.items()}}
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            meta['checksums'], meta['checked'] = {}, {}
+            for name, column in table.columns.items():
+                write_column(self._column_path(name, sha256), column)
+                meta['checksums'][name] = _checksum(column)
+                meta['checked'][name] = _file_state(self._column_path(name, sha256))
+            self._write_meta(meta)
+        except OSError:
+            return
+
+        # columns of the archive as it was before; processes that mapped them keep reading them
+        current = {os.path.basename(self._column_path(name, sha256)) for name in table.columns}
+        for file in os.listdir(self.path):
+            if file.endswith('.bin') and file not in current:
+                try:
+                    os.remove(os.path.join(self.path, file))
+                except OSError:
+                    pass
@@ -0,0 +1,44 @@
+"""
+Columns of the streaming history as flat binary files, nothing but the values in little endian order.
+
+They are read by mapping them into memory read-only instead of copying them: a column becomes an array over the
+file's pages, which are only read from disk when used and are shared through the page cache by every process
+that maps the same file (several reports on one host hold the history once).
+"""
+import mmap
+import os
+
+import numpy as np
+
+
+def map_column(path: str, dtype, count: int) -> np.ndarray:
+    """
+    The first `count` values of a column file, as a read-only array over a memory map of it.
+    Raises ValueError if the file holds fewer values, FileNotFoundError if there is none.
+    """
+    stored = np.dtype(dtype).newbyteorder('<')
+    size = count * stored.itemsize
+    with open(path, 'rb') as f:
+        available = os.fstat(f.fileno()).st_size
+        if available < size:
+            raise ValueError(f'{path} holds {available // stored.itemsize} of {count} values')
+        if not size:
+            # an empty region cannot be mapped
+            return np.zeros(0, dtype=dtype)
+        # the map stays open as long as arrays over it do, closing the file does not unmap it
+        region = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+    # a no-op on little endian machines, a copy in native order on others
+    return np.frombuffer(region, dtype=stored, count=count).astype(dtype, copy=False)
+
+
+def write_column(path: str, column: np.ndarray) -> None:
+    """
+    Writes a column file, replacing the one at `path` at once: arrays mapped from the old file keep its values.
+    """
+    temporary = path + '.tmp'
+    try:
+        column.astype(column.dtype.newbyteorder('<'), copy=False).tofile(temporary)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
@@ -1,12 +1,49 @@
-import json
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import timedelta
-from os import listdir
-from typing import Optional
-
-from time import strptime
-
-from .types import History, PlayList
+from itertools import repeat
+from typing import Iterable, Optional, Union
+
+from instrumentation import phase, profiled
+
+from .cache import HistoryCache
+from .library import read_library, read_playlists
+from .sources import Archive, Directory
+from .store import HistoryStore
+from .stream import iter_json_array
+from .table import HistoryBuilder, HistoryTable
+from .types import PlayList
+
+
+def _read_streaming_history(source: Union[Directory, Archive], file: str, history: HistoryBuilder) -> None:
+    with phase(f'load.parse {file}'), source.open(file) as f:
+        # records are parsed one at a time, only the music plays are kept
+        for item in iter_json_array(f):
+            # Filter out podcasts and audiobooks
+            if (item.get('master_metadata_track_name') 
+                and not item.get('episode_name') 
+                and not item.get('audiobook_title')):
+                
+                history.append(
+                    timestamp=item['ts'],
+                    ms_played=item['ms_played'],
+                    shuffle=item['shuffle'],
+                    skipped=item['skipped'],
+                    artist=item['master_metadata_album_artist_name'],
+                    album=item['master_metadata_album_album_name'],
+                    track=item['master_metadata_track_name'],
+                    platform=item['platform'],
+                    country=item['conn_country'],
+                    reason_start=item['reason_start'],
+                    reason_end=item['reason_end'],
+                )
+
+
+def _parse_streaming_history(source: Union[Directory, Archive], file: str) -> HistoryTable:
+    # runs in a worker process, on its own copy of the source
+    with source:
+        history = HistoryBuilder()
+        _read_streaming_history(source, file, history)
+        return history.build()
 
 
 @dataclass
@@ -18,95 +55,140 @@ class _MyLibrary:
     following_artists: list
 
 
+# the parts of the Data Package MyData reads, each from its own files
+COMPONENTS = ('streaming_history', 'playlists', 'my_library')
+
+
 class MyData:
-    _streaming_history: list[History]
-    _playlists: list[PlayList]
+    _loaded: dict[str, Union[HistoryTable, list[PlayList], _MyLibrary]]
     _user: None
-    _library: _MyLibrary
-
-    def __init__(self, root_path: Optional[str] = None):
-        self._root = 'MyData/' if root_path is None else root_path
 
-        self._streaming_history = self._load_streaming_history()
-        self._playlists = self._load_playlists()
+    def __init__(self, root_path: Optional[str] = None, source: Optional[Union[Directory, Archive]] = None,
+                 workers: Optional[int] = None, cache: Optional[HistoryCache] = None,
+                 store: Optional[HistoryStore] = None, components: Iterable[str] = ()):
+        """
+        Every component (see COMPONENTS) is read from the files the first time its property is used and kept from
+        then on, so a run that only needs the streaming history never parses the playlists or the library.
+
+        :param root_path: directory of the extracted Data Package ('MyData/' default)
+        :param source: where to read the Data Package files from instead, e.g. an Archive of the zip
+        :param workers: number of processes that parse the streaming history files in parallel (default one, no pool)
+        :param cache: binary cache the parsed streaming history is read from and, when that is missing or stale, written to
+        :param store: store the plays of this Data Package are added to (those it does not hold yet);
+                      the streaming history is then that of the whole store, every package ingested so far
+        :param components: the components a run needs, loaded right away from `source`;
+                           the others are loaded later from the source opened again (it may be closed by then)
+        """
+        components = list(components)
+        unknown = [name for name in components if name not in COMPONENTS]
+        if unknown:
+            raise ValueError(f"unknown components {', '.join(unknown)}, expected some of {', '.join(COMPONENTS)}")
+
+        if source is None:
+            source = Directory('MyData/' if root_path is None else root_path)
+        self._source = source
+        self._workers = workers
+        self._cache = cache
+        self._store = store
+        self._loaders = {
+            'streaming_history': self._load_streaming_history,
+            'playlists': self._load_playlists,
+            'my_library': self._load_my_library,
+        }
+        self._loaded = {}
         self._user = None
-        self._library = _MyLibrary(
-                *self._load_my_library()
-        )
+
+        for name in components:
+            self._load(name, source)
+
+    def _load(self, name: str, source: Optional[Union[Directory, Archive]] = None):
+        if name not in self._loaded:
+            if source is None:
+                with self._source.reopen() as source:
+                    self._loaded[name] = self._loaders[name](source)
+            else:
+                self._loaded[name] = self._loaders[name](source)
+        return self._loaded[name]
+
+    def loaded(self) -> list[str]:
+        """
+        The components read so far.
+        """
+        return [name for name in COMPONENTS if name in self._loaded]
 
     @property
-    def streaming_history(self):
-        return self._streaming_history
+    def streaming_history(self) -> HistoryTable:
+        return self._load('streaming_history')
 
     @property
-    def playlists(self):
-        return self._playlists
+    def playlists(self) -> list[PlayList]:
+        return self._load('playlists')
 
     @property
     def user(self):
         raise NotImplementedError('Todo')
 
     @property
-    def my_library(self):
-        return self._library
+    def my_library(self) -> _MyLibrary:
+        return self._load('my_library')
 
     # data loaders (from file)
-    def _load_streaming_history(self):
-        files = list(filter(lambda x: x.startswith('Streaming_History'), listdir(self._root)))
-        files.sort()
-
-        all_ = []
-        for file in files:
-            with open(self._root + file, encoding='UTF-8') as f:
-                data = json.load(f)
-                for item in data:
-                    # Filter out podcasts and audiobooks
-                    if (item.get('master_metadata_track_name') 
-                        and not item.get('episode_name') 
-                        and not item.get('audiobook_title')):
-                        
-                        all_.append({
-                            'endTime': item['ts'],
-                            'artistName': item['master_metadata_album_artist_name'],
-                            'albumName': item['master_metadata_album_album_name'],
-                            'trackName': item['master_metadata_track_name'],
-                            'msPlayed': item['ms_played'],
-                            'platform': item['platform'],
-                            'connCountry': item['conn_country'],
-                            'reasonStart': item['reason_start'],
-                            'reasonEnd': item['reason_end'],
-                            'shuffle': item['shuffle'],
-                            'skipped': item['skipped']
-                        })
-
-        # Convert string timestamps to time objects
-        for h in all_:
-            h['endTime'] = strptime(h['endTime'], '%Y-%m-%dT%H:%M:%SZ')
-            h['msPlayed'] = timedelta(milliseconds=h['msPlayed'])
-
-        return all_
-
-    def _load_playlists(self):
-        files = list(filter(lambda x: x.startswith('Playlist'), listdir(self._root)))
+    def _load_streaming_history(self, source: Union[Directory, Archive]) -> HistoryTable:
+        # sorted by time once here, so the statistics can rely on it (and cut out time windows)
+        if self._cache is not None:
+            with phase('load.cache'):
+                history = self._cache.load()
+            if history is None:
+                history = self._parse_streaming_history(source)
+                with phase('load.sort'):
+                    history = history.sort_by_time()
+                with phase('load.cache_store'):
+                    self._cache.store(history)
+            history = history.sort_by_time()
+        else:
+            history = self._parse_streaming_history(source)
+            with phase('load.sort'):
+                history = history.sort_by_time()
+
+        if self._store is not None:
+            with phase('load.store'):
+                self._store.ingest(history, source=getattr(source, 'path', getattr(source, 'root', '')))
+                return self._store.history()
+        return history
+
+    def _parse_streaming_history(self, source: Union[Directory, Archive]) -> HistoryTable:
+        files = list(filter(lambda x: x.startswith('Streaming_History'), source.list()))
         files.sort()
 
-        all_ = []
-        for file in files:
-            with open(self._root + file, encoding='UTF-8') as f:
-                all_ += eval(f.read().replace('null', 'None'))['playlists']
+        if self._workers is None or self._workers < 2 or len(files) < 2:
+            history = HistoryBuilder()
+            for file in files:
+                _read_streaming_history(source, file, history)
+            return history.build()
 
-        # Convert string timestamps to time objects
-        for p in all_:
-            p['lastModifiedDate'] = strptime(p['lastModifiedDate'], '%Y-%m-%d')
-            for i in p['items']:
-                i['addedDate'] = strptime(i['addedDate'], '%Y-%m-%d')
+        # every worker parses whole files into columns, which are joined in file order
+        with phase('load.parse (parallel)', files=len(files)), \
+                ProcessPoolExecutor(max_workers=min(self._workers, len(files))) as pool:
+            return HistoryTable.concat(list(pool.map(_parse_streaming_history, repeat(source), files)))
 
-        return all_
+    @profiled('load.playlists')
+    def _load_playlists(self, source: Union[Directory, Archive]) -> list[PlayList]:
+        files = list(filter(lambda x: x.startswith('Playlist'), source.list()))
+        files.sort()
 
-    def _load_my_library(self):
+        handles = []
+        try:
+            for file in files:
+                handles.append(source.open(file))
+            return read_playlists(handles)
+        finally:
+            for f in handles:
+                f.close()
+
+    @profiled('load.library')
+    def _load_my_library(self, source: Union[Directory, Archive]) -> _MyLibrary:
         try:
-            with open(self._root + 'YourLibrary.json', encoding='UTF-8') as f:
-                all_ = eval(f.read())
-            return all_['tracks'], all_['albums'], all_['shows'], all_['episodes'], all_['artists']
+            with source.open('YourLibrary.json') as f:
+                return _MyLibrary(*read_library(f))
         except FileNotFoundError:
-            return [], [], [], [], []
+            return _MyLibrary([], [], [], [], [])
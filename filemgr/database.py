@@ -0,0 +1,122 @@
+import sqlite3
+from typing import Any, Iterator, Optional
+
+from .table import FLAG_COLUMNS, TEXT_COLUMNS, HistoryTable
+from .timestamps import to_epoch
+
+# bump whenever the schema changes, databases of another version read as empty and are rebuilt by `load`
+DATABASE_VERSION = 2
+
+_CHUNK = 65536
+_PLAY_COLUMNS = ('end_time', 'ms_played', 'month', *FLAG_COLUMNS, *TEXT_COLUMNS)
+_INDEXES = {
+    'play_end_time': '(end_time)',
+    'play_artist': '(artist, track)',
+    'play_track': '(track)',
+}
+
+
+class HistoryDatabase:
+    """
+    Streaming history in a SQLite database, for queries that run from disk instead of over the table in memory
+    (see stats.sql).
+
+    play holds a row per play, in time order (so rowid order is the order plays first appear in):
+    end_time (seconds since the epoch, UTC), ms_played, month (yyyymm of end_time), shuffle and skipped (1/0,
+    NULL where the export has no value) and the text columns as ids into tables of the same name (id, name).
+    It is indexed on end_time, artist/track and track. source holds what the plays were loaded from.
+
+    A database on disk is loaded once and then queried as often as needed:
+        database = HistoryDatabase('history.sqlite')
+        if database.source() != archive_version:
+            database.load(data.streaming_history, archive_version)
+
+    :param path: database file, made if missing (':memory:' for one that only lives as long as the object)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+
+    def __len__(self) -> int:
+        """
+        Number of plays in the database; 0 if it is empty or of another version.
+        """
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != DATABASE_VERSION:
+            return 0
+        return self.connection.execute('SELECT COUNT(*) FROM play').fetchone()[0]
+
+    def source(self) -> Optional[str]:
+        """
+        What the plays were loaded from (the `source` given to `load`); None if the database is empty
+        or of another version.
+        """
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != DATABASE_VERSION:
+            return None
+        return self.connection.execute('SELECT key FROM source').fetchone()[0]
+
+    def load(self, history: HistoryTable, source: Optional[str] = None) -> None:
+        """
+        Replaces the contents of the database with the plays of `history`, a chunk at a time.
+
+        :param source: what the history was read from, e.g. a version of the archive, returned by `source`
+        """
+        history = history.sort_by_time()
+        with self.connection:
+            for name in ('play', 'source', *TEXT_COLUMNS):
+                self.connection.execute(f'DROP TABLE IF EXISTS {name}')
+            self.connection.execute('CREATE TABLE source (key TEXT)')
+            self.connection.execute('INSERT INTO source VALUES (?)', (source,))
+            for name in TEXT_COLUMNS:
+                self.connection.execute(f'CREATE TABLE {name} (id INTEGER PRIMARY KEY, name TEXT)')
+                self.connection.executemany(f'INSERT INTO {name} VALUES (?, ?)', enumerate(history.vocab[name]))
+            self.connection.execute(
+                'CREATE TABLE play (end_time INTEGER NOT NULL, ms_played INTEGER NOT NULL, month INTEGER NOT NULL, '
+                + ', '.join(f'{name} INTEGER' for name in FLAG_COLUMNS) + ', '
+                + ', '.join(f'{name} INTEGER REFERENCES {name} (id)' for name in TEXT_COLUMNS) + ')'
+            )
+
+            insert = f"INSERT INTO play VALUES ({', '.join('?' * len(_PLAY_COLUMNS))})"
+            for start in range(0, len(history), _CHUNK):
+                chunk = history[start:start + _CHUNK]
+                calendar = chunk.calendar
+                columns = [
+                    chunk.end_time.tolist(),
+                    chunk.ms_played.tolist(),
+                    (calendar['year'].astype(int) * 100 + calendar['month']).tolist(),
+                    *([None if flag == -1 else flag for flag in getattr(chunk, name).tolist()] for name in FLAG_COLUMNS),
+                    *(getattr(chunk, name).tolist() for name in TEXT_COLUMNS),
+                ]
+                self.connection.executemany(insert, zip(*columns))
+
+            # indexes are built once all rows are in, which is faster than keeping them up to date
+            for name, indexed in _INDEXES.items():
+                self.connection.execute(f'CREATE INDEX {name} ON play {indexed}')
+            self.connection.execute(f'PRAGMA user_version = {DATABASE_VERSION}')
+
+    @staticmethod
+    def where(window: Optional[tuple] = None) -> tuple[str, tuple[int, int]]:
+        """
+        Condition (on play.end_time) and its parameters that select the plays within a stats Window.
+        """
+        start, end = (None, None) if window is None else window
+        return 'play.end_time BETWEEN ? AND ?', (
+            -2 ** 63 if start is None else to_epoch(start),
+            2 ** 63 - 1 if end is None else to_epoch(end),
+        )
+
+    def query(self, sql: str, parameters: tuple = ()) -> Iterator[tuple[Any, ...]]:
+        """
+        Rows of a query, fetched as they are iterated.
+        """
+        return self.connection.execute(sql, parameters)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> 'HistoryDatabase':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
@@ -1,21 +1,31 @@
-import os
-from zipfile import ZipFile
-
-from .data import MyData
+from typing import Iterable, Optional
 
+from instrumentation import phase
 
-def _extract_data(path: str) -> None:
-    if not os.path.exists('Spotify Extended Streaming History'):
-        with ZipFile(path) as zip_:
-            # todo: check extracted location & modifiable root path
-            zip_.extractall()
+from .cache import HistoryCache
+from .data import MyData
+from .sources import Archive
+from .store import HistoryStore
 
 
-def load_zipped_data(path: str = 'my_spotify_data.zip') -> MyData:
+def load_zipped_data(path: str = 'my_spotify_data.zip', workers: Optional[int] = None, cache: bool = True,
+                     store: Optional[str] = None, components: Iterable[str] = ('streaming_history',)) -> MyData:
     """
     Loads a zipped Spotify Data Package into a MyData object and returns it.
+    The files are read straight out of the archive, nothing is extracted to disk.
 
     :param path: relative path to zip file ('my_spotify_data.zip' default)
+    :param workers: number of processes that parse the streaming history files in parallel
+    :param cache: keep the parsed streaming history in a binary cache next to the zip,
+                  later loads of the unchanged zip skip parsing it (True default)
+    :param store: directory of a HistoryStore to add the plays to that it does not hold yet (incremental mode);
+                  the streaming history is then that of every Data Package ingested into the store
+    :param components: the components (see filemgr.data.COMPONENTS) read while loading, so their errors show here
+                       (the streaming history default); the others are read from the zip when first used
     """
-    _extract_data(path)
-    return MyData(root_path='Spotify Extended Streaming History/')
+    # members are decompressed while they are parsed, that time is part of the load.parse phases
+    with phase('load.open_archive', path=path):
+        archive = Archive(path, root='Spotify Extended Streaming History/')
+    with archive:
+        return MyData(source=archive, workers=workers, cache=HistoryCache(path) if cache else None,
+                      store=HistoryStore(store) if store is not None else None, components=components)
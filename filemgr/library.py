@@ -0,0 +1,102 @@
+"""
+Playlists and the library of the Data Package, read with a JSON parser a record at a time.
+"""
+from collections.abc import Sequence
+from typing import Iterable, TextIO, Union
+
+import numpy as np
+
+from .stream import iter_json_members
+from .timestamps import parse_dates, to_date
+from .types import Item, PlayList
+
+_TRACK_KEYS = ('trackName', 'artistName', 'albumName', 'trackUri')
+# members of the library file, in the order MyData keeps them
+LIBRARY_LISTS = ('tracks', 'albums', 'shows', 'episodes', 'artists')
+
+
+class PlaylistItems(Sequence):
+    """
+    The items of a playlist, stored compactly: tracks as ids into a table of (trackName, artistName, albumName,
+    trackUri) tuples shared by all playlists, so a track on several playlists is stored once, and the dates they
+    were added as day numbers. Items that are not plain tracks (episodes, local files) are kept as they are.
+
+    Indexing and iterating gives Item dicts like the export's, with addedDate as struct_time;
+    plain tracks come back with the members of Item only (other null members, like audiobook, are dropped).
+    """
+
+    def __init__(self, tracks: list[tuple], ids: np.ndarray, added: np.ndarray, others: dict[int, dict]):
+        self.tracks = tracks
+        self.ids = ids
+        self.added = added
+        self.others = others
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Item, list[Item]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = range(len(self))[index]
+        if index in self.others:
+            item = dict(self.others[index])
+        else:
+            item = {'track': dict(zip(_TRACK_KEYS, self.tracks[self.ids[index]])), 'episode': None, 'localTrack': None}
+        item['addedDate'] = to_date(self.added[index])
+        return item
+
+
+def _plain_track(item: dict) -> bool:
+    # a track and nothing else, which the table of tracks can hold
+    track = item.get('track')
+    return (isinstance(track, dict) and len(track) == len(_TRACK_KEYS) and all(key in track for key in _TRACK_KEYS)
+            and all(value is None for key, value in item.items() if key not in ('track', 'addedDate')))
+
+
+def read_playlists(files: Iterable[TextIO]) -> list[PlayList]:
+    """
+    The playlists of the Playlist*.json files, a playlist at a time; the dates of all of them are converted at once.
+    """
+    tracks: list[tuple] = []
+    track_ids: dict[tuple, int] = {}
+    playlists, items, added, modified = [], [], [], []
+
+    for file in files:
+        for name, playlist in iter_json_members(file):
+            if name != 'playlists':
+                continue
+            ids, others = [], {}
+            for i, item in enumerate(playlist['items']):
+                added.append(item['addedDate'])
+                if _plain_track(item):
+                    track = tuple(item['track'][key] for key in _TRACK_KEYS)
+                    ids.append(track_ids.setdefault(track, len(track_ids)))
+                    if ids[-1] == len(tracks):
+                        tracks.append(track)
+                else:
+                    ids.append(-1)
+                    others[i] = {key: value for key, value in item.items() if key != 'addedDate'}
+            items.append((np.array(ids, dtype=np.int32), others))
+            # the decoded items are dropped right away, the compact ones take their place once the dates are read
+            playlist['items'] = None
+            modified.append(playlist['lastModifiedDate'])
+            playlists.append(playlist)
+
+    added_days = parse_dates(added)
+    start = 0
+    for playlist, (ids, others), day in zip(playlists, items, parse_dates(modified).tolist()):
+        playlist['items'] = PlaylistItems(tracks, ids, added_days[start:start + len(ids)], others)
+        playlist['lastModifiedDate'] = to_date(day)
+        start += len(ids)
+    return playlists
+
+
+def read_library(file: TextIO) -> tuple[list, list, list, list, list]:
+    """
+    The saved tracks, albums, shows, episodes and followed artists of the YourLibrary.json file, a record at a time.
+    """
+    lists = {name: [] for name in LIBRARY_LISTS}
+    for name, value in iter_json_members(file):
+        if name in lists:
+            lists[name].append(value)
+    return tuple(lists[name] for name in LIBRARY_LISTS)
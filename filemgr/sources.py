@@ -0,0 +1,128 @@
+import io
+import mmap
+import os
+import struct
+import zipfile
+from typing import Optional, TextIO
+
+# zip local file header, the last two fields are the lengths of the name and extra field that follow it
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+
+
+class Directory:
+    """
+    Data Package files in a directory on disk.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def list(self) -> list[str]:
+        return os.listdir(self.root)
+
+    def open(self, name: str) -> TextIO:
+        return open(os.path.join(self.root, name), encoding='UTF-8')
+
+    def close(self) -> None:
+        pass
+
+    def reopen(self) -> 'Directory':
+        return Directory(self.root)
+
+    def __enter__(self) -> 'Directory':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _MappedMember(io.RawIOBase):
+    """
+    Read-only file over a memory-mapped region of the archive (an uncompressed member).
+    """
+
+    def __init__(self, view: memoryview):
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._pos:self._pos + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._pos += len(chunk)
+        return len(chunk)
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+class Archive:
+    """
+    Data Package files read straight out of the zip, without extracting them.
+
+    Members stored without compression are read through a memory map of the archive;
+    compressed ones are decompressed while they are read.
+
+    :param path: path to the zip file
+    :param root: folder inside the archive that holds the files
+    """
+
+    def __init__(self, path: str, root: str = ''):
+        self.path = path
+        self.root = root
+        self._zip = zipfile.ZipFile(path)
+        self._file = open(path, 'rb')
+        self._map: Optional[mmap.mmap] = None
+
+    def list(self) -> list[str]:
+        return [
+            info.filename[len(self.root):] for info in self._zip.infolist()
+            if info.filename.startswith(self.root) and '/' not in info.filename[len(self.root):]
+        ]
+
+    def open(self, name: str) -> TextIO:
+        try:
+            info = self._zip.getinfo(self.root + name)
+        except KeyError:
+            raise FileNotFoundError(f'{self.root + name} is not in the archive') from None
+
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            binary = io.BufferedReader(_MappedMember(self._member_view(info)))
+        else:
+            binary = self._zip.open(info)
+        return io.TextIOWrapper(binary, encoding='UTF-8')
+
+    def _member_view(self, info: zipfile.ZipInfo) -> memoryview:
+        if self._map is None:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        # the data follows the member's local header, whose name and extra field lengths may differ from the directory's
+        end = info.header_offset + _LOCAL_HEADER.size
+        name_length, extra_length = _LOCAL_HEADER.unpack(self._map[info.header_offset:end])[-2:]
+        start = end + name_length + extra_length
+        return memoryview(self._map)[start:start + info.file_size]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+        self._zip.close()
+
+    def reopen(self) -> 'Archive':
+        """
+        The same files through an archive opened again, which can still be read after this one is closed.
+        """
+        return Archive(self.path, self.root)
+
+    def __reduce__(self):
+        # sent to worker processes by path, each one opens the archive again
+        return Archive, (self.path, self.root)
+
+    def __enter__(self) -> 'Archive':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
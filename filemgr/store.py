@@ -0,0 +1,284 @@
+import os
+from datetime import date, timedelta
+from typing import Optional
+from zipfile import BadZipFile
+
+import numpy as np
+
+from .cache import _decode, _encode
+from .columns import map_column
+from .table import DTYPES, TEXT_COLUMNS, HistoryTable
+
+# bump whenever the layout of the store changes; stores of another version are refused, not rebuilt
+STORE_VERSION = 1
+
+# running totals kept with the store, see HistoryStore
+_AGGREGATES = {
+    # plays of every artist/track pair, and when it was first played
+    'pair_artist': np.int32,
+    'pair_track': np.int32,
+    'pair_plays': np.int64,
+    'pair_first': np.int64,
+    # listening time (ms) of every artist (indexed by artist code), and when it was first played
+    'artist_ms': np.int64,
+    'artist_first': np.int64,
+    # listening time (ms) of every day (days since 1970-01-01) with plays, in date order
+    'days': np.int64,
+    'day_ms': np.int64,
+}
+_EPOCH = date(1970, 1, 1)
+
+
+def _group_ids(end_time: np.ndarray, track: np.ndarray, ms_played: np.ndarray) -> np.ndarray:
+    """
+    Numbers the distinct (end_time, track, ms_played) keys of the rows.
+    """
+    if not len(end_time):
+        return np.zeros(0, dtype=np.int64)
+
+    offset = end_time - end_time.min()
+    if offset.max() < 1 << 31 and 0 <= ms_played.min() and ms_played.max() < 1 << 32:
+        # exports are nearly in time order, which a stable sort of one key is fast on
+        key = offset << 32 | ms_played
+        order = np.argsort(key, kind='stable')
+        # the few rows that share end_time and ms_played with others are put in track order among them
+        same = key[order[1:]] == key[order[:-1]]
+        if same.any():
+            rows = np.flatnonzero(np.concatenate((same, [False])) | np.concatenate(([False], same)))
+            shared = order[rows]
+            order[rows] = shared[np.lexsort((track[shared], key[shared]))]
+    else:
+        order = np.lexsort((track, ms_played, end_time))
+
+    end_time, track, ms_played = end_time[order], track[order], ms_played[order]
+    starts = np.concatenate(([True], (end_time[1:] != end_time[:-1]) | (track[1:] != track[:-1])
+                             | (ms_played[1:] != ms_played[:-1])))
+    ids = np.empty(len(order), dtype=np.int64)
+    ids[order] = np.cumsum(starts) - 1
+    return ids
+
+
+def _unseen(stored: tuple[np.ndarray, ...], batch: tuple[np.ndarray, ...]) -> np.ndarray:
+    """
+    Which rows of the batch are not in the stored rows yet, both given as (end_time, track, ms_played) columns.
+    A key the batch holds n times and the stored rows m times has its last n - m rows marked.
+    """
+    ids = _group_ids(*(np.concatenate(columns) for columns in zip(stored, batch)))
+    stored_ids, batch_ids = ids[:len(stored[0])], ids[len(stored[0]):]
+    held = np.bincount(stored_ids, minlength=len(ids))
+
+    # how many earlier batch rows have the same key
+    order = np.argsort(batch_ids, kind='stable')
+    positions = np.arange(len(order))
+    starts = np.concatenate(([True], batch_ids[order[1:]] != batch_ids[order[:-1]]))
+    occurrence = np.empty(len(order), dtype=np.int64)
+    occurrence[order] = positions - np.maximum.accumulate(np.where(starts, positions, 0))
+    return occurrence >= held[batch_ids]
+
+
+class HistoryStore:
+    """
+    Streaming history of every Data Package ingested into it, kept in a directory, with running aggregates.
+
+    Packages overlap, so a play is identified by its end time, track name and ms_played:
+    `ingest` appends only the plays the store does not hold yet, and updates the aggregates
+    (plays per artist/track, listening time per artist and per day) with the sums of those plays alone.
+    A play a package holds n times is added as often as the store holds it fewer than n times,
+    so ingesting the same package again changes nothing.
+
+    <path>/<column>.bin  column files (see filemgr.columns), new plays are appended; they are memory-mapped when read
+    <path>/state.npz     row count, vocabularies and aggregates, replaced at once when an ingest is complete;
+                         rows past its count, left by an interrupted ingest, are ignored and later overwritten
+
+    Unlike the cache, a store cannot be rebuilt from its archive, so one that cannot be read raises ValueError
+    instead of being replaced. Only one process should ingest into a store at a time.
+
+    :param path: directory of the store, made on the first ingest
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._state = os.path.join(path, 'state.npz')
+        try:
+            with np.load(self._state, allow_pickle=False) as state:
+                meta = _decode(state['meta'])
+                if meta['version'] != STORE_VERSION:
+                    raise ValueError(f'{path} is a version {meta["version"]} store, expected {STORE_VERSION}')
+                self.vocab = _decode(state['vocab'])
+                self.aggregates = {name: state[name] for name in _AGGREGATES}
+        except FileNotFoundError:
+            meta = {'version': STORE_VERSION, 'rows': 0, 'sources': []}
+            self.vocab = {name: [] for name in TEXT_COLUMNS}
+            self.aggregates = {name: np.zeros(0, dtype=dtype) for name, dtype in _AGGREGATES.items()}
+        except (OSError, EOFError, KeyError, TypeError, BadZipFile) as e:
+            raise ValueError(f'cannot read the store in {path}: {e}') from e
+        self._meta = meta
+
+    def __len__(self) -> int:
+        return self._meta['rows']
+
+    @property
+    def sources(self) -> list[dict]:
+        """
+        Every ingest so far, in order: the source's name, its number of plays and how many of them were new.
+        """
+        return self._meta['sources']
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.path, f'{name}.bin')
+
+    def _read(self, name: str) -> np.ndarray:
+        try:
+            return map_column(self._column_path(name), DTYPES[name], len(self))
+        except FileNotFoundError:
+            if len(self):
+                raise ValueError(f'{self._column_path(name)} is missing, the store holds {len(self)} plays') from None
+            return np.zeros(0, dtype=DTYPES[name])
+
+    def history(self) -> HistoryTable:
+        """
+        All plays in the store, sorted by time. While the plays were ingested in time order (packages of later
+        months after earlier ones) the columns are read-only arrays over the column files, otherwise sorted copies.
+        """
+        columns = {name: self._read(name) for name in HistoryTable.COLUMNS}
+        return HistoryTable(columns, {name: list(values) for name, values in self.vocab.items()}).sort_by_time()
+
+    def ingest(self, history: HistoryTable, source: str = '') -> int:
+        """
+        Adds the plays of `history` the store does not hold yet, and updates the aggregates by them.
+
+        :param source: name of where the plays come from, kept in `sources`
+        :return: number of plays added
+        """
+        # the new plays' text as codes into the store's vocabularies, which grow by the values they lack
+        vocab = {name: list(values) for name, values in self.vocab.items()}
+        columns = {}
+        for name in HistoryTable.COLUMNS:
+            column = getattr(history, name)
+            if name in TEXT_COLUMNS:
+                lookup = {value: code for code, value in enumerate(vocab[name])}
+                codes = [lookup.setdefault(value, len(lookup)) for value in history.vocab[name]]
+                vocab[name] = list(lookup)
+                column = np.array(codes, dtype=np.int32)[column]
+            columns[name] = column
+
+        # only stored plays from the time span of the new ones can be the same
+        if len(history):
+            end_time = self._read('end_time')
+            overlap = (end_time >= columns['end_time'].min()) & (end_time <= columns['end_time'].max())
+            stored = (end_time[overlap], self._read('track')[overlap], self._read('ms_played')[overlap])
+            new = _unseen(stored, (columns['end_time'], columns['track'], columns['ms_played']))
+            columns = {name: column[new] for name, column in columns.items()}
+        added = len(columns['end_time'])
+
+        os.makedirs(self.path, exist_ok=True)
+        for name, column in columns.items():
+            path = self._column_path(name)
+            dtype = np.dtype(DTYPES[name]).newbyteorder('<')
+            with open(path, 'ab') as f:
+                # drop what an interrupted ingest left past the committed rows
+                f.truncate(len(self) * dtype.itemsize)
+                column.astype(dtype, copy=False).tofile(f)
+
+        aggregates = self._updated(self.aggregates, columns, len(vocab['artist']))
+        meta = {
+            **self._meta,
+            'rows': len(self) + added,
+            'sources': self.sources + [{'source': source, 'plays': len(history), 'added': added}],
+        }
+        temporary = self._state + '.tmp'
+        try:
+            with open(temporary, 'wb') as f:
+                np.savez(f, meta=_encode(meta), vocab=_encode(vocab), **aggregates)
+            # the ingest counts once the new state is in place
+            os.replace(temporary, self._state)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+        self._meta, self.vocab, self.aggregates = meta, vocab, aggregates
+        return added
+
+    @staticmethod
+    def _updated(aggregates: dict[str, np.ndarray], new: dict[str, np.ndarray], artists: int) -> dict[str, np.ndarray]:
+        """
+        The aggregates with the new plays added to them.
+        """
+        aggregates = dict(aggregates)
+        end_time, ms_played, artist, track = new['end_time'], new['ms_played'], new['artist'], new['track']
+
+        # artist/track pairs: the stored ones and those of the new plays, merged by pair
+        tracks = int(max(aggregates['pair_track'].max(initial=-1), track.max(initial=-1))) + 1
+        keys = np.concatenate((aggregates['pair_artist'].astype(np.int64) * tracks + aggregates['pair_track'],
+                               artist.astype(np.int64) * tracks + track))
+        pairs, inverse = np.unique(keys, return_inverse=True)
+        plays = np.zeros(len(pairs), dtype=np.int64)
+        np.add.at(plays, inverse, np.concatenate((aggregates['pair_plays'], np.ones(len(end_time), dtype=np.int64))))
+        aggregates['pair_plays'] = plays
+        first = np.full(len(pairs), np.iinfo(np.int64).max)
+        np.minimum.at(first, inverse, np.concatenate((aggregates['pair_first'], end_time)))
+        aggregates['pair_first'] = first
+        aggregates['pair_artist'] = (pairs // tracks).astype(np.int32)
+        aggregates['pair_track'] = (pairs % tracks).astype(np.int32)
+
+        # artists are indexed by code, new artists get the next codes
+        grown = artists - len(aggregates['artist_ms'])
+        artist_ms = np.concatenate((aggregates['artist_ms'], np.zeros(grown, dtype=np.int64)))
+        np.add.at(artist_ms, artist, ms_played)
+        artist_first = np.concatenate((aggregates['artist_first'], np.full(grown, np.iinfo(np.int64).max)))
+        np.minimum.at(artist_first, artist, end_time)
+        aggregates['artist_ms'], aggregates['artist_first'] = artist_ms, artist_first
+
+        days, inverse = np.unique(np.concatenate((aggregates['days'], end_time // 86400)), return_inverse=True)
+        day_ms = np.zeros(len(days), dtype=np.int64)
+        np.add.at(day_ms, inverse, np.concatenate((aggregates['day_ms'], ms_played)))
+        aggregates['days'], aggregates['day_ms'] = days, day_ms
+        return aggregates
+
+    @staticmethod
+    def _ranked(keys: list, values: np.ndarray, first: np.ndarray, top_k: Optional[int]) -> dict:
+        # the order of the statistics: descending, ties in order of their first play; equal keys are summed
+        merged = {}
+        for i in np.argsort(first, kind='stable').tolist():
+            merged[keys[i]] = merged.get(keys[i], 0) + int(values[i])
+        ranked = sorted(merged.items(), key=lambda item: item[1], reverse=True)
+        return dict(ranked if top_k is None else ranked[:top_k])
+
+    def play_counts(self, top_k: Optional[int] = None) -> dict[str, int]:
+        """
+        Plays per "Artist - Track" of all plays in the store, most played first (as stats.play_counts).
+        """
+        artists, tracks = self.vocab['artist'], self.vocab['track']
+        labels = [
+            f"{artists[artist]} - {tracks[track]}"
+            for artist, track in zip(self.aggregates['pair_artist'].tolist(), self.aggregates['pair_track'].tolist())
+        ]
+        return self._ranked(labels, self.aggregates['pair_plays'], self.aggregates['pair_first'], top_k)
+
+    def artist_time(self, top_k: Optional[int] = None) -> dict[str, timedelta]:
+        """
+        Listening time per artist of all plays in the store, longest first (as stats.longest_played_artist).
+        """
+        played = np.flatnonzero(self.aggregates['artist_first'] < np.iinfo(np.int64).max)
+        ranked = self._ranked([self.vocab['artist'][i] for i in played.tolist()], self.aggregates['artist_ms'][played],
+                              self.aggregates['artist_first'][played], top_k)
+        return {artist: timedelta(milliseconds=ms) for artist, ms in ranked.items()}
+
+    def daily_time(self) -> dict[date, timedelta]:
+        """
+        Listening time of every day with plays in the store, in date order.
+        """
+        return {
+            _EPOCH + timedelta(days=day): timedelta(milliseconds=ms)
+            for day, ms in zip(self.aggregates['days'].tolist(), self.aggregates['day_ms'].tolist())
+        }
+
+    def most_musical_day(self) -> tuple[str, timedelta]:
+        """
+        Day with the most listening time of all plays in the store (as stats.most_musical_day).
+        """
+        if not len(self.aggregates['days']):
+            return "None", timedelta(0)
+        i = int(np.argmax(self.aggregates['day_ms']))
+        return ((_EPOCH + timedelta(days=int(self.aggregates['days'][i]))).isoformat(),
+                timedelta(milliseconds=int(self.aggregates['day_ms'][i])))
@@ -0,0 +1,149 @@
+import json
+import re
+from json.decoder import WHITESPACE
+from typing import Any, Iterator, TextIO
+
+_SEPARATOR = re.compile(r'[ \t\n\r]*([,\]])[ \t\n\r]*')
+_NAME_END = re.compile(r'[ \t\n\r]*:')
+_MEMBER_END = re.compile(r'[ \t\n\r]*[,}]')
+
+
+class _Reader:
+    """
+    Text buffer over a file that is refilled in chunks and dropped once it has been consumed.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int):
+        self._file = file
+        self._chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """
+        Reads the next chunk, returns False at the end of the file.
+        """
+        if self.eof:
+            return False
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Skips whitespace and returns the next character ('' at the end of the file).
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect_end(self) -> None:
+        """
+        Raises like json.loads if anything but whitespace follows the document.
+        """
+        if self.peek():
+            raise json.JSONDecodeError('Extra data', self.buffer, self.pos)
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+
+def iter_json_array(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yields the elements of the JSON array in `file` one at a time.
+
+    The file is read in chunks of `chunk_size` characters, so only the element being decoded
+    (and not the whole document) is held in memory.
+    """
+    reader = _Reader(file, chunk_size)
+    reader.expect('[')
+    yield from _elements(reader, json.JSONDecoder().raw_decode)
+    reader.expect_end()
+
+
+def iter_json_members(file: TextIO, chunk_size: int = 1 << 16) -> Iterator[tuple[str, Any]]:
+    """
+    Yields the members of the JSON object in `file` as (name, value) pairs, where the value is an array,
+    one pair per element of it instead, as iter_json_array does (the data package's playlist and library files
+    are objects of arrays); an empty array yields nothing.
+    """
+    decode = json.JSONDecoder().raw_decode
+    reader = _Reader(file, chunk_size)
+
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.pos += 1
+        reader.expect_end()
+        return
+    while True:
+        if reader.peek() != '"':
+            raise json.JSONDecodeError('Expecting property name enclosed in double quotes', reader.buffer, reader.pos)
+        name = _value(reader, decode, _NAME_END)
+        reader.expect(':')
+        if reader.peek() == '[':
+            reader.pos += 1
+            for element in _elements(reader, decode):
+                yield name, element
+        else:
+            yield name, _value(reader, decode, _MEMBER_END)
+        if reader.expect(',}') == '}':
+            reader.expect_end()
+            return
+
+
+def _value(reader: _Reader, decode, follows: re.Pattern) -> Any:
+    # decodes the value at the reader's position, which `follows` has to come after, and moves past the value
+    while True:
+        try:
+            value, end = decode(reader.buffer, reader.pos)
+            followed = follows.match(reader.buffer, end)
+        except json.JSONDecodeError:
+            followed = None
+        if followed is None:
+            # the value continues in the next chunk, or was cut short there (e.g. a number)
+            if reader.fill():
+                continue
+            # nothing left to read: a broken value raises here, what should follow it is missing and raises next
+            value, end = decode(reader.buffer, reader.pos)
+        reader.pos = end
+        return value
+
+
+def _elements(reader: _Reader, decode) -> Iterator[Any]:
+    # the elements of the array whose '[' was just read, up to and including its ']'
+    if reader.peek() == ']':
+        reader.pos += 1
+        return
+
+    while True:
+        try:
+            value, end = decode(reader.buffer, reader.pos)
+            separator = _SEPARATOR.match(reader.buffer, end)
+        except json.JSONDecodeError:
+            separator = None
+        if separator is None:
+            # the element continues in the next chunk, or was cut short there (e.g. a number)
+            if reader.fill():
+                reader.peek()
+                continue
+            # nothing left to read, so the document itself is broken
+            value, end = decode(reader.buffer, reader.pos)
+            raise json.JSONDecodeError("Expecting ',' delimiter", reader.buffer, end)
+
+        reader.pos = separator.end()
+        yield value
+
+        if separator.group(1) == ']':
+            return
@@ -0,0 +1,373 @@
+from array import array
+from datetime import timedelta
+from functools import cached_property
+from time import gmtime, strftime, struct_time
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from .timestamps import FORMAT, calendar, parse_timestamps
+from .types import History, Play
+
+
+# dictionary encoded text columns and the History keys they come from
+TEXT_COLUMNS = {
+    'artist': 'artistName',
+    'album': 'albumName',
+    'track': 'trackName',
+    'platform': 'platform',
+    'country': 'connCountry',
+    'reason_start': 'reasonStart',
+    'reason_end': 'reasonEnd',
+}
+# booleans that may be missing in an export: 1 = True, 0 = False, -1 = None
+FLAG_COLUMNS = {
+    'shuffle': 'shuffle',
+    'skipped': 'skipped',
+}
+# storage type of every column
+DTYPES = {
+    'end_time': np.int64,
+    'ms_played': np.int64,
+    **{name: np.int8 for name in FLAG_COLUMNS},
+    **{name: np.int32 for name in TEXT_COLUMNS},
+}
+# pairs of text columns whose combinations are numbered as entities, see HistoryTable.codes
+ENTITIES = {
+    'artist_track': ('artist', 'track'),
+    'artist_album': ('artist', 'album'),
+}
+# derived from end_time, see HistoryTable.calendar
+CALENDAR = ('year', 'month', 'day', 'weekday', 'hour', 'date')
+_FLAGS = (False, True, None)  # indexed by the stored flag, so -1 maps to None
+
+_CHUNK = 65536
+
+
+def _struct_time(ts: int) -> struct_time:
+    # same shape strptime produces for the export's timestamps (tm_isdst unknown)
+    return struct_time(gmtime(ts)[:8] + (-1,))
+
+
+def first_rows(codes: np.ndarray, size: int) -> np.ndarray:
+    """
+    Row of the first occurrence of every code from 0 to size - 1 (len(codes) for codes that do not occur).
+    """
+    first = np.full(size, len(codes), dtype=np.int64)
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    return first
+
+
+def _factorize(key: np.ndarray, last: np.ndarray, last_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Numbers the distinct values of `key` in order of their first row;
+    `last` holds the codes of the column the key ends with, which nearly always settles the key on its own.
+
+    :return: the number of every row, and the first row of every number
+    """
+    # rows with the same key as the first row of their last code are numbered by that code,
+    # only the few others (e.g. a track name two artists use) are sorted out
+    by_last = first_rows(last, last_size)
+    numbers = last.astype(np.int64)
+    others = np.flatnonzero(key != key[by_last[last]])
+    size = last_size
+    if len(others):
+        values, inverse = np.unique(key[others], return_inverse=True)
+        numbers[others] = last_size + inverse
+        size += len(values)
+
+    first = first_rows(numbers, size)
+    seen = np.flatnonzero(first < len(key))
+    seen = seen[np.argsort(first[seen], kind='stable')]
+    renumber = np.zeros(size, dtype=np.int32)
+    renumber[seen] = np.arange(len(seen), dtype=np.int32)
+    return renumber[numbers], first[seen]
+
+
+class HistoryTable:
+    """
+    Column store of the streaming history.
+
+    end_time (seconds since the epoch, UTC) and ms_played are int64 arrays,
+    shuffle and skipped are int8 arrays (1/0, -1 where the export has no value),
+    and the text columns (artist, album, track, platform, country, reason_start, reason_end)
+    are int32 codes into the table's `vocab` lists.
+
+    Calendar fields of end_time are derived from it in bulk, on first use (see `calendar`),
+    and so are integer ids of the artist/track and artist/album pairs (see `codes`).
+    A table known to be in time order (`time_sorted`, see `sort_by_time`) can be cut to any time window
+    in O(log n) with `between`; the result shares its memory.
+
+    The table also behaves like the old list of History dicts:
+    indexing and iterating materialize History rows on the fly,
+    so code written against the list keeps working.
+    """
+    end_time: np.ndarray
+    ms_played: np.ndarray
+    shuffle: np.ndarray
+    skipped: np.ndarray
+    artist: np.ndarray
+    album: np.ndarray
+    track: np.ndarray
+    platform: np.ndarray
+    country: np.ndarray
+    reason_start: np.ndarray
+    reason_end: np.ndarray
+
+    COLUMNS = ('end_time', 'ms_played', *FLAG_COLUMNS, *TEXT_COLUMNS)
+
+    def __init__(self, columns: dict[str, np.ndarray], vocab: dict[str, list[Optional[str]]],
+                 time_sorted: bool = False):
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.vocab = vocab
+        self.time_sorted = time_sorted
+        self._sessions = {}
+        self._entities = {}
+        self._labels = {}
+
+    @property
+    def columns(self) -> dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    @classmethod
+    def from_records(cls, streaming_history: Iterable[History]) -> 'HistoryTable':
+        """
+        Builds a table from History dicts (e.g. a list made by older code).
+        """
+        builder = HistoryBuilder()
+        for item in streaming_history:
+            builder.append(
+                strftime(FORMAT, item['endTime']),
+                item['msPlayed'] // timedelta(milliseconds=1),
+                item.get('shuffle'), item.get('skipped'),
+                *(item.get(key) for key in TEXT_COLUMNS.values())
+            )
+        return builder.build()
+
+    @classmethod
+    def concat(cls, tables: list['HistoryTable']) -> 'HistoryTable':
+        """
+        Joins tables end to end, re-encoding their text columns onto one set of vocabularies.
+        """
+        if not tables:
+            return HistoryBuilder().build()
+
+        lookups = {name: {} for name in TEXT_COLUMNS}
+        parts = {name: [] for name in cls.COLUMNS}
+        for table in tables:
+            for name in cls.COLUMNS:
+                column = getattr(table, name)
+                if name in lookups:
+                    lookup = lookups[name]
+                    codes = [lookup.setdefault(value, len(lookup)) for value in table.vocab[name]]
+                    column = np.array(codes, dtype=np.int32)[column]
+                parts[name].append(column)
+
+        return cls(
+            {name: np.concatenate(columns) for name, columns in parts.items()},
+            {name: list(lookup) for name, lookup in lookups.items()}
+        )
+
+    @cached_property
+    def calendar(self) -> dict[str, np.ndarray]:
+        """
+        year, month, day, weekday, hour and date (days since 1970-01-01) of every play's end_time, in UTC.
+        """
+        return calendar(self.end_time)
+
+    def __len__(self) -> int:
+        return len(self.end_time)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[History, 'HistoryTable']:
+        if isinstance(index, slice):
+            return self._part(index, self.time_sorted and (index.step or 1) > 0)
+
+        if not -len(self) <= index < len(self):
+            raise IndexError('history index out of range')
+        index %= len(self)
+        return next(self._rows(index, index + 1))
+
+    def __iter__(self) -> Iterator[History]:
+        for start in range(0, len(self), _CHUNK):
+            yield from self._rows(start, start + _CHUNK)
+
+    def take(self, indices: np.ndarray) -> 'HistoryTable':
+        """
+        New table of the rows at `indices` (in that order), sharing this table's vocabularies.
+        """
+        return self._part(indices)
+
+    def _part(self, index: Union[slice, np.ndarray], time_sorted: bool = False) -> 'HistoryTable':
+        table = HistoryTable({name: column[index] for name, column in self.columns.items()}, self.vocab, time_sorted)
+        # parts keep the ids (and values, labels) of the entities numbered so far
+        table._entities = {name: (ids[index], values) for name, (ids, values) in self._entities.items()}
+        table._labels = dict(self._labels)
+        return table
+
+    def sort_by_time(self) -> 'HistoryTable':
+        """
+        The table in end_time order; ties keep their order. Returns the table itself if it already is in order.
+        """
+        if not self.time_sorted and np.all(self.end_time[1:] >= self.end_time[:-1]):
+            self.time_sorted = True
+        if self.time_sorted:
+            return self
+
+        table = self.take(np.argsort(self.end_time, kind='stable'))
+        table.time_sorted = True
+        return table
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> 'HistoryTable':
+        """
+        Plays that ended from `start` to `end` (both epoch seconds and inclusive, None for no bound),
+        found by binary search and sliced without copying. The table must be time sorted.
+        """
+        if not self.time_sorted:
+            raise ValueError('history must be sorted by time (see sort_by_time) to select a time window')
+
+        first = 0 if start is None else int(np.searchsorted(self.end_time, start, side='left'))
+        last = len(self) if end is None else int(np.searchsorted(self.end_time, end, side='right'))
+        return self[first:max(first, last)]
+
+    def sessions(self, gap: float, from_start: bool = True) -> np.ndarray:
+        """
+        Groups the plays of the time sorted table into sessions, starting a new one wherever
+        the next play begins (or with from_start=False, ends) more than `gap` seconds after the previous one ended.
+        Sessions are computed once per threshold and kept with the table.
+
+        :return: (sessions, 2) array of the offsets of every session's first play and of the play after its last
+        """
+        key = (gap, from_start)
+        if key not in self._sessions:
+            if not self.time_sorted:
+                raise ValueError('history must be sorted by time (see sort_by_time) to split it into sessions')
+
+            # in milliseconds, so the comparison is exact
+            ends = self.end_time * 1000
+            starts = ends - self.ms_played if from_start else ends
+            breaks = np.flatnonzero(starts[1:] - ends[:-1] > gap * 1000) + 1
+            bounds = np.concatenate(([0], breaks, [len(self)])) if len(self) else np.zeros(1, dtype=np.int64)
+            self._sessions[key] = np.stack([bounds[:-1], bounds[1:]], axis=1)
+        return self._sessions[key]
+
+    def codes(self, name: str) -> tuple[np.ndarray, list]:
+        """
+        Integer codes of a text column, or ids of an entity (see ENTITIES), for every play,
+        with the values they stand for: strings for text columns, tuples of strings for entities.
+
+        Entities are numbered in the order they first appear, on first use; parts of the table cut from it later
+        (time windows, reorderings) share its ids.
+        """
+        if name in TEXT_COLUMNS:
+            return getattr(self, name), self.vocab[name]
+
+        if name not in self._entities:
+            first, last = ENTITIES[name]
+            size = len(self.vocab[last])
+            key = getattr(self, first).astype(np.int64) * size + getattr(self, last)
+            ids, rows = _factorize(key, getattr(self, last), size)
+            values = list(zip(self.decode(first, getattr(self, first)[rows]),
+                              self.decode(last, getattr(self, last)[rows])))
+            self._entities[name] = (ids, values)
+        return self._entities[name]
+
+    def labels(self, name: str) -> list[str]:
+        """
+        Display names ("Artist - Track") of the values of an entity, by id.
+        """
+        if name not in self._labels:
+            self._labels[name] = [f"{first} - {last}" for first, last in self.codes(name)[1]]
+        return self._labels[name]
+
+    def decode(self, name: str, codes: np.ndarray) -> list[Optional[str]]:
+        """
+        Turns codes of the text column `name` back into their strings.
+        """
+        vocab = self.vocab[name]
+        return [vocab[code] for code in codes.tolist()]
+
+    def plays(self) -> Iterator[Play]:
+        """
+        Iterates the rows as Play dicts: the text columns and flags like History,
+        times as plain numbers taken from the columns and the calendar (no time or datetime objects).
+        """
+        keys = ('ts', 'ms', *CALENDAR, *FLAG_COLUMNS.values(), *TEXT_COLUMNS.values())
+        for start in range(0, len(self), _CHUNK):
+            chunk = self[start:start + _CHUNK]
+            columns = [
+                chunk.end_time.tolist(),
+                chunk.ms_played.tolist(),
+                *(chunk.calendar[name].tolist() for name in CALENDAR),
+                *([_FLAGS[flag] for flag in getattr(chunk, name).tolist()] for name in FLAG_COLUMNS),
+                *(chunk.decode(name, getattr(chunk, name)) for name in TEXT_COLUMNS),
+            ]
+            for values in zip(*columns):
+                yield dict(zip(keys, values))
+
+    def _rows(self, start: int, stop: Optional[int]) -> Iterator[History]:
+        window = slice(start, stop)
+        ends = self.end_time[window].tolist()
+        columns = [
+            [_struct_time(ts) for ts in ends],
+            [timedelta(milliseconds=ms) for ms in self.ms_played[window].tolist()],
+            *([_FLAGS[flag] for flag in getattr(self, name)[window].tolist()] for name in FLAG_COLUMNS),
+            *(self.decode(name, getattr(self, name)[window]) for name in TEXT_COLUMNS),
+        ]
+        keys = ('endTime', 'msPlayed', *FLAG_COLUMNS.values(), *TEXT_COLUMNS.values())
+        for values in zip(*columns):
+            yield dict(zip(keys, values))
+
+
+class HistoryBuilder:
+    """
+    Collects plays one at a time into compact arrays and dictionary encodes the text columns;
+    `build` turns them into a HistoryTable.
+    """
+
+    def __init__(self):
+        self._arrays = {
+            'end_time': array('q'),
+            'ms_played': array('q'),
+            **{name: array('b') for name in FLAG_COLUMNS},
+            **{name: array('i') for name in TEXT_COLUMNS},
+        }
+        self._lookup = {name: {} for name in TEXT_COLUMNS}
+        # in the order of append's arguments
+        self._text = [self._arrays[name] for name in TEXT_COLUMNS]
+        self._lookups = list(self._lookup.values())
+        # timestamps are converted in bulk, a batch at a time
+        self._timestamps = []
+
+    def __len__(self) -> int:
+        return len(self._arrays['ms_played'])
+
+    def append(self, timestamp: str, ms_played: int,
+               shuffle: Optional[bool], skipped: Optional[bool],
+               artist: Optional[str], album: Optional[str], track: Optional[str],
+               platform: Optional[str], country: Optional[str],
+               reason_start: Optional[str], reason_end: Optional[str]) -> None:
+        """
+        Adds one play; `timestamp` is its end time as the export writes it ('2015-01-31T23:59:59Z').
+        """
+        arrays = self._arrays
+        self._timestamps.append(timestamp)
+        if len(self._timestamps) == _CHUNK:
+            self._flush()
+        arrays['ms_played'].append(ms_played)
+        arrays['shuffle'].append(-1 if shuffle is None else bool(shuffle))
+        arrays['skipped'].append(-1 if skipped is None else bool(skipped))
+        # unseen strings get the next free code
+        for codes, lookup, value in zip(self._text, self._lookups,
+                                        (artist, album, track, platform, country, reason_start, reason_end)):
+            codes.append(lookup.setdefault(value, len(lookup)))
+
+    def _flush(self) -> None:
+        self._arrays['end_time'].frombytes(parse_timestamps(self._timestamps).tobytes())
+        self._timestamps = []
+
+    def build(self) -> HistoryTable:
+        self._flush()
+        columns = {name: np.frombuffer(values, dtype=DTYPES[name]) for name, values in self._arrays.items()}
+        vocab = {name: list(codes) for name, codes in self._lookup.items()}
+        return HistoryTable(columns, vocab)
@@ -0,0 +1,113 @@
+from calendar import timegm
+from datetime import date, timedelta
+from time import strptime, struct_time
+from typing import Union
+
+import numpy as np
+
+FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DATE_FORMAT = '%Y-%m-%d'
+_EPOCH_DATE = date(1970, 1, 1)
+
+# '2015-01-31T23:59:59Z': where the digits of every field are, and the separators in between
+_WIDTH = 20
+_FIELDS = {'year': (0, 4), 'month': (5, 7), 'day': (8, 10), 'hour': (11, 13), 'minute': (14, 16), 'second': (17, 19)}
+_SEPARATORS = {4: '-', 7: '-', 10: 'T', 13: ':', 16: ':', 19: 'Z'}
+_DIGITS = [i for start, stop in _FIELDS.values() for i in range(start, stop)]
+
+
+def _strptime(value: str) -> int:
+    return timegm(strptime(value, FORMAT))
+
+
+def parse_timestamps(values: list[str]) -> np.ndarray:
+    """
+    Converts the export's timestamps ('2015-01-31T23:59:59Z', UTC) to seconds since the epoch, all at once.
+
+    The strings are laid side by side in one byte matrix and the fields are read off its columns;
+    values that do not have exactly that layout, or name a date that does not exist, go through strptime instead.
+    """
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    raw = ''.join(values).encode('UTF-8')
+    if len(raw) != _WIDTH * len(values):
+        # some value is not 20 ascii characters long, so the rows cannot be sliced apart
+        return np.array([_strptime(value) for value in values], dtype=np.int64)
+
+    chars = np.frombuffer(raw, dtype=np.uint8).reshape(-1, _WIDTH)
+    digits = chars.astype(np.int64) - ord('0')
+    fields = {}
+    for name, (start, stop) in _FIELDS.items():
+        fields[name] = np.zeros(len(values), dtype=np.int64)
+        for i in range(start, stop):
+            fields[name] = fields[name] * 10 + digits[:, i]
+
+    months = (fields['year'] - 1970) * 12 + fields['month'] - 1
+    month_start = months.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    month_length = (months + 1).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64) - month_start
+
+    valid = np.all((digits[:, _DIGITS] >= 0) & (digits[:, _DIGITS] <= 9), axis=1)
+    for i, separator in _SEPARATORS.items():
+        valid &= chars[:, i] == ord(separator)
+    # strptime accepts leap seconds (60, 61), timegm carries them into the next minute like the sum below does
+    valid &= ((1 <= fields['month']) & (fields['month'] <= 12) & (1 <= fields['day']) & (fields['day'] <= month_length)
+              & (fields['hour'] < 24) & (fields['minute'] < 60) & (fields['second'] < 62))
+
+    seconds = ((month_start + fields['day'] - 1) * 86400
+               + fields['hour'] * 3600 + fields['minute'] * 60 + fields['second'])
+    for i in np.flatnonzero(~valid).tolist():
+        seconds[i] = _strptime(values[i])
+    return seconds
+
+
+def parse_dates(values: list[str]) -> np.ndarray:
+    """
+    Converts the export's dates ('2015-01-31') to days since 1970-01-01, all at once;
+    if some value is not laid out like that, they all go through strptime instead (which raises on bad dates).
+    """
+    if all(len(value) == 10 and value[4] == value[7] == '-' for value in values):
+        try:
+            return np.array(values, dtype='datetime64[D]').astype(np.int32)
+        except ValueError:
+            pass
+    return np.array([timegm(strptime(value, DATE_FORMAT)) // 86400 for value in values], dtype=np.int32)
+
+
+def to_date(day: int) -> struct_time:
+    """
+    struct_time of a day number (days since 1970-01-01), as strptime makes it of a date string.
+    """
+    return (_EPOCH_DATE + timedelta(days=int(day))).timetuple()
+
+
+def to_epoch(value: Union[struct_time, date, int, float]) -> int:
+    """
+    Seconds since the epoch of a struct_time, date or datetime (naive ones are read as UTC, like the export's times),
+    numbers are taken as epoch seconds already.
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, struct_time):
+        return timegm(value)
+    if getattr(value, 'tzinfo', None) is not None:
+        return timegm(value.utctimetuple())
+    return timegm(value.timetuple())
+
+
+def calendar(end_time: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Calendar fields (UTC) of epoch seconds: year, month (1-12), day (1-31), weekday (Monday is 0),
+    hour (0-23) and date (days since 1970-01-01).
+    """
+    day_number = end_time // 86400
+    days = day_number.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    return {
+        'year': (days.astype('datetime64[Y]').astype(np.int64) + 1970).astype(np.int16),
+        'month': (months.astype(np.int64) % 12 + 1).astype(np.int8),
+        'day': ((days - months.astype('datetime64[D]')).astype(np.int64) + 1).astype(np.int8),
+        # 1970-01-01 was a Thursday
+        'weekday': ((day_number + 3) % 7).astype(np.int8),
+        'hour': (end_time % 86400 // 3600).astype(np.int8),
+        'date': day_number.astype(np.int32),
+    }
@@ -1,6 +1,6 @@
 from time import struct_time
 from datetime import timedelta
-from typing import Optional, TypedDict
+from typing import Optional, Sequence, TypedDict
 
 
 class Track(TypedDict):
@@ -20,7 +20,7 @@ class Item(TypedDict):
 class PlayList(TypedDict):
     name: str
     lastModifiedDate: struct_time  # str  # yyyy-mm-dd
-    items: list[Item]
+    items: Sequence[Item]  # filemgr.library.PlaylistItems
     description: Optional[str]
     numberOfFollowers: int
 
@@ -37,3 +37,23 @@ class History(TypedDict):
     reasonEnd: str
     shuffle: bool
     skipped: bool
+
+
+class Play(TypedDict):
+    ts: int  # endTime in seconds since the epoch
+    ms: int  # msPlayed in milliseconds
+    year: int
+    month: int  # 1-12
+    day: int  # 1-31
+    weekday: int  # 0-6, Monday is 0
+    hour: int  # 0-23
+    date: int  # days since 1970-01-01
+    artistName: str
+    albumName: str
+    trackName: str
+    platform: str
+    connCountry: str
+    reasonStart: str
+    reasonEnd: str
+    shuffle: Optional[bool]
+    skipped: Optional[bool]
@@ -0,0 +1,166 @@
+"""
+Wall time, CPU time and peak allocation of the phases of a run (loading, every statistic, every graph),
+recorded only while profiling is enabled: by enable() (cli.py --profile) or by setting STATIPY_PROFILE
+to the path of the trace file (1 for statipy_profile.json), e.g. for main.py.
+
+The trace is a JSON file in the Trace Event Format, which chrome://tracing and https://ui.perfetto.dev open;
+summary() prints the phases that took longest. Phases nest, the time of a phase includes that of the phases in it.
+Peak allocation is that of memory allocated through Python (numpy arrays included) above what was allocated when
+the phase started, tracked with tracemalloc, which slows down code that allocates many small objects.
+Work done in other processes (parallel parsing or plotting) is recorded as the one phase that waits for it.
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+ENVIRONMENT = 'STATIPY_PROFILE'
+DEFAULT_TRACE = 'statipy_profile.json'
+
+
+class _Phase:
+    __slots__ = ('name', 'details', 'wall', 'cpu', 'memory', 'peak')
+
+    def __init__(self, name: str, details: dict[str, Any]):
+        self.name = name
+        self.details = details
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        self.memory = tracemalloc.get_traced_memory()[0]
+        # highest allocation within the phase so far, raised by the phases in it as they end
+        self.peak = self.memory
+
+
+class _Profile:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.start = time.perf_counter()
+        self.stack: list[_Phase] = []
+        # name, details, start (s since enable), wall (s), cpu (s) and peak allocation (bytes) of every ended phase
+        self.records: list[dict[str, Any]] = []
+
+    def enter(self, name: str, details: dict[str, Any]) -> None:
+        if self.stack:
+            self.stack[-1].peak = max(self.stack[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.stack.append(_Phase(name, details))
+
+    def exit(self) -> None:
+        wall, cpu = time.perf_counter(), time.process_time()
+        phase = self.stack.pop()
+        peak = max(phase.peak, tracemalloc.get_traced_memory()[1])
+        if self.stack:
+            self.stack[-1].peak = max(self.stack[-1].peak, peak)
+        self.records.append({
+            'name': phase.name,
+            'details': phase.details,
+            'start': phase.wall - self.start,
+            'wall': wall - phase.wall,
+            'cpu': cpu - phase.cpu,
+            'peak': peak - phase.memory,
+            'depth': len(self.stack),
+        })
+
+
+_profile: Optional[_Profile] = None
+
+
+def enable(path: str = DEFAULT_TRACE) -> None:
+    """
+    Starts recording phases, to be written to the trace file `path` by write_trace.
+    """
+    global _profile
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _profile = _Profile(path)
+
+
+def enabled() -> bool:
+    return _profile is not None
+
+
+@contextmanager
+def phase(name: str, **details: Any) -> Iterator[None]:
+    """
+    Records the code in the with block as a phase, if profiling is enabled; `details` go to the trace.
+    """
+    if _profile is None:
+        yield
+        return
+    _profile.enter(name, details)
+    try:
+        yield
+    finally:
+        _profile.exit()
+
+
+def profiled(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator recording every call of a function as a phase.
+    """
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _profile is None:
+                return function(*args, **kwargs)
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def records() -> list[dict[str, Any]]:
+    """
+    The phases recorded so far, in the order they ended.
+    """
+    return [] if _profile is None else list(_profile.records)
+
+
+def write_trace(path: Optional[str] = None) -> str:
+    """
+    Writes the phases recorded so far as a Trace Event Format file.
+
+    :return: the path written to, the one given to enable by default
+    """
+    path = path or _profile.path
+    events = [{
+        'name': record['name'],
+        'ph': 'X',
+        'ts': round(record['start'] * 1e6),
+        'dur': round(record['wall'] * 1e6),
+        'pid': os.getpid(),
+        'tid': 0,
+        'args': {'cpu_ms': round(record['cpu'] * 1e3, 3), 'peak_bytes': record['peak'], **record['details']},
+    } for record in records()]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+    return path
+
+
+def summary(out: TextIO, limit: Optional[int] = 30) -> None:
+    """
+    Prints the recorded phases by name, the ones with the most wall time first (`limit` of them at most):
+    how often they were recorded, their total wall and CPU time and their highest peak allocation.
+    """
+    totals: dict[str, list] = {}
+    for record in records():
+        total = totals.setdefault(record['name'], [0, 0.0, 0.0, 0])
+        total[0] += 1
+        total[1] += record['wall']
+        total[2] += record['cpu']
+        total[3] = max(total[3], record['peak'])
+
+    print(f"{'phase':<56}{'count':>6}{'wall (s)':>10}{'cpu (s)':>10}{'peak (MB)':>11}", file=out)
+    ranked = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (count, wall, cpu, peak) in ranked[:limit]:
+        print(f'{name[:55]:<56}{count:>6}{wall:>10.3f}{cpu:>10.3f}{peak / 2 ** 20:>11.1f}', file=out)
+    if limit is not None and len(ranked) > limit:
+        print(f'... and {len(ranked) - limit} more phases in the trace', file=out)
+
+
+if os.environ.get(ENVIRONMENT):
+    enable(DEFAULT_TRACE if os.environ[ENVIRONMENT] == '1' else os.environ[ENVIRONMENT])
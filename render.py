@@ -0,0 +1,356 @@
+"""
+Renders report pages to PDF, one figure at a time.
+
+A page is a plot function of stats/graphs.py and its arguments, so pages can be plotted wherever they are rendered.
+With several workers every page is plotted in its own process with the Agg backend and written to a PDF of its own,
+those are merged into the report in page order afterwards. Only a few pages per worker are taken ahead of the ones
+being plotted, so pages made on the fly are not all made (and held) at once.
+Every figure is closed as soon as its page is written, so at most one figure per worker is held in memory.
+
+Text pages are not plotted: they are written as PDF text in the embedded monospace font of the graphs,
+which takes milliseconds and keeps the text searchable.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import zlib
+from collections import deque
+from io import BytesIO
+from itertools import count
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Any, BinaryIO, Callable, Iterable, Optional
+
+import matplotlib
+import matplotlib.pyplot as plt
+from fontTools import subset
+from fontTools.ttLib import TTFont
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties, findfont
+
+from instrumentation import phase
+from stats.graphs import split_text_pages
+
+Page = tuple[Callable[..., Optional[Figure]], tuple[Any, ...]]
+
+_REFERENCE = re.compile(rb'(?<![\d.])(\d+) 0 (R|obj)\b')
+_STREAM = re.compile(rb'\bstream\r?\n')
+_TRAILER_ROOT = re.compile(rb'/Root (\d+) 0 R')
+_TRAILER_INFO = re.compile(rb'/Info (\d+) 0 R')
+_CATALOG_PAGES = re.compile(rb'/Pages (\d+) 0 R')
+_PAGES_KIDS = re.compile(rb'/Kids \[([^\]]*)\]')
+_OBJECT_STREAM = re.compile(rb'/Type\s*/ObjStm\b')
+# trailer entries of PDF files merge_pdfs cannot merge, and what they mean
+_UNSUPPORTED_TRAILER = {
+    b'Encrypt': 'encryption',
+    b'Prev': 'incremental updates',
+    b'XRefStm': 'a cross-reference stream',
+}
+
+# pages submitted to every worker ahead of the ones it plots
+_PAGES_AHEAD = 2
+
+
+def plot_page(page: Page) -> Optional[Figure]:
+    function, args = page
+    # graphs are titled by their last argument
+    with phase(f'graphs.{function.__name__}', title=args[-1] if args and isinstance(args[-1], str) else None):
+        return function(*args)
+
+
+def render_pdf(pages: Iterable[Page], path: str, workers: Optional[int] = None, text: Optional[str] = None) -> int:
+    """
+    Plots the pages and writes them to a PDF file, skipping pages without a figure.
+    Pages are taken from `pages` as they are rendered, so they can be made on the fly.
+
+    :param workers: number of processes plotting pages, all cores by default; pages are plotted in this process if 1
+    :param text: text to write on pages of its own (see write_text_pdf) before the plotted pages
+    :return: number of pages written
+    """
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory(prefix='statipy-') as directory:
+        parts = []
+        written = 0
+        if text is not None:
+            parts.append(os.path.join(directory, 'text.pdf'))
+            with phase('render.text_pdf'):
+                written += write_text_pdf(text, parts[-1])
+
+        if workers <= 1:
+            figures = 0
+            with PdfPages(os.path.join(directory, 'figures.pdf')) as pdf:
+                for page in pages:
+                    fig = plot_page(page)
+                    if fig is not None:
+                        with phase('render.savefig'):
+                            pdf.savefig(fig)
+                        plt.close(fig)
+                        figures += 1
+            # PdfPages only makes a file once a page is saved
+            if figures:
+                parts.append(os.path.join(directory, 'figures.pdf'))
+            written += figures
+        else:
+            paths = (os.path.join(directory, f'{i:05}.pdf') for i in count())
+            rendered = []
+            with phase('render.pages (parallel)', workers=workers), \
+                    ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+                pending: deque[Future] = deque()
+                for page, page_path in zip(pages, paths):
+                    if len(pending) >= _PAGES_AHEAD * workers:
+                        # the oldest page first, the parts are kept in page order
+                        wait([pending[0]])
+                        while pending and pending[0].done():
+                            rendered.append(pending.popleft().result())
+                    pending.append(pool.submit(_render_page, page, page_path))
+                rendered += [future.result() for future in pending]
+            rendered = [part for part in rendered if part is not None]
+            parts += rendered
+            written += len(rendered)
+
+        with phase('render.merge'):
+            merge_pdfs(parts, path)
+    return written
+
+
+def _init_worker() -> None:
+    # workers never show figures, and must not touch the display of the parent
+    matplotlib.use('Agg')
+
+
+def _render_page(page: Page, path: str) -> Optional[str]:
+    fig = plot_page(page)
+    if fig is None:
+        return None
+    with PdfPages(path) as pdf:
+        pdf.savefig(fig)
+    plt.close(fig)
+    return path
+
+
+def _read_objects(data: bytes) -> tuple[dict[int, bytes], bytes]:
+    """
+    Splits a PDF as matplotlib (PdfPages) and write_text_pdf write them into its objects: a single classic
+    cross-reference table, objects of generation 0 and no encryption.
+    Raises ValueError for any other PDF (cross-reference or object streams, incremental updates, encryption),
+    which cannot be merged by renumbering the references in the objects.
+
+    :return: dictionary of the object numbers to their bytes, and the trailer dictionary
+    """
+    start = int(data[data.rindex(b'startxref') + len(b'startxref'):].split()[0])
+    if not data.startswith(b'xref', start):
+        raise ValueError('PDF has a cross-reference stream, only a classic cross-reference table can be merged')
+    table, trailer = data[start:].split(b'trailer', 1)
+    for key in _UNSUPPORTED_TRAILER:
+        if re.search(rb'/%s\b' % key, trailer):
+            raise ValueError(f'PDF has {_UNSUPPORTED_TRAILER[key]}, which cannot be merged')
+    lines = table.split(b'\n')[1:]
+
+    offsets = []
+    i = 0
+    while i < len(lines) and lines[i].strip():
+        first, length = map(int, lines[i].split())
+        for number, entry in enumerate(lines[i + 1:i + 1 + length], first):
+            offset, _, kind = entry.split()
+            if kind == b'n':
+                offsets.append((int(offset), number))
+        i += 1 + length
+
+    # an object runs up to the next one, the last up to the cross-reference table
+    offsets.sort()
+    ends = [offset for offset, _ in offsets[1:]] + [start]
+    objects = {number: data[offset:end] for (offset, number), end in zip(offsets, ends)}
+    for number, obj in objects.items():
+        if not obj.startswith(b'%d 0 obj' % number):
+            raise ValueError(f'PDF object {number} is not where the cross-reference table puts it, or not of generation 0')
+        if _OBJECT_STREAM.search(_head(obj)):
+            raise ValueError('PDF has object streams, which cannot be merged')
+    return objects, trailer
+
+
+def _head(obj: bytes) -> bytes:
+    # references are in the dictionary of an object, never in its (binary) stream
+    stream = _STREAM.search(obj)
+    return obj[:stream.end()] if stream else obj
+
+
+def _renumber(obj: bytes, numbers: dict[int, int]) -> bytes:
+    def replace(match: re.Match) -> bytes:
+        return b'%d 0 %s' % (numbers[int(match.group(1))], match.group(2))
+
+    head = _head(obj)
+    return _REFERENCE.sub(replace, head) + obj[len(head):]
+
+
+def merge_pdfs(paths: Iterable[str], path: str) -> None:
+    """
+    Writes the pages of the PDF files written by matplotlib (PdfPages) or write_text_pdf to one PDF file, in order.
+    Only one of the files is read into memory at a time. Raises ValueError for PDF files laid out otherwise
+    (see _read_objects), leaving `path` as it was.
+    """
+    temporary = path + '.tmp'
+    try:
+        with open(temporary, 'wb') as out:
+            _write_merged(paths, out)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _write_merged(paths: Iterable[str], out: BinaryIO) -> None:
+    out.write(b'%PDF-1.4\n%\xac\xdc \xab\xba\n')
+    # 1 and 2 are the catalog and the page tree of the merged file
+    offsets = {}
+    kids = []
+    next_number = 3
+    for source in paths:
+        with open(source, 'rb') as f:
+            objects, trailer = _read_objects(f.read())
+
+        root = int(_TRAILER_ROOT.search(trailer).group(1))
+        info = _TRAILER_INFO.search(trailer)
+        tree = int(_CATALOG_PAGES.search(objects[root]).group(1))
+        pages = [int(n) for n in re.findall(rb'(\d+) 0 R', _PAGES_KIDS.search(objects[tree]).group(1))]
+        skipped = {root, tree} | ({int(info.group(1))} if info else set())
+
+        # the pages hang from the page tree of the merged file
+        numbers = {tree: 2}
+        for number in objects:
+            if number not in skipped:
+                numbers[number] = next_number
+                next_number += 1
+        for number, obj in objects.items():
+            if number in skipped:
+                continue
+            offsets[numbers[number]] = out.tell()
+            out.write(_renumber(obj, numbers))
+        kids += [numbers[n] for n in pages]
+
+    offsets[1] = out.tell()
+    out.write(b'1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n')
+    offsets[2] = out.tell()
+    kids_refs = b' '.join(b'%d 0 R' % n for n in kids)
+    out.write(b'2 0 obj\n<< /Type /Pages /Kids [ %s ] /Count %d >>\nendobj\n' % (kids_refs, len(kids)))
+    _write_xref(out, offsets, next_number)
+
+
+def _write_xref(out: BinaryIO, offsets: dict[int, int], size: int) -> None:
+    start = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % size)
+    for number in range(1, size):
+        out.write(b'%010d 00000 n \n' % offsets[number])
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (size, start))
+
+
+class _SubsetFont:
+    """
+    The glyphs of a TrueType font needed for some text, to embed as a PDF CID font with 2 byte glyph ids.
+    """
+
+    def __init__(self, path: str, text: str):
+        characters = sorted(set(text) - {'\n'})
+        options = subset.Options()
+        options.notdef_outline = True
+        # plain text is not shaped, layout tables are of no use
+        options.drop_tables += ['FFTM', 'GSUB', 'GPOS', 'GDEF', 'kern']
+        font = TTFont(path)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=[ord(c) for c in characters])
+        subsetter.subset(font)
+
+        cmap = font.getBestCmap()
+        self.glyphs = {c: font.getGlyphID(cmap[ord(c)]) for c in characters if ord(c) in cmap}
+        self._hex = {ord(c): f'{self.glyphs.get(c, 0):04X}' for c in characters}
+        scale = 1000 / font['head'].unitsPerEm
+        self.widths = [round(font['hmtx'][name][0] * scale) for name in font.getGlyphOrder()]
+        self.ascent = font['hhea'].ascent * scale
+        self.descent = font['hhea'].descent * scale
+        self.bbox = [round(v * scale) for v in (font['head'].xMin, font['head'].yMin, font['head'].xMax, font['head'].yMax)]
+        # subsets are named by a tag unique to the glyphs they hold
+        tag = ''.join(chr(ord('A') + b % 26) for b in hashlib.md5(''.join(characters).encode()).digest()[:6])
+        self.name = f"{tag}+{font['name'].getDebugName(6) or 'Font'}"
+
+        data = BytesIO()
+        font.save(data)
+        self.data = data.getvalue()
+
+    def encode(self, line: str) -> bytes:
+        """
+        The line (of the text the font was made for) as a hex string of glyph ids,
+        characters missing in the font are shown as the .notdef glyph.
+        """
+        return b'<' + line.translate(self._hex).encode() + b'>'
+
+    def to_unicode(self) -> bytes:
+        """
+        CMap from the glyph ids back to the characters, for searching and copying the text.
+        """
+        entries = [f'<{gid:04X}> <{c.encode("utf-16-be").hex().upper()}>' for c, gid in self.glyphs.items()]
+        blocks = [entries[i:i + 100] for i in range(0, len(entries), 100)]
+        return (
+            '/CIDInit /ProcSet findresource begin\n12 dict begin\nbegincmap\n'
+            '/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n'
+            '/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n'
+            '1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n'
+            + ''.join(f'{len(block)} beginbfchar\n' + '\n'.join(block) + '\nendbfchar\n' for block in blocks)
+            + 'endcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n'
+        ).encode()
+
+
+def _stream(data: bytes, entries: bytes = b'') -> bytes:
+    compressed = zlib.compress(data)
+    return b'<< /Length %d /Filter /FlateDecode %s>>\nstream\n%s\nendstream' % (len(compressed), entries, compressed)
+
+
+def write_text_pdf(text: str, path: str, lines_per_page: int = 60, font_size: float = 8) -> int:
+    """
+    Writes text to a PDF file, `lines_per_page` lines on every A4 page, laid out as plot_text_page of
+    stats/graphs.py does: in the monospace font of the graphs, from the top left of the page.
+    The text is written as PDF text, with only the glyphs it uses embedded.
+
+    :return: number of pages written
+    """
+    font = _SubsetFont(findfont(FontProperties(family='monospace')), text)
+    width, height = 8.27 * 72, 11.69 * 72
+    left, top = 0.05 * width, 0.95 * height - font.ascent / 1000 * font_size
+    # matplotlib puts lines 1.2 font sizes apart
+    leading = 1.2 * font_size
+    pages = split_text_pages(text, lines_per_page)
+
+    # 1 catalog, 2 page tree, 3-7 font, then every page and its contents
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        2: b'<< /Type /Pages /Kids [ %s ] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % (8 + 2 * i) for i in range(len(pages))), len(pages)
+        ),
+        3: b'<< /Type /Font /Subtype /Type0 /BaseFont /%s /Encoding /Identity-H /DescendantFonts [ 4 0 R ] '
+           b'/ToUnicode 7 0 R >>' % font.name.encode(),
+        4: b'<< /Type /Font /Subtype /CIDFontType2 /BaseFont /%s '
+           b'/CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> /FontDescriptor 5 0 R '
+           b'/W [ 0 [ %s ] ] /CIDToGIDMap /Identity >>' % (font.name.encode(), ' '.join(map(str, font.widths)).encode()),
+        5: b'<< /Type /FontDescriptor /FontName /%s /Flags 33 /FontBBox [ %s ] /ItalicAngle 0 /Ascent %d /Descent %d '
+           b'/CapHeight %d /StemV 80 /FontFile2 6 0 R >>' % (
+            font.name.encode(), ' '.join(map(str, font.bbox)).encode(), font.ascent, font.descent, font.ascent
+        ),
+        6: _stream(font.data, b'/Length1 %d ' % len(font.data)),
+        7: _stream(font.to_unicode()),
+    }
+    for i, page_text in enumerate(pages):
+        lines = b'\n'.join(font.encode(line) + b' Tj T*' for line in page_text.split('\n'))
+        contents = b'BT\n/F1 %g Tf\n%g TL\n%.2f %.2f Td\n%s\nET' % (font_size, leading, left, top, lines)
+        objects[8 + 2 * i] = (
+            b'<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 3 0 R >> >> /MediaBox [ 0 0 %.2f %.2f ] '
+            b'/Contents %d 0 R >>' % (width, height, 9 + 2 * i)
+        )
+        objects[9 + 2 * i] = _stream(contents)
+
+    with open(path, 'wb') as out:
+        out.write(b'%PDF-1.4\n%\xac\xdc \xab\xba\n')
+        offsets = {}
+        for number, obj in objects.items():
+            offsets[number] = out.tell()
+            out.write(b'%d 0 obj\n%s\nendobj\n' % (number, obj))
+        _write_xref(out, offsets, len(objects) + 1)
+    return len(pages)
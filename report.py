@@ -0,0 +1,874 @@
+"""
+The statistics report: the statistics it is made of, grouped into the parts it can be cut down to,
+and the text, CSV, JSON and PDF files it is written to.
+
+main.py asks for the time window and the output interactively, cli.py takes them from the command line.
+"""
+import json
+import time
+from datetime import date, timedelta
+from time import struct_time
+from typing import Any, Callable, Iterable, Iterator, Optional, TextIO
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from filemgr.database import HistoryDatabase
+from filemgr.table import HistoryTable
+from stats import artist_history_over_time
+from stats.accumulators import (
+    PlayTime, PlayCounts, PlayCountsByArtist, PlayCountsByAlbum, LocationCounts, LongestPlayedArtist,
+    LongestPlayedTracks, MostSkippedArtist, TopArtistPerMonth, OneHitWonders, LongestListeningStreak,
+    TrueSkipRate, MostConsecutivePlays, AlbumLoyalty, LongestArtistRelationship, ForgottenFavorites,
+    MostMusicalDay, WeekendVsWeekday, ImmediateSkips, VarietyScore, ListeningVelocity, TheComeback,
+    ClockworkArtists, SessionAnalysis, SkiplessAlbums, SamplerVsCompletionist, CommuteHeroes, MarathonTracks,
+    OneWeekWonders, SoundOfSilence, ControlFreakData, ShuffleParadoxData, NaturalDeathData, SkippedRatio,
+    NightShiftArtists, NewYearsTransitions, ConsistencyKing, AlphabetChallenge, ObsessionScore,
+    EarlyBirdArtists, NineToFiveArtists, PartyAnimalTracks, SundayScariesTracks, UnskippableStreak,
+    ArtistHopper, DiscoveryPeak, ComfortZone, SingleDayRecord, ManualLaborer, ShuffleRoulette,
+    SessionStarter, SessionCloser, QuickFix, SkippersRemorse, RemixJunkie, LiveFanatic, ShortKing, EpicSaga,
+    Collaborator, AlphabetArtists, SpellingBee, SameNameGame, MidnightClub, LunchBreak, MondayBlues,
+    HumpDayHero, QuarterlyReview, AlbumPurist, InstantSkips, FullSongStats, MostSkippedTrack,
+    ListeningByDayOfWeek, DiscoveryRate, SeasonalListening, DayNightSplit, HourlyHeatmapData,
+    CalendarHeatmapData, PickyGridData, DeviceHabitsData, ActiveListeningHeatmapData, ArtistErasData,
+    ActiveListeningTrendData, PlatformUsage, ListeningByHour
+)
+from export import write_songs
+from render import Page, plot_page, render_pdf
+from stats import sql
+from stats.engine import Accumulator, Window, compute
+from stats.songs import FIELDS, SongTable
+from stats.graphs import (
+    plot_top_items, plot_artist_trends, plot_platform_usage, plot_listening_by_hour,
+    plot_location_counts, plot_longest_played_artist, plot_skipped_items,
+    plot_listening_by_day_of_week, plot_discovery_rate, plot_seasonal_listening, plot_day_night_split, plot_hourly_heatmap,
+    plot_variety_score,
+    plot_calendar_heatmap, plot_picky_grid, plot_device_habits, plot_artist_eras,
+    plot_active_heatmap, plot_active_trend,
+    plot_longest_played_tracks,
+    plot_comfort_zone
+)
+
+# every statistic of the report by the name its result is kept under;
+# rankings only keep as many entries as the report prints or plots
+# (play_time is made for the chosen time window, see `accumulators`)
+STATS: dict[str, Callable[[], Accumulator]] = {
+    'play_counts': lambda: PlayCounts(top_k=100),
+    'play_counts_by_artist': lambda: PlayCountsByArtist(top_k=100),
+    'play_counts_by_album': lambda: PlayCountsByAlbum(top_k=100),
+    'location_counts': lambda: LocationCounts(),
+    'longest_played_artist': lambda: LongestPlayedArtist(top_k=20),
+    'longest_played_tracks': lambda: LongestPlayedTracks(top_k=20),
+    'most_skipped_artist': lambda: MostSkippedArtist(top_k=100),
+    'top_artist_per_month': lambda: TopArtistPerMonth(),
+    'one_hit_wonders': lambda: OneHitWonders(top_k=100),
+    'longest_listening_streak': lambda: LongestListeningStreak(),
+    'true_skip_rate': lambda: TrueSkipRate(top_k=100),
+    'most_consecutive_plays': lambda: MostConsecutivePlays(),
+    'album_loyalty': lambda: AlbumLoyalty(top_k=100),
+    'longest_artist_relationship': lambda: LongestArtistRelationship(top_k=100),
+    'forgotten_favorites': lambda: ForgottenFavorites(top_k=100),
+    'most_musical_day': lambda: MostMusicalDay(),
+    'weekend_vs_weekday': lambda: WeekendVsWeekday(top_k=10),
+    'immediate_skips': lambda: ImmediateSkips(top_k=50),
+    'variety_score': lambda: VarietyScore(),
+    'listening_velocity': lambda: ListeningVelocity(),
+    'the_comeback': lambda: TheComeback(top_k=50),
+    'clockwork_artists': lambda: ClockworkArtists(),
+    'session_analysis': lambda: SessionAnalysis(),
+    'skipless_albums': lambda: SkiplessAlbums(),
+    'sampler_vs_completionist': lambda: SamplerVsCompletionist(top_k=10),
+    'commute_heroes': lambda: CommuteHeroes(top_k=10),
+    'marathon_tracks': lambda: MarathonTracks(top_k=100),
+    'one_week_wonders': lambda: OneWeekWonders(),
+    'sound_of_silence': lambda: SoundOfSilence(),
+    'control_freak_data': lambda: ControlFreakData(),
+    'shuffle_paradox_data': lambda: ShuffleParadoxData(),
+    'natural_death_data': lambda: NaturalDeathData(),
+    'skipped_ratio': lambda: SkippedRatio(),
+    'night_shift_artists': lambda: NightShiftArtists(top_k=20),
+    'new_years_transitions': lambda: NewYearsTransitions(),
+    'consistency_king': lambda: ConsistencyKing(top_k=20),
+    'alphabet_challenge': lambda: AlphabetChallenge(),
+    'obsession_score': lambda: ObsessionScore(top_k=10),
+    'early_bird_artists': lambda: EarlyBirdArtists(top_k=10),
+    'nine_to_five_artists': lambda: NineToFiveArtists(top_k=10),
+    'party_animal_tracks': lambda: PartyAnimalTracks(top_k=20),
+    'sunday_scaries_tracks': lambda: SundayScariesTracks(top_k=20),
+    'unskippable_streak': lambda: UnskippableStreak(),
+    'artist_hopper': lambda: ArtistHopper(),
+    'discovery_peak': lambda: DiscoveryPeak(),
+    'comfort_zone': lambda: ComfortZone(),
+    'single_day_record': lambda: SingleDayRecord(),
+    'manual_laborer': lambda: ManualLaborer(top_k=100),
+    'shuffle_roulette': lambda: ShuffleRoulette(top_k=50),
+    'session_starter': lambda: SessionStarter(top_k=50),
+    'session_closer': lambda: SessionCloser(top_k=50),
+    'quick_fix': lambda: QuickFix(),
+    'skippers_remorse': lambda: SkippersRemorse(top_k=50),
+    'remix_junkie': lambda: RemixJunkie(),
+    'live_fanatic': lambda: LiveFanatic(),
+    'short_king': lambda: ShortKing(top_k=15),
+    'epic_saga': lambda: EpicSaga(top_k=15),
+    'collaborator': lambda: Collaborator(top_k=5),
+    'alphabet_artists': lambda: AlphabetArtists(),
+    'spelling_bee': lambda: SpellingBee(),
+    'same_name_game': lambda: SameNameGame(top_k=5),
+    'midnight_club': lambda: MidnightClub(top_k=15),
+    'lunch_break': lambda: LunchBreak(top_k=15),
+    'monday_blues': lambda: MondayBlues(top_k=15),
+    'hump_day_hero': lambda: HumpDayHero(top_k=15),
+    'quarterly_review': lambda: QuarterlyReview(),
+    'album_purist': lambda: AlbumPurist(),
+    'instant_skips': lambda: InstantSkips(),
+    'get_full_song_stats': lambda: FullSongStats(compact=True),
+    'most_skipped_track': lambda: MostSkippedTrack(top_k=10),
+    'listening_by_day_of_week': lambda: ListeningByDayOfWeek(),
+    'discovery_rate': lambda: DiscoveryRate(),
+    'seasonal_listening': lambda: SeasonalListening(),
+    'day_night_split': lambda: DayNightSplit(),
+    'hourly_heatmap_data': lambda: HourlyHeatmapData(),
+    'calendar_heatmap_data': lambda: CalendarHeatmapData(),
+    'picky_grid_data': lambda: PickyGridData(),
+    'device_habits_data': lambda: DeviceHabitsData(),
+    'active_listening_heatmap_data': lambda: ActiveListeningHeatmapData(),
+    'artist_eras_data': lambda: ArtistErasData(top_n=300),
+    'active_listening_trend_data': lambda: ActiveListeningTrendData(),
+    'platform_usage': lambda: PlatformUsage(),
+    'listening_by_hour': lambda: ListeningByHour(),
+}
+
+# statistics that are queried from a HistoryDatabase instead when the report is given one, as their accumulators above
+SQL_STATS: dict[str, Callable[[HistoryDatabase, Window], Any]] = {
+    'top_artist_per_month': lambda database, window: sql.top_artist_per_month(database, window),
+    'quarterly_review': lambda database, window: sql.quarterly_review(database, window),
+    'artist_eras_data': lambda database, window: sql.artist_eras_data(database, top_n=300, window=window),
+    'get_full_song_stats': lambda database, window: sql.get_full_song_stats(database, window, compact=True),
+}
+
+# the parts of the report, in the order they are printed; graphs are only plotted, not printed
+GROUPS = {
+    'top': (
+        'play_time', 'play_counts', 'play_counts_by_artist', 'play_counts_by_album', 'location_counts',
+        'longest_played_artist', 'longest_played_tracks', 'most_skipped_artist', 'top_artist_per_month',
+    ),
+    'deep_dive': (
+        'one_hit_wonders', 'longest_listening_streak', 'true_skip_rate', 'most_consecutive_plays', 'album_loyalty',
+        'longest_artist_relationship', 'forgotten_favorites', 'most_musical_day', 'weekend_vs_weekday',
+        'immediate_skips', 'variety_score', 'listening_velocity', 'the_comeback', 'clockwork_artists',
+        'session_analysis', 'skipless_albums', 'sampler_vs_completionist', 'commute_heroes', 'marathon_tracks',
+        'one_week_wonders', 'sound_of_silence', 'control_freak_data', 'shuffle_paradox_data', 'natural_death_data',
+        'skipped_ratio', 'night_shift_artists', 'new_years_transitions', 'consistency_king', 'alphabet_challenge',
+        'obsession_score', 'early_bird_artists', 'nine_to_five_artists', 'party_animal_tracks',
+        'sunday_scaries_tracks', 'unskippable_streak', 'artist_hopper', 'discovery_peak', 'comfort_zone',
+        'single_day_record',
+    ),
+    'fun': (
+        'manual_laborer', 'shuffle_roulette', 'session_starter', 'session_closer', 'quick_fix', 'skippers_remorse',
+        'remix_junkie', 'live_fanatic', 'short_king', 'epic_saga', 'collaborator', 'alphabet_artists',
+        'spelling_bee', 'same_name_game', 'midnight_club', 'lunch_break', 'monday_blues', 'hump_day_hero',
+        'quarterly_review', 'album_purist', 'instant_skips',
+    ),
+    'graphs': (
+        'play_counts', 'play_counts_by_artist', 'play_counts_by_album', 'location_counts', 'longest_played_artist',
+        'longest_played_tracks', 'most_skipped_artist', 'most_skipped_track', 'night_shift_artists',
+        'listening_by_day_of_week', 'discovery_rate', 'seasonal_listening', 'day_night_split', 'hourly_heatmap_data',
+        'variety_score', 'comfort_zone', 'calendar_heatmap_data', 'picky_grid_data', 'device_habits_data',
+        'artist_eras_data', 'active_listening_heatmap_data', 'active_listening_trend_data', 'platform_usage',
+        'listening_by_hour',
+    ),
+}
+# the groups written to the text report
+PRINTED_GROUPS = ('top', 'deep_dive', 'fun')
+
+# statistic behind the CSV export, a SongTable in the results
+SONG_STATS = 'get_full_song_stats'
+SONG_STATS_FIELDS = list(FIELDS)
+
+
+def accumulators(groups: Iterable[str], start: struct_time, end: struct_time,
+                 song_stats: bool = False) -> dict[str, Accumulator]:
+    """
+    The accumulators of the statistics the given groups need (and of the song stats, if asked for),
+    by the name their results are reported under.
+    """
+    names = [name for group in GROUPS if group in groups for name in GROUPS[group]]
+    if song_stats:
+        names.append(SONG_STATS)
+
+    chosen = {}
+    for name in names:
+        if name not in chosen:
+            chosen[name] = PlayTime(start, end) if name == 'play_time' else STATS[name]()
+    return chosen
+
+
+def _compute(streaming_history: HistoryTable, start: struct_time, end: struct_time,
+             chosen: dict[str, Accumulator], database: Optional[HistoryDatabase]) -> dict[str, Any]:
+    # the SQL_STATS among the chosen ones from the database if there is one, the others in one pass
+    queried = {name: SQL_STATS[name](database, (start, end)) for name in chosen
+               if database is not None and name in SQL_STATS}
+    results = compute(streaming_history, window=(start, end),
+                      **{name: acc for name, acc in chosen.items() if name not in queried})
+    results.update(queried)
+    return {name: results[name] for name in chosen}
+
+
+def compute_report(streaming_history: HistoryTable, start: struct_time, end: struct_time,
+                   groups: Iterable[str] = tuple(GROUPS), song_stats: bool = False,
+                   database: Optional[HistoryDatabase] = None) -> dict[str, Any]:
+    """
+    Computes the statistics of the given groups over the plays from start to end, all in one pass.
+
+    :param database: the same history in a HistoryDatabase, the SQL_STATS are then queried from it (see stats.sql)
+
+    :return: dictionary of the statistic names to their results
+    """
+    return _compute(streaming_history, start, end, accumulators(groups, start, end, song_stats), database)
+
+
+def complete_report(results: dict[str, Any], streaming_history: HistoryTable, start: struct_time, end: struct_time,
+                    groups: Iterable[str], database: Optional[HistoryDatabase] = None) -> dict[str, Any]:
+    """
+    Computes the statistics of the given groups that are not in results yet, in one pass, and adds them to results.
+    Lets a report computed for the text only be extended for the graphs, if they are asked for.
+
+    :param database: the same history in a HistoryDatabase, as for compute_report
+
+    :return: results
+    """
+    missing = {name: acc for name, acc in accumulators(groups, start, end).items() if name not in results}
+    if missing:
+        results.update(_compute(streaming_history, start, end, missing, database))
+    return results
+
+
+def _write_top(results: dict[str, Any], out: TextIO) -> None:
+    total_time = results['play_time']
+
+    print(f'Total Play Time:', file=out)
+    print(f'{total_time!s}  or {int(total_time.total_seconds() / 60)} minutes', file=out)
+    print('\n', file=out)
+
+    # Tracks
+    track_counts = results['play_counts']
+    print('Top Played Tracks:', file=out)
+    for i, k, v in zip(range(1, 101), track_counts.keys(), track_counts.values()):
+        print(f'#{i:2} - {v:4} : {k}', file=out)
+    print('\n', file=out)
+
+    # Artists
+    artist_counts = results['play_counts_by_artist']
+    print('Top Played Artists:', file=out)
+    for i, k, v in zip(range(1, 101), artist_counts.keys(), artist_counts.values()):
+        print(f'#{i:2} - {v:4} : {k}', file=out)
+    print('\n', file=out)
+
+    # Albums
+    album_counts = results['play_counts_by_album']
+    print('Top Played Albums:', file=out)
+    for i, k, v in zip(range(1, 101), album_counts.keys(), album_counts.values()):
+        print(f'#{i:2} - {v:4} : {k}', file=out)
+    print('\n', file=out)
+
+    # Location
+    locations = results['location_counts']
+    print('Top Locations:', file=out)
+    for k, v in locations.items():
+        print(f'{k}: {v}', file=out)
+    print('\n', file=out)
+
+    # Longest Played Artists
+    time_artists = results['longest_played_artist']
+    print('Top Artists by Time Played:', file=out)
+    for i, (k, v) in enumerate(list(time_artists.items())[:20], 1):
+        print(f'#{i:2} - {int(v.total_seconds() // 3600)}h {int((v.total_seconds() % 3600) // 60)}m : {k}', file=out)
+    print('\n', file=out)
+
+    # Longest Played Tracks
+    time_tracks = results['longest_played_tracks']
+    print('Top Tracks by Time Played:', file=out)
+    for i, (k, v) in enumerate(list(time_tracks.items())[:20], 1):
+        print(f'#{i:2} - {int(v.total_seconds() // 3600)}h {int((v.total_seconds() % 3600) // 60)}m : {k}', file=out)
+    print('\n', file=out)
+
+    # Most Skipped
+    skipped_artists = results['most_skipped_artist']
+    print('Most Skipped Artists:', file=out)
+    for i, (k, v) in enumerate(list(skipped_artists.items())[:100], 1):
+        print(f'#{i:2} - {v:4} : {k}', file=out)
+    print('\n', file=out)
+
+    # Top Artist Per Month
+    print('Top Artist Per Month:', file=out)
+    monthly_tops = results['top_artist_per_month']
+    for month, (artist, count) in monthly_tops.items():
+        print(f'{month}: {artist} ({count} plays)', file=out)
+    print('\n', file=out)
+
+
+def _write_deep_dive(results: dict[str, Any], out: TextIO) -> None:
+    # One Hit Wonders
+    one_hits = results['one_hit_wonders']
+    print('Top One-Hit Wonders (Artists with > 5 plays but only 1 unique track):', file=out)
+    for i, (artist, (track, count)) in enumerate(list(one_hits.items())[:100], 1):
+        print(f'#{i:2} - {artist} : {track} ({count} plays)', file=out)
+    print('\n', file=out)
+
+    # Longest Streak (None without plays)
+    streak = results['longest_listening_streak']
+    if streak is None:
+        print('Longest Listening Streak: -', file=out)
+    elif streak[0]:
+        streak_start, streak_end, streak_duration = streak
+        print(f'Longest Listening Streak:', file=out)
+        print(f'Duration: {streak_duration}', file=out)
+        print(f'From: {streak_start}', file=out)
+        print(f'To:   {streak_end}', file=out)
+    print('\n', file=out)
+
+    # True Skip Rate
+    print('True Skip Rate (Artists with > 20 plays):', file=out)
+    skip_rates = results['true_skip_rate']
+    for i, (k, v) in enumerate(list(skip_rates.items())[:100], 1):
+        print(f'#{i:2} - {v:5.1f}% : {k}', file=out)
+    print('\n', file=out)
+
+    # Consecutive Plays
+    streak_track, streak_count = results['most_consecutive_plays']
+    print(f'Most Consecutive Plays: {streak_track} ({streak_count} times in a row)\n', file=out)
+
+    # Album Loyalty
+    print('Top Albums by "Loyalty" (Listening to >3 tracks in a row):', file=out)
+    loyal_albums = results['album_loyalty']
+    for i, (k, v) in enumerate(list(loyal_albums.items())[:100], 1):
+        print(f'#{i:2} - {v:4} sessions : {k}', file=out)
+    print('\n', file=out)
+
+    # Longest Relationship
+    print('Longest Artist Relationships:', file=out)
+    relationships = results['longest_artist_relationship']
+    for i, (k, v) in enumerate(list(relationships.items())[:100], 1):
+        days = v.days
+        print(f'#{i:2} - {days:4} days : {k}', file=out)
+    print('\n', file=out)
+
+    # Forgotten Favorites
+    print('Forgotten Favorites (Popular > 6 months ago, 0 plays recently):', file=out)
+    forgotten = results['forgotten_favorites']
+    for i, (k, v) in enumerate(forgotten[:100], 1):
+        print(f'#{i:2} - {v:4} past plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Most Musical Day
+    musical_day, musical_time = results['most_musical_day']
+    print(f'Most Musical Day: {musical_day} ({int(musical_time.total_seconds() // 3600)}h {int((musical_time.total_seconds() % 3600) // 60)}m)\n', file=out)
+
+    # Weekend vs Weekday
+    weekday_top, weekend_top = results['weekend_vs_weekday']
+    print('Top 5 Weekday Artists:', file=out)
+    for i, (k, v) in enumerate(list(weekday_top.items())[:10], 1):
+        print(f'#{i:2} - {v:4} : {k}', file=out)
+    print('Top 5 Weekend Artists:', file=out)
+    for i, (k, v) in enumerate(list(weekend_top.items())[:10], 1):
+        print(f'#{i:2} - {v:4} : {k}', file=out)
+    print('\n', file=out)
+
+    # Immediate Skips
+    print('Top "Nope" Songs (Skipped < 30s):', file=out)
+    nopes = results['immediate_skips']
+    for i, (k, v) in enumerate(list(nopes.items())[:50], 1):
+        print(f'#{i:2} - {v:4} skips : {k}', file=out)
+    print('\n', file=out)
+
+    # Variety Score
+    print('Variety Score (Unique Artists / Total Plays):', file=out)
+    variety = results['variety_score']
+    for year, score in variety.items():
+        print(f'{year}: {score:.3f}', file=out)
+    print('\n', file=out)
+
+    # Listening Velocity
+    print('Listening Velocity (Fastest to 100 plays):', file=out)
+    velocity = results['listening_velocity']
+    for i, (k, v) in enumerate(list(velocity.items())[:50], 1):
+        print(f'#{i:2} - {v:4} days : {k}', file=out)
+    print('\n', file=out)
+
+    # The Comeback
+    print('The Comeback (Artists with > 1 year gap):', file=out)
+    comebacks = results['the_comeback']
+    for i, (k, v) in enumerate(list(comebacks.items())[:50], 1):
+        print(f'#{i:2} - {v:4} days gap : {k}', file=out)
+    print('\n', file=out)
+
+    # Clockwork Artists
+    print('Clockwork Artists (>70% plays in 4h window):', file=out)
+    clockwork = results['clockwork_artists']
+    for i, (k, v) in enumerate(list(clockwork.items())[:30], 1):
+        print(f'#{i:2} - {v} : {k}', file=out)
+    print('\n', file=out)
+
+    # Session Analysis
+    avg_sess_dur, avg_sess_tracks = results['session_analysis']
+    print(f'Average Session: {avg_sess_dur:.1f} minutes, {avg_sess_tracks:.1f} tracks\n', file=out)
+
+    # Skipless Albums
+    print('Skipless Albums (Lowest skip rate, min 50 plays):', file=out)
+    skipless = results['skipless_albums']
+    for i, (k, v) in enumerate(list(skipless.items())[:50], 1):
+        print(f'#{i:2} - {v:5.1f}% skips : {k}', file=out)
+    print('\n', file=out)
+
+    # Sampler vs Completionist
+    print('Completionist Score (Unique Tracks / Total Plays):', file=out)
+    completionist = results['sampler_vs_completionist']
+    for i, (k, v) in enumerate(list(completionist.items())[:10], 1):
+        print(f'#{i:2} - {v:.2f} : {k}', file=out)
+    print('\n', file=out)
+
+    # Commute Heroes
+    print('Commute Heroes (Mon-Fri 7-9am & 5-7pm):', file=out)
+    commuters = results['commute_heroes']
+    for i, (k, v) in enumerate(list(commuters.items())[:10], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Marathon Tracks
+    print('Marathon Tracks (> 5 mins):', file=out)
+    marathons = results['marathon_tracks']
+    for i, (k, v) in enumerate(list(marathons.items())[:100], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # One Week Wonders
+    print('One Week Wonders (>50 plays in 1 week, <10 others):', file=out)
+    wonders = results['one_week_wonders']
+    for i, (k, v) in enumerate(list(wonders.items())[:100], 1):
+        print(f'#{i:2} - {v} : {k}', file=out)
+    print('\n', file=out)
+
+    # Sound of Silence
+    silence_start, silence_end, silence_days = results['sound_of_silence']
+    print(f'Sound of Silence (Longest gap): {silence_days} days', file=out)
+    print(f'From: {silence_start}', file=out)
+    print(f'To:   {silence_end}\n', file=out)
+
+    # Control Freak
+    cf_data, (cf_artist, cf_count) = results['control_freak_data']
+    print('Control Freak vs Passenger:', file=out)
+    print(f"Active Listening (You clicked): {cf_data['active']:.1f}%", file=out)
+    print(f"Passive Listening (Autoplay/Queue): {cf_data['passive']:.1f}%", file=out)
+    print(f"Most Clicked Artist: {cf_artist} ({cf_count} active starts)", file=out)
+    print('\n', file=out)
+
+    # Shuffle Paradox
+    shuf_data = results['shuffle_paradox_data']
+    print('The Shuffle Paradox:', file=out)
+    print(f"Skip Rate with Shuffle ON:  {shuf_data['shuffle_skip_rate']:.1f}%", file=out)
+    print(f"Skip Rate with Shuffle OFF: {shuf_data['normal_skip_rate']:.1f}%", file=out)
+    print('\n', file=out)
+
+    # Natural Death
+    nat_data, respected_artists = results['natural_death_data']
+    print("The 'Natural Causes' Death Rate:", file=out)
+    print(f"Songs finished naturally: {nat_data['natural']:.1f}%", file=out)
+    print(f"Songs killed by user:     {nat_data['killed']:.1f}%", file=out)
+    print('Top "Respected" Artists (Highest completion rate):', file=out)
+    for i, (k, v) in enumerate(respected_artists, 1):
+        print(f'#{i:2} - {v:.1f}% finished : {k}', file=out)
+    print('\n', file=out)
+
+    # Skipped Ratio
+    skipped_stats = results['skipped_ratio']
+    print('Skipped Ratio:', file=out)
+    for k, v in skipped_stats.items():
+        print(f'{k}: {v}', file=out)
+    print('\n', file=out)
+
+    # Night Shift
+    print('The Night Shift (Top Artists 2 AM - 5 AM):', file=out)
+    night_artists = results['night_shift_artists']
+    for i, (k, v) in enumerate(list(night_artists.items())[:20], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # New Year's Transitions
+    print("New Year's Transitions:", file=out)
+    transitions = results['new_years_transitions']
+    for year, (last, first) in transitions.items():
+        print(f"{year} -> {year+1}:", file=out)
+        print(f"  Last:  {last}", file=out)
+        print(f"  First: {first}", file=out)
+    print('\n', file=out)
+
+    # Consistency King
+    print('Consistency King (Tracks played on most unique days):', file=out)
+    consistent_tracks = results['consistency_king']
+    for i, (k, v) in enumerate(list(consistent_tracks.items())[:20], 1):
+        print(f'#{i:2} - {v:4} days : {k}', file=out)
+    print('\n', file=out)
+
+    # Alphabet Challenge
+    print('The Alphabet Challenge (Most played track for A-Z):', file=out)
+    alphabet_data = results['alphabet_challenge']
+    for char in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        if char in alphabet_data:
+            track, count = alphabet_data[char]
+            print(f"{char}: {track} ({count} plays)", file=out)
+        else:
+            print(f"{char}: -", file=out)
+    print('\n', file=out)
+
+    # Obsession Score
+    print('Obsession Score (Plays / Unique Days):', file=out)
+    obsessions = results['obsession_score']
+    for i, (k, v) in enumerate(list(obsessions.items())[:10], 1):
+        print(f'#{i:2} - {v:.2f} : {k}', file=out)
+    print('\n', file=out)
+
+    # Early Bird
+    print('The Early Bird (Top Artists 5 AM - 9 AM):', file=out)
+    early_birds = results['early_bird_artists']
+    for i, (k, v) in enumerate(list(early_birds.items())[:10], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # 9-to-5
+    print('The 9-to-5 (Top Artists Mon-Fri 9 AM - 5 PM):', file=out)
+    workers = results['nine_to_five_artists']
+    for i, (k, v) in enumerate(list(workers.items())[:10], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Party Animal
+    print('The Party Animal (Top Tracks Fri/Sat 10 PM - 4 AM):', file=out)
+    party_tracks = results['party_animal_tracks']
+    for i, (k, v) in enumerate(list(party_tracks.items())[:20], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Sunday Scaries
+    print('The Sunday Scaries (Top Tracks Sun 6 PM - Midnight):', file=out)
+    scary_tracks = results['sunday_scaries_tracks']
+    for i, (k, v) in enumerate(list(scary_tracks.items())[:20], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Unskippable Streak
+    streak_count, streak_start, streak_end = results['unskippable_streak']
+    print(f'Unskippable Streak: {streak_count} songs in a row', file=out)
+    print(f'From: {streak_start}', file=out)
+    print(f'To:   {streak_end}\n', file=out)
+
+    # Artist Hopper
+    hopper_score = results['artist_hopper']
+    print(f'Artist Hopper Score (Avg consecutive plays per artist): {hopper_score:.2f}', file=out)
+    print('(Low = Shuffle lover, High = Album listener)\n', file=out)
+
+    # Discovery Peak
+    peak_month, peak_count = results['discovery_peak']
+    print(f'Discovery Peak: {peak_month} ({peak_count} new artists)\n', file=out)
+
+    # Comfort Zone
+    comfort_pct, comfort_top10 = results['comfort_zone']
+    print(f'The Comfort Zone: {comfort_pct:.1f}% of time spent on Top 10 Artists', file=out)
+    print('Top 10 Contributors:', file=out)
+    for i, (artist, duration) in enumerate(comfort_top10, 1):
+        print(f'#{i:2} - {int(duration.total_seconds() // 3600)}h : {artist}', file=out)
+    print('\n', file=out)
+
+    # Single Day Record
+    rec_artist, rec_date, rec_time = results['single_day_record']
+    print(f'Single Day Record: {rec_artist} on {rec_date}', file=out)
+    print(f'Duration: {int(rec_time.total_seconds() // 3600)}h {int((rec_time.total_seconds() % 3600) // 60)}m\n', file=out)
+
+
+def _write_fun(results: dict[str, Any], out: TextIO) -> None:
+    # --- NEW FUN STATS ---
+
+    # Manual Laborer
+    print('The Manual Laborer (Top Clicked Tracks):', file=out)
+    manual = results['manual_laborer']
+    for i, (k, v) in enumerate(list(manual.items())[:100], 1):
+        print(f'#{i:2} - {v:4} clicks : {k}', file=out)
+    print('\n', file=out)
+
+    # Shuffle Roulette
+    print('The Shuffle Roulette (Top Tracks with Shuffle ON):', file=out)
+    shuffled = results['shuffle_roulette']
+    for i, (k, v) in enumerate(list(shuffled.items())[:50], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Session Starter
+    print('The Session Starter (Most frequent session openers):', file=out)
+    starters = results['session_starter']
+    for i, (k, v) in enumerate(list(starters.items())[:50], 1):
+        print(f'#{i:2} - {v:4} starts : {k}', file=out)
+    print('\n', file=out)
+
+    # Session Closer
+    print('The Session Closer (Most frequent session enders):', file=out)
+    closers = results['session_closer']
+    for i, (k, v) in enumerate(list(closers.items())[:50], 1):
+        print(f'#{i:2} - {v:4} ends : {k}', file=out)
+    print('\n', file=out)
+
+    # Quick Fix
+    qf_count = results['quick_fix']
+    print(f'The Quick Fix: {qf_count} "Single Song Sessions" (Opened app, played 1 song, closed)\n', file=out)
+
+    # Skipper's Remorse
+    print("Skipper's Remorse (Skipped >50% but played >20 times):", file=out)
+    remorse = results['skippers_remorse']
+    for i, (k, v) in enumerate(list(remorse.items())[:50], 1):
+        print(f'#{i:2} - {v:.1f}% skipped : {k}', file=out)
+    print('\n', file=out)
+
+    # Remix Junkie
+    remix_pct, remix_cnt = results['remix_junkie']
+    print(f'The Remix Junkie: {remix_pct:.1f}% of tracks are Remixes/Edits ({remix_cnt} tracks)\n', file=out)
+
+    # Live Fanatic
+    live_pct, live_cnt = results['live_fanatic']
+    print(f'The Live Fanatic: {live_pct:.1f}% of tracks are Live/Concert ({live_cnt} tracks)\n', file=out)
+
+    # Short King
+    print('The Short King (Most played tracks < 2 mins):', file=out)
+    shorts = results['short_king']
+    for i, (k, v) in enumerate(list(shorts.items())[:15], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Epic Saga
+    print('The Epic Saga (Most played tracks > 7 mins):', file=out)
+    epics = results['epic_saga']
+    for i, (k, v) in enumerate(list(epics.items())[:15], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Collaborator
+    print('The Collaborator (Most played tracks featuring others):', file=out)
+    collabs = results['collaborator']
+    for i, (k, v) in enumerate(list(collabs.items())[:5], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Alphabet Artists
+    print('The Alphabet Artists (Top Artist for A-Z):', file=out)
+    alpha_artists = results['alphabet_artists']
+    for char in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+        if char in alpha_artists:
+            artist, count = alpha_artists[char]
+            print(f"{char}: {artist} ({count} plays)", file=out)
+        else:
+            print(f"{char}: -", file=out)
+    print('\n', file=out)
+
+    # Spelling Bee
+    long_art, len_art, long_trk, len_trk = results['spelling_bee']
+    print(f'The Spelling Bee:', file=out)
+    print(f'Longest Artist Name: {long_art} ({len_art} chars)', file=out)
+    print(f'Longest Track Title: {long_trk} ({len_trk} chars)\n', file=out)
+
+    # Same Name Game
+    print('The Same Name Game (Titles played from most different artists):', file=out)
+    same_names = results['same_name_game']
+    for i, (k, v) in enumerate(list(same_names.items())[:5], 1):
+        print(f'#{i:2} - {v:4} artists : {k}', file=out)
+    print('\n', file=out)
+
+    # Midnight Club
+    print('The Midnight Club (Top Artists 00:00 - 01:00):', file=out)
+    midnighters = results['midnight_club']
+    for i, (k, v) in enumerate(list(midnighters.items())[:15], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Lunch Break
+    print('The Lunch Break (Top Artists 12:00 - 14:00):', file=out)
+    lunchers = results['lunch_break']
+    for i, (k, v) in enumerate(list(lunchers.items())[:15], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Monday Blues
+    print('The Monday Blues (Top Tracks on Mondays):', file=out)
+    mondays = results['monday_blues']
+    for i, (k, v) in enumerate(list(mondays.items())[:15], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Hump Day Hero
+    print('The Hump Day Hero (Top Tracks on Wednesdays):', file=out)
+    wednesdays = results['hump_day_hero']
+    for i, (k, v) in enumerate(list(wednesdays.items())[:15], 1):
+        print(f'#{i:2} - {v:4} plays : {k}', file=out)
+    print('\n', file=out)
+
+    # Quarterly Review
+    print('The Quarterly Review (Top Track per Quarter):', file=out)
+    quarters = results['quarterly_review']
+    for q, (track, count) in quarters.items():
+        print(f'Q{q}: {track} ({count} plays)', file=out)
+    print('\n', file=out)
+
+    # Album Purist
+    purist_streak, purist_album, purist_artist = results['album_purist']
+    print(f'The Album Purist:', file=out)
+    print(f'Longest streak of unique songs from one album: {purist_streak}', file=out)
+    print(f'Album: {purist_album} by {purist_artist}\n', file=out)
+
+    # Instant Skips (all removed tracks from spotify because it was started but immediately skipped)
+    print('Instant Skips Probably removed tracks (Skipped < 1s):', file=out)
+    inst_skips = results['instant_skips']
+    total_inst_skips = sum(inst_skips.values())
+    print(f'Total Instant Skips: {total_inst_skips}', file=out)
+    for i, (k, v) in enumerate(list(inst_skips.items())[:20], 1):
+        print(f'#{i:2} - {v:4} skips : {k}', file=out)
+    print('\n', file=out)
+
+
+_WRITERS = {
+    'top': _write_top,
+    'deep_dive': _write_deep_dive,
+    'fun': _write_fun,
+}
+
+
+def write_text(results: dict[str, Any], start: struct_time, end: struct_time, groups: Iterable[str],
+               out: TextIO) -> None:
+    """
+    Writes the printed parts of the report for the given groups to out, in report order.
+    """
+    print(f' ===> Statistics from [{time.strftime("%Y-%m-%d %H:%M", start)}] to [{time.strftime("%Y-%m-%d %H:%M", end)}]: \n', file=out)
+    for group, write in _WRITERS.items():
+        if group in groups:
+            write(results, out)
+    print('--- End of Report ---', file=out)
+
+
+def write_song_stats(song_stats: SongTable, path: str, sort: str = 'first', file_format: Optional[str] = None) -> int:
+    """
+    Writes the per track rows of get_full_song_stats to a CSV (or gzipped CSV, Parquet or Arrow) file,
+    a chunk at a time, see export.write_songs.
+
+    :return: number of rows written
+    """
+    return write_songs(song_stats, path, sort, file_format)
+
+
+def _jsonable(value: Any) -> Any:
+    # struct_time is a tuple, so it has to be caught before tuples are turned into lists
+    if isinstance(value, struct_time):
+        return time.strftime('%Y-%m-%dT%H:%M:%S', value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k if k is None or isinstance(k, (str, int, float, bool)) else str(k): _jsonable(v)
+                for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    if isinstance(value, SongTable):
+        return value.records()
+    return value
+
+
+def write_json(results: dict[str, Any], path: str) -> None:
+    """
+    Writes all results to a JSON file: durations as seconds, dates and times in ISO format.
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(_jsonable(results), f, ensure_ascii=False, indent=1)
+
+
+def figure_pages(results: dict[str, Any], streaming_history: HistoryTable,
+                 start: struct_time, end: struct_time) -> Iterator[Page]:
+    """
+    The graphs of the report as pages to plot, from the results of the graphs group.
+    Pages are made as they are asked for, data only some graph needs is computed on the way.
+    """
+    yield plot_top_items, (results['play_counts'], 'Top 10 Played Tracks')
+    yield plot_top_items, (results['play_counts_by_artist'], 'Top 10 Played Artists')
+    yield plot_top_items, (results['play_counts_by_album'], 'Top 10 Played Albums')
+
+    yield plot_location_counts, (results['location_counts'], 'Plays by Location')
+    yield plot_longest_played_artist, (results['longest_played_artist'], 'Top 10 Artists by Listening Time')
+    yield plot_longest_played_tracks, (results['longest_played_tracks'], 'Top 10 Tracks by Listening Time')
+    yield plot_skipped_items, (results['most_skipped_artist'], 'Top 10 Skipped Artists')
+    yield plot_skipped_items, (results['most_skipped_track'], 'Top 10 Skipped Tracks')
+
+    yield plot_top_items, (results['night_shift_artists'], 'The Night Shift (Top Artists 2AM-5AM)')
+
+    # Fun Stats Graphs
+    yield plot_listening_by_day_of_week, (results['listening_by_day_of_week'], 'Listening by Day of Week')
+    yield plot_discovery_rate, (results['discovery_rate'], 'Artist Discovery Rate (New Artists per Month)')
+    yield plot_seasonal_listening, (results['seasonal_listening'], 'Seasonal Listening Habits')
+    yield plot_day_night_split, (results['day_night_split'], 'Day vs Night Listening')
+    yield plot_hourly_heatmap, (results['hourly_heatmap_data'], 'Listening Heatmap (Day vs Hour)')
+    yield plot_variety_score, (results['variety_score'], 'Variety Score Over Years')
+    yield plot_comfort_zone, (results['comfort_zone'][0], 'The Comfort Zone (% Time on Top 10 Artists)')
+
+    # Heatmaps
+    cal_matrix, cal_years, cal_months = results['calendar_heatmap_data']
+    yield plot_calendar_heatmap, (cal_matrix, cal_years, cal_months, 'Listening Calendar (Year vs Month)')
+
+    yield plot_picky_grid, (results['picky_grid_data'], 'The Picky Grid (Skip Rate % by Day & Hour)')
+
+    dev_matrix, dev_platforms = results['device_habits_data']
+    yield plot_device_habits, (dev_matrix, dev_platforms, 'Device Habits (Platform vs Hour)')
+
+    eras_matrix, eras_artists, eras_time = results['artist_eras_data']
+    yield plot_artist_eras, (eras_matrix, eras_artists, eras_time, 'Artist Eras (Top 300 Artists vs Time)')
+
+    # Active Listening Deep Dive
+    yield plot_active_heatmap, (results['active_listening_heatmap_data'], 'Active Listening Heatmap (When do you click play?)')
+    yield plot_active_trend, (results['active_listening_trend_data'], 'Active Listening Trend (% of starts that were clicks)')
+
+    # Artist Trends
+    top_50_artists = list(results['play_counts_by_artist'].keys())[:50]
+    artist_trends = artist_history_over_time(streaming_history, top_50_artists, window=(start, end))
+    yield plot_artist_trends, (artist_trends, 'Top 50 Artists Trends Over Years')
+
+    # Platform Usage
+    platforms = results['platform_usage']
+    yield plot_platform_usage, (platforms, 'Platform Usage')
+
+    # Listening by Hour
+    hourly_stats = results['listening_by_hour']
+    yield plot_listening_by_hour, (hourly_stats, 'Listening Activity by Hour of Day')
+
+    # Artist Personality Radar
+    # print("Calculating Artist Personalities...")
+    # traits = get_artist_traits(DATA.streaming_history)
+    # Pick top 5 artists
+    # top_5_artists = list(results['play_counts_by_artist'].keys())[:5]
+    # for artist in top_5_artists:
+    #     if artist in traits:
+    #         yield plot_artist_radar, ({artist: traits[artist]}, f'Artist Personality: {artist}')
+
+
+
+def make_figures(results: dict[str, Any], streaming_history: HistoryTable,
+                 start: struct_time, end: struct_time) -> list[Figure]:
+    """
+    Plots the graphs of the report, from the results of the graphs group.
+    """
+    figures = [plot_page(page) for page in figure_pages(results, streaming_history, start, end)]
+    # Filter out None figures
+    return [f for f in figures if f is not None]
+
+
+def write_pdf(pages: Iterable[Page], path: str, workers: Optional[int] = None, report_text: Optional[str] = None) -> int:
+    """
+    Plots the pages and writes them to a PDF file, in parallel on all cores by default (see render.render_pdf),
+    after the pages of the printed report, if given.
+
+    :return: number of pages written
+    """
+    return render_pdf(pages, path, workers, text=report_text)
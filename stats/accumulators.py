@@ -0,0 +1,1630 @@
+import heapq
+from bisect import bisect_right
+from calendar import timegm
+from collections import defaultdict
+from datetime import timedelta, datetime, date
+from functools import partial
+from operator import itemgetter
+
+from time import gmtime, struct_time
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from filemgr.table import HistoryTable, first_rows
+from filemgr.types import Play
+
+from .engine import Accumulator
+from .groupby import count_by
+from .songs import SongTable
+
+
+ACTIVE_REASONS = {'clickrow', 'playbtn'}
+DAYS = {0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday', 4: 'Friday', 5: 'Saturday', 6: 'Sunday'}
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _top(items: Iterable, top_k: Optional[int] = None, key: Callable = itemgetter(1)) -> list:
+    """
+    items in descending order of key (ties keep their order);
+    with top_k only the first top_k of them, picked with a heap instead of sorting all items
+    """
+    if top_k is None:
+        return sorted(items, key=key, reverse=True)
+    return heapq.nlargest(top_k, items, key=key)
+
+
+def _ranked(counts: dict, top_k: Optional[int] = None) -> dict:
+    """descending sorted copy of a dictionary by value (ties keep their first-seen order), top_k entries at most"""
+    return dict(_top(counts.items(), top_k))
+
+
+def _datetime(ts: int) -> datetime:
+    """naive datetime with the calendar fields of epoch seconds (as written in the export, UTC)"""
+    return _EPOCH + timedelta(seconds=ts)
+
+
+def _date(day: int) -> date:
+    """date of a day number (days since 1970-01-01)"""
+    return _EPOCH.date() + timedelta(days=day)
+
+
+def _equals(table: HistoryTable, name: str, value: str) -> np.ndarray:
+    """boolean array of the plays whose text column `name` is `value`"""
+    vocab = table.vocab[name]
+    if value not in vocab:
+        return np.zeros(len(table), dtype=bool)
+    return getattr(table, name) == vocab.index(value)
+
+
+def _was_skipped(item: Play) -> bool:
+    # 'skipped' might be None in some data exports,
+    # so we fallback to checking if msPlayed is reasonably long (e.g. > 30s) if skipped is missing
+    was_skipped = item.get('skipped')
+    if was_skipped is None:
+        was_skipped = (item['ms'] < 30000 and item.get('reasonEnd') != 'trackdone')
+    return was_skipped
+
+
+class _TrackCounter(Accumulator):
+    """counts plays per "Artist - Track" key of the plays selected by `mask`"""
+    columnar = True
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.counts = {}
+
+    def mask(self, table: HistoryTable) -> Optional[np.ndarray]:
+        """boolean array of the plays to count, None to count all of them"""
+        return None
+
+    def consume(self, table):
+        self.counts = count_by(table, 'artist_track', self.mask(table), labels=True)
+
+    def result(self):
+        return _ranked(self.counts, self.top_k)
+
+
+class _SessionAccumulator(Accumulator):
+    """
+    groups the time sorted history into sessions, starting a new one whenever the gap between
+    the end of a play and the start (with from_start = False, the end) of the next is longer than gap_minutes;
+    the sessions are read from the table's session index (see HistoryTable.sessions), so stats with the same gap share it
+    """
+    ordered = True
+    columnar = True
+    from_start = True
+
+    def __init__(self, gap_minutes: int = 30):
+        self.gap = gap_minutes * 60
+        self.table = None
+        # offsets of every session's first play and of the play after its last
+        self.sessions = np.empty((0, 2), dtype=np.int64)
+
+    def consume(self, table):
+        self.table = table
+        self.sessions = table.sessions(self.gap, self.from_start)
+
+    def _tracks(self, rows: np.ndarray) -> list[str]:
+        """"Artist - Track" keys of the plays at `rows`"""
+        labels = self.table.labels('artist_track')
+        return [labels[i] for i in self.table.codes('artist_track')[0][rows].tolist()]
+
+
+class _ArtistCounter(_TrackCounter):
+    """counts plays per artist of the plays selected by `mask`"""
+
+    def consume(self, table):
+        self.counts = count_by(table, 'artist', self.mask(table))
+
+
+class PlayTime(Accumulator):
+    """total listening time between start_date and end_date"""
+
+    def __init__(self, start_date: struct_time = gmtime(0), end_date: struct_time = gmtime()):
+        self.start = timegm(start_date)
+        self.end = timegm(end_date)
+        self.total_ms = 0
+
+    def add(self, item, track):
+        if self.start <= item['ts'] <= self.end:
+            self.total_ms += item['ms']
+
+    def result(self):
+        return timedelta(milliseconds=self.total_ms)
+
+
+class PlayCounts(_TrackCounter):
+    """plays per artist-track"""
+
+
+class PlayCountsByArtist(_ArtistCounter):
+    """plays per artist"""
+
+
+class PlayCountsByAlbum(_TrackCounter):
+    """plays per artist-album"""
+
+    def consume(self, table):
+        self.counts = count_by(table, 'artist_album', labels=True)
+
+
+class ArtistHistoryOverTime(Accumulator):
+    """plays per year for the given artists"""
+
+    def __init__(self, top_artists: list[str]):
+        self.counts = {artist: {} for artist in top_artists}
+
+    def add(self, item, track):
+        years = self.counts.get(item['artistName'])
+        if years is not None:
+            year = item['year']
+            years[year] = years.get(year, 0) + 1
+
+    def result(self):
+        return self.counts
+
+
+class PlatformUsage(_TrackCounter):
+    """plays per platform"""
+
+    def consume(self, table):
+        self.counts = count_by(table, 'platform')
+
+
+class ListeningByHour(Accumulator):
+    """plays per hour of the day"""
+
+    def __init__(self):
+        self.counts = {h: 0 for h in range(24)}
+
+    def add(self, item, track):
+        self.counts[item['hour']] += 1
+
+    def result(self):
+        return self.counts
+
+
+class SkippedRatio(Accumulator):
+    """skipped vs not skipped plays"""
+
+    def __init__(self):
+        self.skipped = 0
+        self.not_skipped = 0
+
+    def add(self, item, track):
+        if item['skipped']:
+            self.skipped += 1
+        else:
+            self.not_skipped += 1
+
+    def result(self):
+        return {'Skipped': self.skipped, 'Not Skipped': self.not_skipped}
+
+
+class LocationCounts(_TrackCounter):
+    """plays per country"""
+
+    def consume(self, table):
+        self.counts = count_by(table, 'country')
+
+
+class MostSkippedArtist(_ArtistCounter):
+    """skips per artist"""
+
+    def mask(self, table):
+        return table.skipped == 1
+
+
+class MostSkippedTrack(_TrackCounter):
+    """skips per track"""
+
+    def mask(self, table):
+        return table.skipped == 1
+
+
+class LongestPlayedArtist(Accumulator):
+    """listening time per artist"""
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.times = defaultdict(int)
+
+    def add(self, item, track):
+        self.times[item['artistName']] += item['ms']
+
+    def result(self):
+        return {artist: timedelta(milliseconds=ms) for artist, ms in _ranked(self.times, self.top_k).items()}
+
+
+class TopArtistPerMonth(Accumulator):
+    """most played artist of each month"""
+
+    def __init__(self):
+        self.monthly_counts = defaultdict(partial(defaultdict, int))
+
+    def add(self, item, track):
+        self.monthly_counts[f"{item['year']}-{item['month']:02d}"][item['artistName']] += 1
+
+    def result(self):
+        result = {}
+        for month, artists in self.monthly_counts.items():
+            result[month] = max(artists.items(), key=lambda x: x[1])
+
+        return dict(sorted(result.items()))
+
+
+class ListeningByDayOfWeek(Accumulator):
+    """plays per day of the week"""
+
+    def __init__(self):
+        self.counts = [0] * 7
+
+    def add(self, item, track):
+        self.counts[item['weekday']] += 1
+
+    def result(self):
+        return {DAYS[d]: self.counts[d] for d in range(7)}
+
+
+class DiscoveryRate(Accumulator):
+    """new artists per month"""
+    ordered = True
+
+    def __init__(self):
+        self.seen_artists = set()
+        self.counts = defaultdict(int)
+
+    def add(self, item, track):
+        artist = item['artistName']
+        if artist not in self.seen_artists:
+            self.seen_artists.add(artist)
+            self.counts[f"{item['year']}-{item['month']:02d}"] += 1
+
+    def result(self):
+        return dict(sorted(self.counts.items()))
+
+
+class SeasonalListening(Accumulator):
+    """plays per season"""
+    _SEASONS = {12: 'Winter', 1: 'Winter', 2: 'Winter', 3: 'Spring', 4: 'Spring', 5: 'Spring',
+                6: 'Summer', 7: 'Summer', 8: 'Summer', 9: 'Autumn', 10: 'Autumn', 11: 'Autumn'}
+
+    def __init__(self):
+        self.seasons = {'Winter': 0, 'Spring': 0, 'Summer': 0, 'Autumn': 0}
+
+    def add(self, item, track):
+        self.seasons[self._SEASONS[item['month']]] += 1
+
+    def result(self):
+        return self.seasons
+
+
+class OneHitWonders(Accumulator):
+    """artists with at least min_plays plays but only one unique track"""
+
+    def __init__(self, min_plays: int = 5, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.min_plays = min_plays
+        self.artist_tracks = defaultdict(set)
+        self.artist_plays = defaultdict(int)
+
+    def add(self, item, track):
+        artist = item['artistName']
+        self.artist_tracks[artist].add(item['trackName'])
+        self.artist_plays[artist] += 1
+
+    def result(self):
+        result = {}
+        for artist, tracks in self.artist_tracks.items():
+            if len(tracks) == 1 and self.artist_plays[artist] >= self.min_plays:
+                result[artist] = (list(tracks)[0], self.artist_plays[artist])
+
+        return dict(_top(result.items(), self.top_k, key=lambda x: x[1][1]))
+
+
+class DayNightSplit(Accumulator):
+    """plays during the day (6-18) vs the night (18-6)"""
+
+    def __init__(self):
+        self.day = 0
+        self.night = 0
+
+    def add(self, item, track):
+        if 6 <= item['hour'] < 18:
+            self.day += 1
+        else:
+            self.night += 1
+
+    def result(self):
+        return {'Day': self.day, 'Night': self.night}
+
+
+class LongestListeningStreak(_SessionAccumulator):
+    """longest run of plays with gaps of at most gap_tolerance_minutes"""
+
+    def __init__(self, gap_tolerance_minutes: int = 10):
+        super().__init__(gap_tolerance_minutes)
+
+    def result(self):
+        if not len(self.sessions):
+            return None
+
+        first, last = self.sessions[:, 0], self.sessions[:, 1] - 1
+        # streaks run from the start of their first play to the end of their last, in ms
+        durations = self.table.end_time[last] * 1000 - (self.table.end_time[first] * 1000 - self.table.ms_played[first])
+        best = int(np.argmax(durations))
+        if durations[best] <= 0:
+            return None, None, timedelta(0)
+
+        first, last = int(first[best]), int(last[best])
+        start_dt = _datetime(int(self.table.end_time[first])) - timedelta(milliseconds=int(self.table.ms_played[first]))
+        end_dt = _datetime(int(self.table.end_time[last]))
+        return start_dt, end_dt, end_dt - start_dt
+
+
+class TrueSkipRate(Accumulator):
+    """skip percentage per artist with more than min_plays plays"""
+
+    def __init__(self, min_plays: int = 20, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.min_plays = min_plays
+        self.plays = defaultdict(int)
+        self.skips = defaultdict(int)
+
+    def add(self, item, track):
+        artist = item['artistName']
+        self.plays[artist] += 1
+        if item['skipped']:
+            self.skips[artist] += 1
+
+    def result(self):
+        results = {}
+        for artist, plays in self.plays.items():
+            if plays > self.min_plays:
+                results[artist] = (self.skips[artist] / plays) * 100
+
+        return _ranked(results, self.top_k)
+
+
+class MostConsecutivePlays(Accumulator):
+    """track played the most times back-to-back"""
+    keyed = True
+
+    def __init__(self):
+        self.current_track = None
+        self.current_streak = 0
+        self.max_track = ""
+        self.max_streak = 0
+
+    def add(self, item, track):
+        if self.current_track is None:
+            self.current_track = track
+            self.current_streak = 1
+        elif track == self.current_track:
+            self.current_streak += 1
+        else:
+            if self.current_streak > self.max_streak:
+                self.max_streak = self.current_streak
+                self.max_track = self.current_track
+            self.current_track = track
+            self.current_streak = 1
+
+    def result(self):
+        if self.current_track is None:
+            return ("None", 0)
+        return (self.max_track, self.max_streak)
+
+
+class AlbumLoyalty(Accumulator):
+    """times at least 3 songs of the same album were played in a row"""
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.loyalty_counts = defaultdict(int)
+        self.started = False
+        self.current_album = None
+        self.current_streak = 0
+
+    def add(self, item, track):
+        album = item['albumName']
+        if not self.started:
+            self.started = True
+            self.current_album = album
+            self.current_streak = 1
+        # Ignore singles or unknown albums if necessary, but keeping it simple for now
+        elif album == self.current_album and album:
+            self.current_streak += 1
+        else:
+            if self.current_streak >= 3:
+                self.loyalty_counts[self.current_album] += 1
+            self.current_album = album
+            self.current_streak = 1
+
+    def result(self):
+        return _ranked(self.loyalty_counts, self.top_k)
+
+
+class LongestArtistRelationship(Accumulator):
+    """time between first and last listen per artist"""
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.first_seen = {}
+        self.last_seen = {}
+
+    def add(self, item, track):
+        artist = item['artistName']
+        ts = item['ts']
+
+        if artist not in self.first_seen or ts < self.first_seen[artist]:
+            self.first_seen[artist] = ts
+        if artist not in self.last_seen or ts > self.last_seen[artist]:
+            self.last_seen[artist] = ts
+
+    def result(self):
+        durations = {}
+        for artist, first in self.first_seen.items():
+            diff = timedelta(seconds=self.last_seen[artist] - first)
+            # Filter out artists listened to for less than a day
+            if diff.total_seconds() > 86400:
+                durations[artist] = diff
+
+        return _ranked(durations, self.top_k)
+
+
+class ForgottenFavorites(Accumulator):
+    """artists popular in the past with no plays in the last months_forgotten months"""
+    ordered = True
+
+    def __init__(self, months_forgotten: int = 6, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.months_forgotten = months_forgotten
+        self.plays = defaultdict(list)
+        self.last = None
+
+    def add(self, item, track):
+        self.last = item['ts']
+        self.plays[item['artistName']].append(self.last)
+
+    def result(self):
+        if self.last is None:
+            return []
+
+        cutoff = self.last - timedelta(days=30 * self.months_forgotten).total_seconds()
+
+        forgotten = []
+        for artist, timestamps in self.plays.items():
+            # Minimum plays to be considered a "favorite"
+            past = bisect_right(timestamps, cutoff)
+            if timestamps[-1] <= cutoff and past > 20:
+                forgotten.append((artist, past))
+
+        return _top(forgotten, self.top_k)
+
+
+class HourlyHeatmapData(Accumulator):
+    """7x24 matrix of plays by day of week and hour"""
+
+    def __init__(self):
+        # 7 rows (Mon-Sun), 24 columns (0-23 hours)
+        self.matrix = [[0 for _ in range(24)] for _ in range(7)]
+
+    def add(self, item, track):
+        self.matrix[item['weekday']][item['hour']] += 1
+
+    def result(self):
+        return self.matrix
+
+
+class MostMusicalDay(Accumulator):
+    """date with the most listening time"""
+
+    def __init__(self):
+        self.daily_time = defaultdict(int)
+
+    def add(self, item, track):
+        self.daily_time[item['date']] += item['ms']
+
+    def result(self):
+        if not self.daily_time:
+            return ("None", timedelta(0))
+
+        day, ms = max(self.daily_time.items(), key=lambda x: x[1])
+        return _date(day).isoformat(), timedelta(milliseconds=ms)
+
+
+class WeekendVsWeekday(Accumulator):
+    """top artists for weekdays and weekends"""
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.weekday_counts = defaultdict(int)
+        self.weekend_counts = defaultdict(int)
+
+    def add(self, item, track):
+        if item['weekday'] < 5:  # 0-4 is Mon-Fri
+            self.weekday_counts[item['artistName']] += 1
+        else:  # 5-6 is Sat-Sun
+            self.weekend_counts[item['artistName']] += 1
+
+    def result(self):
+        return _ranked(self.weekday_counts, self.top_k), _ranked(self.weekend_counts, self.top_k)
+
+
+class ImmediateSkips(_TrackCounter):
+    """tracks skipped within 30 seconds"""
+    _LIMIT = 30 * 1000
+
+    def mask(self, table):
+        return (table.skipped == 1) & (table.ms_played < self._LIMIT)
+
+
+class VarietyScore(Accumulator):
+    """unique artists / plays per year"""
+
+    def __init__(self):
+        self.plays = defaultdict(int)
+        self.artists = defaultdict(set)
+
+    def add(self, item, track):
+        year = item['year']
+        self.plays[year] += 1
+        self.artists[year].add(item['artistName'])
+
+    def result(self):
+        scores = {}
+        for year, plays in self.plays.items():
+            if plays > 0:
+                scores[year] = len(self.artists[year]) / plays
+
+        return dict(sorted(scores.items()))
+
+
+class ListeningVelocity(Accumulator):
+    """days taken per artist to reach target_plays plays"""
+
+    def __init__(self, target_plays: int = 100):
+        self.target_plays = target_plays
+        self.artist_plays = defaultdict(list)
+
+    def add(self, item, track):
+        self.artist_plays[item['artistName']].append(item['ts'])
+
+    def result(self):
+        velocity = {}
+        for artist, timestamps in self.artist_plays.items():
+            if len(timestamps) >= self.target_plays:
+                sorted_ts = sorted(timestamps)
+                velocity[artist] = (sorted_ts[self.target_plays - 1] - sorted_ts[0]) // 86400
+
+        # Sort by fastest (lowest days)
+        return dict(sorted(velocity.items(), key=lambda x: x[1]))
+
+
+class TheComeback(Accumulator):
+    """artists with a gap of at least gap_days days between plays"""
+
+    def __init__(self, gap_days: int = 365, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.gap_days = gap_days
+        self.artist_timestamps = defaultdict(list)
+
+    def add(self, item, track):
+        self.artist_timestamps[item['artistName']].append(item['ts'])
+
+    def result(self):
+        comebacks = {}
+        for artist, timestamps in self.artist_timestamps.items():
+            if len(timestamps) < 2:
+                continue
+
+            sorted_ts = sorted(timestamps)
+            max_gap = max((sorted_ts[i] - sorted_ts[i - 1]) // 86400 for i in range(1, len(sorted_ts)))
+            if max_gap >= self.gap_days:
+                comebacks[artist] = max_gap
+
+        return _ranked(comebacks, self.top_k)
+
+
+class ClockworkArtists(Accumulator):
+    """artists played mostly (>= 70%) in one 4-hour window"""
+
+    def __init__(self):
+        self.artist_windows = defaultdict(partial(defaultdict, int))
+        self.artist_total = defaultdict(int)
+
+    def add(self, item, track):
+        artist = item['artistName']
+        # Define windows: 0-4, 4-8, 8-12, 12-16, 16-20, 20-24
+        self.artist_windows[artist][item['hour'] // 4] += 1
+        self.artist_total[artist] += 1
+
+    def result(self):
+        clockwork = {}
+        for artist, total in self.artist_total.items():
+            if total < 50:  # Minimum plays
+                continue
+
+            for window, count in self.artist_windows[artist].items():
+                if count / total >= 0.7:
+                    window_start = window * 4
+                    clockwork[artist] = f"{window_start:02d}:00-{window_start+4:02d}:00 ({int(count/total*100)}%)"
+
+        return clockwork
+
+
+class SessionAnalysis(_SessionAccumulator):
+    """average session length in minutes and tracks per session"""
+    # sessions break on the time between the ends of two plays
+    from_start = False
+
+    def __init__(self, session_break_min: int = 20):
+        super().__init__(session_break_min)
+
+    def result(self):
+        if not len(self.sessions):
+            return (0.0, 0.0)
+
+        first, last = self.sessions[:, 0], self.sessions[:, 1] - 1
+        durations = ((self.table.end_time[last] - self.table.end_time[first]) / 60).tolist()
+        tracks = (self.sessions[:, 1] - self.sessions[:, 0]).tolist()
+        return sum(durations) / len(durations), sum(tracks) / len(tracks)
+
+
+class SkiplessAlbums(Accumulator):
+    """albums with the lowest skip rate (min_plays plays)"""
+
+    def __init__(self, min_plays: int = 50):
+        self.min_plays = min_plays
+        self.plays = defaultdict(int)
+        self.skips = defaultdict(int)
+
+    def add(self, item, track):
+        album = item['albumName']
+        if not album:
+            return
+
+        self.plays[album] += 1
+        if item['skipped']:
+            self.skips[album] += 1
+
+    def result(self):
+        results = {}
+        for album, plays in self.plays.items():
+            if plays >= self.min_plays:
+                results[album] = (self.skips[album] / plays) * 100
+
+        # Sort by lowest skip rate
+        return dict(sorted(results.items(), key=lambda x: x[1]))
+
+
+class SamplerVsCompletionist(Accumulator):
+    """unique tracks / plays for artists with min_plays plays"""
+
+    def __init__(self, min_plays: int = 50, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.min_plays = min_plays
+        self.plays = defaultdict(int)
+        self.tracks = defaultdict(set)
+
+    def add(self, item, track):
+        artist = item['artistName']
+        self.plays[artist] += 1
+        self.tracks[artist].add(item['trackName'])
+
+    def result(self):
+        ratios = {}
+        for artist, plays in self.plays.items():
+            if plays >= self.min_plays:
+                ratios[artist] = len(self.tracks[artist]) / plays
+
+        return _ranked(ratios, self.top_k)
+
+
+class CommuteHeroes(_ArtistCounter):
+    """artists during commute hours (Mon-Fri, 7-9 & 17-19)"""
+
+    def mask(self, table):
+        hour = table.calendar['hour']
+        return (table.calendar['weekday'] < 5) & (((7 <= hour) & (hour < 9)) | ((17 <= hour) & (hour < 19)))
+
+
+class MarathonTracks(_TrackCounter):
+    """tracks played for more than 5 minutes"""
+    _LIMIT = 5 * 60 * 1000
+
+    def mask(self, table):
+        return table.ms_played > self._LIMIT
+
+
+class OneWeekWonders(Accumulator):
+    """artists with > 50 plays in one week but < 10 in all others"""
+
+    def __init__(self):
+        self.artist_weekly = defaultdict(partial(defaultdict, int))
+        self._weeks = {}
+
+    def _week(self, day: int) -> str:
+        week = self._weeks.get(day)
+        if week is None:
+            # ISO Year and Week
+            year, week_no, _ = _date(day).isocalendar()
+            week = self._weeks[day] = f"{year}-W{week_no:02d}"
+        return week
+
+    def add(self, item, track):
+        self.artist_weekly[item['artistName']][self._week(item['date'])] += 1
+
+    def result(self):
+        wonders = {}
+        for artist, weeks in self.artist_weekly.items():
+            max_week, max_plays = max(weeks.items(), key=lambda x: x[1])
+
+            if max_plays > 50:
+                other_plays = sum(count for w, count in weeks.items() if w != max_week)
+                if other_plays < 10:
+                    wonders[artist] = f"{max_week} ({max_plays} plays)"
+
+        return wonders
+
+
+class SoundOfSilence(Accumulator):
+    """longest gap between two plays"""
+    ordered = True
+
+    def __init__(self):
+        self.count = 0
+        self.prev = None
+        self.prev_item = None
+        self.max_gap = 0
+        self.gap_items = None
+
+    def add(self, item, track):
+        ts = item['ts']
+        self.count += 1
+        # endTime is already the end of the track
+        if self.prev is not None and ts - self.prev > self.max_gap:
+            self.max_gap = ts - self.prev
+            self.gap_items = (self.prev_item, item)
+        self.prev, self.prev_item = ts, item
+
+    def result(self):
+        if not self.count:
+            return ("None", "None", 0)
+        if self.gap_items is None:
+            return ("None", "None", 0)
+
+        gap_start, gap_end = (_datetime(i['ts']) for i in self.gap_items)
+        return (str(gap_start), str(gap_end), timedelta(seconds=self.max_gap).days)
+
+
+class CalendarHeatmapData(Accumulator):
+    """year x month matrix of plays"""
+    MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+    def __init__(self):
+        self.years = defaultdict(partial(list, (0,) * 12))
+
+    def add(self, item, track):
+        self.years[item['year']][item['month'] - 1] += 1
+
+    def result(self):
+        years = sorted(self.years)
+        # Matrix: Rows = Years, Cols = Months
+        return [list(self.years[y]) for y in years], years, list(self.MONTHS)
+
+
+class PickyGridData(Accumulator):
+    """7x24 matrix of skip percentages"""
+
+    def __init__(self):
+        # 7 rows (Mon-Sun), 24 columns (0-23 hours)
+        self.plays = [[0 for _ in range(24)] for _ in range(7)]
+        self.skips = [[0 for _ in range(24)] for _ in range(7)]
+
+    def add(self, item, track):
+        day = item['weekday']
+        hour = item['hour']
+        self.plays[day][hour] += 1
+        if item['skipped']:
+            self.skips[day][hour] += 1
+
+    def result(self):
+        matrix = [[0.0 for _ in range(24)] for _ in range(7)]
+        for d in range(7):
+            for h in range(24):
+                if self.plays[d][h] > 0:
+                    matrix[d][h] = (self.skips[d][h] / self.plays[d][h]) * 100
+
+        return matrix
+
+
+class DeviceHabitsData(Accumulator):
+    """platform x hour matrix of plays for the top 10 platforms"""
+
+    def __init__(self):
+        self.platform_counts = defaultdict(int)
+        self.platform_hours = defaultdict(partial(list, (0,) * 24))
+
+    def add(self, item, track):
+        self.platform_counts[item['platform']] += 1
+        self.platform_hours[item['platform']][item['hour']] += 1
+
+    def result(self):
+        # Limit to top 10 platforms to keep heatmap readable if there are many
+        top_platforms = list(_ranked(self.platform_counts, 10))
+        # Matrix: Rows = Platforms, Cols = Hours
+        return [list(self.platform_hours[p]) for p in top_platforms], top_platforms
+
+
+class ArtistErasData(Accumulator):
+    """top artists x month matrix of plays"""
+
+    def __init__(self, top_n: int = 20, normalize: bool = True):
+        self.top_n = top_n
+        self.normalize = normalize
+        self.artist_counts = defaultdict(int)
+        self.monthly = defaultdict(int)
+        self.first = self.last = None
+
+    def add(self, item, track):
+        end = item['ts']
+        self.artist_counts[item['artistName']] += 1
+        self.monthly[(item['artistName'], item['year'], item['month'])] += 1
+        if self.first is None or end < self.first:
+            self.first = end
+        if self.last is None or end > self.last:
+            self.last = end
+
+    def result(self):
+        if self.first is None:
+            return [], [], []
+        top_artists = list(_ranked(self.artist_counts, self.top_n))
+
+        # Get time range (Year-Month)
+        start_date = _datetime(self.first)
+        end_date = _datetime(self.last)
+
+        # Generate month labels
+        months = []
+        curr = start_date.replace(day=1)
+        while curr <= end_date:
+            months.append((curr.year, curr.month))
+            if curr.month == 12:
+                curr = curr.replace(year=curr.year+1, month=1)
+            else:
+                curr = curr.replace(month=curr.month+1)
+        time_labels = [f"{y:04d}-{m:02d}" for y, m in months]
+
+        # Matrix: Rows = Artists, Cols = Months
+        matrix = [[float(self.monthly.get((a, y, m), 0)) for y, m in months] for a in top_artists]
+
+        # Normalize per artist (row-wise)
+        if self.normalize:
+            for row in matrix:
+                row_max = max(row)
+                if row_max > 0:
+                    for j in range(len(row)):
+                        row[j] = row[j] / row_max
+
+        return matrix, top_artists, time_labels
+
+
+class ControlFreakData(Accumulator):
+    """active (user initiated) vs passive listening and the most clicked artist"""
+
+    def __init__(self):
+        self.total_count = 0
+        self.active_count = 0
+        self.artist_clicks = defaultdict(int)
+
+    def add(self, item, track):
+        self.total_count += 1
+        if item['reasonStart'] in ACTIVE_REASONS:
+            self.active_count += 1
+            self.artist_clicks[item['artistName']] += 1
+
+    def result(self):
+        if self.total_count == 0:
+            return {'active': 0.0, 'passive': 0.0}, ('None', 0)
+
+        active_pct = (self.active_count / self.total_count) * 100
+        most_clicked = list(_ranked(self.artist_clicks).items())
+        top_click = most_clicked[0] if most_clicked else ('None', 0)
+
+        return {'active': active_pct, 'passive': 100 - active_pct}, top_click
+
+
+class ShuffleParadoxData(Accumulator):
+    """skip rates with shuffle on vs off"""
+
+    def __init__(self):
+        self.plays = {True: 0, False: 0}
+        self.skips = {True: 0, False: 0}
+
+    def add(self, item, track):
+        is_shuffle = bool(item.get('shuffle', False))
+        self.plays[is_shuffle] += 1
+        if item['skipped']:
+            self.skips[is_shuffle] += 1
+
+    def result(self):
+        rates = {s: (self.skips[s] / self.plays[s] * 100) if self.plays[s] > 0 else 0.0 for s in (True, False)}
+        return {'shuffle_skip_rate': rates[True], 'normal_skip_rate': rates[False]}
+
+
+class NaturalDeathData(Accumulator):
+    """natural ('trackdone') vs user ended plays and the most respected artists"""
+
+    def __init__(self, min_plays: int = 50):
+        self.min_plays = min_plays
+        self.total_ends = 0
+        self.natural_ends = 0
+        self.artist_total = defaultdict(int)
+        self.artist_finished = defaultdict(int)
+
+    def add(self, item, track):
+        artist = item['artistName']
+        self.total_ends += 1
+        self.artist_total[artist] += 1
+        if item['reasonEnd'] == 'trackdone':
+            self.natural_ends += 1
+            self.artist_finished[artist] += 1
+
+    def result(self):
+        if self.total_ends == 0:
+            return {'natural': 0.0, 'killed': 0.0}, []
+
+        natural_pct = (self.natural_ends / self.total_ends) * 100
+
+        # Calculate respect score for artists
+        respect_scores = []
+        for artist, total in self.artist_total.items():
+            if total >= self.min_plays:
+                respect_scores.append((artist, (self.artist_finished[artist] / total) * 100))
+
+        # Sort by highest respect score
+        top_respected = sorted(respect_scores, key=lambda x: x[1], reverse=True)[:10]
+
+        return {'natural': natural_pct, 'killed': 100 - natural_pct}, top_respected
+
+
+class ActiveListeningHeatmapData(Accumulator):
+    """7x24 matrix of active starts"""
+
+    def __init__(self):
+        # 7 rows (Mon-Sun), 24 columns (0-23 hours)
+        self.matrix = [[0 for _ in range(24)] for _ in range(7)]
+
+    def add(self, item, track):
+        if item['reasonStart'] in ACTIVE_REASONS:
+            self.matrix[item['weekday']][item['hour']] += 1
+
+    def result(self):
+        return self.matrix
+
+
+class ActiveListeningTrendData(Accumulator):
+    """percentage of active starts per year"""
+
+    def __init__(self):
+        self.total = defaultdict(int)
+        self.active = defaultdict(int)
+
+    def add(self, item, track):
+        year = item['year']
+        self.total[year] += 1
+        if item['reasonStart'] in ACTIVE_REASONS:
+            self.active[year] += 1
+
+    def result(self):
+        trends = {}
+        for year, total in self.total.items():
+            if total > 0:
+                trends[year] = (self.active[year] / total) * 100
+
+        return dict(sorted(trends.items()))
+
+
+def _new_traits() -> dict:
+    return {'plays': 0, 'skips': 0, 'unique_tracks': set(), 'night_plays': 0, 'weekend_plays': 0, 'active_starts': 0}
+
+
+class ArtistTraits(Accumulator):
+    """personality traits of the top_n artists"""
+    _ACTIVE = {'clickrow', 'playbtn', 'appload', 'remote'}
+
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        self.traits = defaultdict(_new_traits)
+
+    def add(self, item, track):
+        t = self.traits[item['artistName']]
+        t['plays'] += 1
+        if item['skipped']:
+            t['skips'] += 1
+        t['unique_tracks'].add(item['trackName'])
+
+        # Night (6pm - 6am)
+        if item['hour'] < 6 or item['hour'] >= 18:
+            t['night_plays'] += 1
+
+        # Weekend (Sat=5, Sun=6)
+        if item['weekday'] >= 5:
+            t['weekend_plays'] += 1
+
+        # Active Start
+        if item['reasonStart'] in self._ACTIVE:
+            t['active_starts'] += 1
+
+    def result(self):
+        top_artists = list(_ranked({a: t['plays'] for a, t in self.traits.items()}, self.top_n))
+
+        # Normalize to 0-1 scale
+        result = {}
+        for artist in top_artists:
+            data = self.traits[artist]
+            total = data['plays']
+
+            result[artist] = [
+                1 - (data['skips'] / total),                # Loyalty
+                len(data['unique_tracks']) / total,         # Discovery (approx)
+                data['night_plays'] / total,                # Night Owl
+                data['weekend_plays'] / total,              # Weekend Warrior
+                data['active_starts'] / total               # Active Choice
+            ]
+
+        return result
+
+
+class LongestPlayedTracks(Accumulator):
+    """listening time per track"""
+    keyed = True
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.times = defaultdict(int)
+
+    def add(self, item, track):
+        self.times[track] += item['ms']
+
+    def result(self):
+        return {track: timedelta(milliseconds=ms) for track, ms in _ranked(self.times, self.top_k).items()}
+
+
+class NightShiftArtists(_ArtistCounter):
+    """artists between 2 AM and 5 AM"""
+
+    def mask(self, table):
+        return (2 <= table.calendar['hour']) & (table.calendar['hour'] < 5)
+
+
+class NewYearsTransitions(Accumulator):
+    """last song of each year and first song of the next"""
+    ordered = True
+
+    def __init__(self):
+        self.first = {}
+        self.last = {}
+
+    def add(self, item, track):
+        year = item['year']
+        if year not in self.first:
+            self.first[year] = item
+        self.last[year] = item
+
+    def result(self):
+        def describe(song):
+            return f"{song['artistName']} - {song['trackName']} ({_datetime(song['ts']):%Y-%m-%d %H:%M})"
+
+        years = sorted(self.first)
+        return {years[i]: (describe(self.last[years[i]]), describe(self.first[years[i + 1]]))
+                for i in range(len(years) - 1)}
+
+
+class ConsistencyKing(Accumulator):
+    """tracks played on the most unique dates"""
+    keyed = True
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.track_dates = defaultdict(set)
+
+    def add(self, item, track):
+        self.track_dates[track].add(item['date'])
+
+    def result(self):
+        return _ranked({k: len(v) for k, v in self.track_dates.items()}, self.top_k)
+
+
+class AlphabetChallenge(PlayCounts):
+    """most played track for each letter A-Z"""
+
+    def result(self):
+        best_of_letter = {}
+        for track, count in self.counts.items():
+            char = track.upper()[:1]
+            if char in best_of_letter and best_of_letter[char][1] >= count:
+                continue
+            best_of_letter[char] = (track, count)
+
+        return {char: best_of_letter[char] for char in ALPHABET if char in best_of_letter}
+
+
+class ObsessionScore(Accumulator):
+    """plays / unique days per track with more than 10 plays"""
+    keyed = True
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.plays = defaultdict(int)
+        self.days = defaultdict(set)
+
+    def add(self, item, track):
+        self.plays[track] += 1
+        self.days[track].add(item['date'])
+
+    def result(self):
+        scores = {}
+        for track, plays in self.plays.items():
+            if plays > 10:  # Minimum plays to qualify
+                scores[track] = plays / len(self.days[track])
+
+        return _ranked(scores, self.top_k)
+
+
+class EarlyBirdArtists(_ArtistCounter):
+    """artists between 5 AM and 9 AM"""
+
+    def mask(self, table):
+        return (5 <= table.calendar['hour']) & (table.calendar['hour'] < 9)
+
+
+class NineToFiveArtists(_ArtistCounter):
+    """artists Mon-Fri, 9 AM - 5 PM"""
+
+    def mask(self, table):
+        hour = table.calendar['hour']
+        return (table.calendar['weekday'] <= 4) & (9 <= hour) & (hour < 17)
+
+
+class PartyAnimalTracks(_TrackCounter):
+    """tracks Fri/Sat nights (10 PM - 4 AM)"""
+
+    def mask(self, table):
+        hour = table.calendar['hour']
+        wday = table.calendar['weekday']
+        return (((wday == 4) | (wday == 5)) & (hour >= 22)) | (((wday == 5) | (wday == 6)) & (hour < 4))
+
+
+class SundayScariesTracks(_TrackCounter):
+    """tracks Sunday 6 PM - Midnight"""
+
+    def mask(self, table):
+        return (table.calendar['weekday'] == 6) & (18 <= table.calendar['hour']) & (table.calendar['hour'] <= 23)
+
+
+class UnskippableStreak(Accumulator):
+    """longest sequence of songs played without skipping"""
+    ordered = True
+
+    def __init__(self):
+        self.max_streak = 0
+        self.current_streak = 0
+        self.streak_start = None
+        self.best_start = None
+        self.best_end = None
+        self.last = None
+
+    def add(self, item, track):
+        self.last = item['ts']
+        if not _was_skipped(item):
+            if self.current_streak == 0:
+                self.streak_start = item['ts']
+            self.current_streak += 1
+        else:
+            if self.current_streak > self.max_streak:
+                self.max_streak = self.current_streak
+                self.best_start = self.streak_start
+                self.best_end = item['ts']
+            self.current_streak = 0
+
+    def result(self):
+        max_streak, best_start, best_end = self.max_streak, self.best_start, self.best_end
+        # Check last streak
+        if self.current_streak > max_streak:
+            max_streak, best_start, best_end = self.current_streak, self.streak_start, self.last
+
+        start_str = f"{_datetime(best_start):%Y-%m-%d %H:%M}" if best_start is not None else "-"
+        end_str = f"{_datetime(best_end):%Y-%m-%d %H:%M}" if best_end is not None else "-"
+
+        return max_streak, start_str, end_str
+
+
+class ArtistHopper(Accumulator):
+    """average consecutive plays per artist switch"""
+    ordered = True
+
+    def __init__(self):
+        self.plays = 0
+        self.streaks = 0
+        self.last_artist = None
+
+    def add(self, item, track):
+        artist = item['artistName']
+        if not self.plays or artist != self.last_artist:
+            self.streaks += 1
+            self.last_artist = artist
+        self.plays += 1
+
+    def result(self):
+        return self.plays / self.streaks if self.streaks else 0.0
+
+
+class DiscoveryPeak(DiscoveryRate):
+    """month with the most new artists"""
+
+    def result(self):
+        if not self.counts:
+            return ("-", 0)
+
+        return max(self.counts.items(), key=lambda x: x[1])
+
+
+class ComfortZone(LongestPlayedArtist):
+    """share of listening time on the top 10 artists"""
+
+    def __init__(self):
+        super().__init__(top_k=10)
+
+    def result(self):
+        total_time = timedelta(milliseconds=sum(self.times.values()))
+        if total_time.total_seconds() == 0:
+            return 0.0, []
+
+        top_10 = list(super().result().items())
+        top_10_time = sum((t for a, t in top_10), timedelta())
+
+        return (top_10_time.total_seconds() / total_time.total_seconds()) * 100, top_10
+
+
+class SingleDayRecord(Accumulator):
+    """most time spent on a single artist in one day"""
+
+    def __init__(self):
+        self.day_artist_time = defaultdict(int)
+
+    def add(self, item, track):
+        self.day_artist_time[(item['date'], item['artistName'])] += item['ms']
+
+    def result(self):
+        if not self.day_artist_time:
+            return ("-", "-", timedelta(0))
+
+        (best_date, best_artist), best_time = max(self.day_artist_time.items(), key=lambda x: x[1])
+        return best_artist, _date(best_date).isoformat(), timedelta(milliseconds=best_time)
+
+
+class ManualLaborer(_TrackCounter):
+    """tracks started by clicking"""
+
+    def mask(self, table):
+        # reasonStart might vary by platform/year, but 'clickrow' is standard for manual selection
+        return _equals(table, 'reason_start', 'clickrow')
+
+
+class ShuffleRoulette(_TrackCounter):
+    """tracks played with shuffle on"""
+
+    def mask(self, table):
+        return table.shuffle == 1
+
+
+class SessionStarter(_SessionAccumulator):
+    """tracks that most frequently start a session"""
+
+    def __init__(self, gap_minutes: int = 30, top_k: Optional[int] = None):
+        super().__init__(gap_minutes)
+        self.top_k = top_k
+
+    def rows(self) -> np.ndarray:
+        return self.sessions[:, 0]
+
+    def result(self):
+        counts = defaultdict(int)
+        if self.table is not None:
+            for track in self._tracks(self.rows()):
+                counts[track] += 1
+        return _ranked(counts, self.top_k)
+
+
+class SessionCloser(SessionStarter):
+    """tracks that most frequently end a session"""
+
+    def rows(self):
+        return self.sessions[:, 1] - 1
+
+
+class QuickFix(_SessionAccumulator):
+    """number of single song sessions"""
+
+    def result(self):
+        return int(np.count_nonzero(self.sessions[:, 1] - self.sessions[:, 0] == 1))
+
+
+class SkippersRemorse(Accumulator):
+    """tracks skipped more than 50% of the time, but played more than 20 times"""
+    keyed = True
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.plays = defaultdict(int)
+        self.skips = defaultdict(int)
+
+    def add(self, item, track):
+        self.plays[track] += 1
+        if _was_skipped(item):
+            self.skips[track] += 1
+
+    def result(self):
+        results = {}
+        for track, plays in self.plays.items():
+            if plays > 20:
+                rate = (self.skips[track] / plays) * 100
+                if rate > 50:
+                    results[track] = rate
+
+        return _ranked(results, self.top_k)
+
+
+class _KeywordShare(Accumulator):
+    """percentage and count of plays whose `text` contains any of `keywords`"""
+    keywords: list[str] = []
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def text(self, item: Play) -> str:
+        return item['trackName']
+
+    def add(self, item, track):
+        self.total += 1
+        name = self.text(item).lower()
+        if any(k in name for k in self.keywords):
+            self.count += 1
+
+    def result(self):
+        if self.total == 0:
+            return 0.0, 0
+        return (self.count / self.total) * 100, self.count
+
+
+class RemixJunkie(_KeywordShare):
+    """share of remixes/edits"""
+    keywords = ['remix', ' mix', ' edit', 'club', 'vip', 'dub']
+
+
+class LiveFanatic(_KeywordShare):
+    """share of live/concert tracks"""
+    keywords = ['live', 'concert', 'performance', 'session', 'tour']
+
+    def text(self, item):
+        # Check both track and album
+        return item['trackName'] + " " + item['albumName']
+
+
+class ShortKing(_TrackCounter):
+    """finished tracks under 2 minutes"""
+
+    def mask(self, table):
+        # 2 mins = 120 seconds
+        return (table.ms_played < 120 * 1000) & _equals(table, 'reason_end', 'trackdone')
+
+
+class EpicSaga(_TrackCounter):
+    """finished tracks over 7 minutes"""
+
+    def mask(self, table):
+        # 7 mins = 420 seconds
+        return (table.ms_played > 420 * 1000) & _equals(table, 'reason_end', 'trackdone')
+
+
+class Collaborator(_TrackCounter):
+    """tracks featuring other artists"""
+    keywords = ['feat.', 'ft.', 'with ', 'featuring']
+
+    def consume(self, table):
+        # whether a play counts only depends on its artist and track, so the distinct pairs are checked after counting
+        self.counts = defaultdict(int)
+        for (artist, track), count in count_by(table, 'artist_track').items():
+            if any(k in (track + " " + artist).lower() for k in self.keywords):
+                self.counts[f"{artist} - {track}"] += count
+
+
+class AlphabetArtists(PlayCountsByArtist):
+    """most played artist for each letter A-Z"""
+
+    def result(self):
+        letter_best = {}
+        for artist, count in self.counts.items():
+            char = artist.upper()[:1]
+            if char in letter_best and letter_best[char][1] >= count:
+                continue
+            letter_best[char] = (artist, count)
+
+        return {char: letter_best[char] for char in ALPHABET if char in letter_best}
+
+
+class SpellingBee(Accumulator):
+    """longest artist name and track title"""
+
+    def __init__(self):
+        self.max_artist = ""
+        self.max_track = ""
+
+    def add(self, item, track):
+        if len(item['artistName']) > len(self.max_artist):
+            self.max_artist = item['artistName']
+        if len(item['trackName']) > len(self.max_track):
+            self.max_track = item['trackName']
+
+    def result(self):
+        return self.max_artist, len(self.max_artist), self.max_track, len(self.max_track)
+
+
+class SameNameGame(Accumulator):
+    """track titles played from the most different artists"""
+    _GENERIC = {'intro', 'untitled', 'track 1', 'outro'}
+
+    def __init__(self, top_k: Optional[int] = None):
+        self.top_k = top_k
+        self.title_artists = defaultdict(set)
+
+    def add(self, item, track):
+        # Normalize title slightly to catch "Home" vs "Home "
+        title = item['trackName'].strip()
+        # Ignore generic titles like "Intro", "Untitled"
+        if title.lower() not in self._GENERIC:
+            self.title_artists[title].add(item['artistName'])
+
+    def result(self):
+        return _ranked({t: len(a) for t, a in self.title_artists.items() if len(a) > 1}, self.top_k)
+
+
+class MidnightClub(_ArtistCounter):
+    """artists between Midnight and 1 AM"""
+
+    def mask(self, table):
+        return table.calendar['hour'] == 0
+
+
+class LunchBreak(_ArtistCounter):
+    """artists between 12 PM and 2 PM"""
+
+    def mask(self, table):
+        return (12 <= table.calendar['hour']) & (table.calendar['hour'] < 14)
+
+
+class MondayBlues(_TrackCounter):
+    """tracks on Mondays"""
+
+    def mask(self, table):
+        return table.calendar['weekday'] == 0  # Monday is 0
+
+
+class HumpDayHero(_TrackCounter):
+    """tracks on Wednesdays"""
+
+    def mask(self, table):
+        return table.calendar['weekday'] == 2  # Wednesday is 2
+
+
+class QuarterlyReview(Accumulator):
+    """top track of each quarter"""
+    keyed = True
+
+    def __init__(self):
+        self.q_counts = {q: defaultdict(int) for q in range(1, 5)}
+
+    def add(self, item, track):
+        quarter = (item['month'] - 1) // 3 + 1
+        self.q_counts[quarter][track] += 1
+
+    def result(self):
+        results = {}
+        for q, counts in self.q_counts.items():
+            results[q] = max(counts.items(), key=lambda x: x[1]) if counts else ("-", 0)
+
+        return results
+
+
+class AlbumPurist(Accumulator):
+    """longest streak of unique songs from one album in a row"""
+    ordered = True
+
+    def __init__(self):
+        self.max_streak = 0
+        self.best_album = "-"
+        self.best_artist = "-"
+        self.current_album = None
+        self.current_artist = None
+        self.current_tracks = set()
+
+    def add(self, item, track):
+        album = item['albumName']
+        artist = item['artistName']
+        title = item['trackName']
+
+        # Ignore empty albums or singles (often album name is same as track name)
+        if not album or album == title:
+            self.current_album = None
+            self.current_tracks = set()
+            return
+
+        if album == self.current_album and artist == self.current_artist:
+            self.current_tracks.add(title)
+        else:
+            self._close()
+            # Start new streak
+            self.current_album = album
+            self.current_artist = artist
+            self.current_tracks = {title}
+
+    def _close(self):
+        if len(self.current_tracks) > self.max_streak:
+            self.max_streak = len(self.current_tracks)
+            self.best_album = self.current_album
+            self.best_artist = self.current_artist
+
+    def result(self):
+        self._close()
+        return self.max_streak, self.best_album, self.best_artist
+
+
+class InstantSkips(_TrackCounter):
+    """tracks skipped in less than 1 second"""
+
+    def mask(self, table):
+        return (table.skipped == 1) & (table.ms_played < 1000)
+
+
+class FullSongStats(Accumulator):
+    """
+    per track rows for the CSV export;
+    with compact=True the result is the SongTable itself, to be written a chunk at a time
+    """
+    columnar = True
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.songs = None
+
+    def consume(self, table):
+        # everything is gathered per artist/track id, in the order the tracks first appear
+        ids, values = table.codes('artist_track')
+        size = len(values)
+        first = first_rows(ids, size)
+        seen = np.flatnonzero(first < len(ids))
+        seen = seen[np.argsort(first[seen], kind='stable')]
+
+        first_played = np.full(size, np.iinfo(np.int64).max)
+        np.minimum.at(first_played, ids, table.end_time)
+        last_played = np.full(size, np.iinfo(np.int64).min)
+        np.maximum.at(last_played, ids, table.end_time)
+
+        skipped = table.skipped == 1
+        active = [code for code, reason in enumerate(table.vocab['reason_start']) if reason in ACTIVE_REASONS]
+        rows = first[seen]
+        self.songs = SongTable(
+            table.artist[rows], table.track[rows], table.vocab, first_played[seen], last_played[seen],
+            np.bincount(ids, minlength=size)[seen],
+            np.bincount(ids[skipped], minlength=size)[seen],
+            np.bincount(ids[skipped & (table.ms_played < 1000)], minlength=size)[seen],
+            np.bincount(ids[np.isin(table.reason_start, active)], minlength=size)[seen],
+        )
+
+    def result(self):
+        return self.songs if self.compact else self.songs.records()
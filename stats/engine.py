@@ -0,0 +1,173 @@
+from datetime import date
+from time import struct_time
+from itertools import islice, repeat
+from typing import Any, Iterator, Optional, Union
+
+from filemgr.table import HistoryTable
+from filemgr.timestamps import to_epoch
+from filemgr.types import History, Play
+from instrumentation import enabled, phase
+
+# (start, end) of the plays to include by their end time, both inclusive and either None for no bound;
+# bounds are struct_time, date/datetime or epoch seconds
+Window = Optional[tuple[Optional[Union[struct_time, date, int]], Optional[Union[struct_time, date, int]]]]
+
+# plays made at a time while profiling, and handed to every accumulator in turn
+_PROFILED_CHUNK = 16384
+
+
+class Accumulator:
+    """
+    A single statistic computed in one pass over the streaming history.
+
+    Subclasses implement `add`, which is called once per play, and `result`,
+    which turns the collected state into the value the matching `stats` function returns.
+    Accumulators that depend on the order of plays set `ordered = True` and are fed the history sorted by endTime.
+
+    Plays are Play dicts: times come as epoch seconds, milliseconds and precomputed calendar fields,
+    and are only turned into time or datetime objects for results.
+    The "Artist - Track" key many statistics need is looked up per play by the engine (one string per distinct
+    artist/track pair, see HistoryTable.labels) and passed along as `track` (set `keyed = True` to receive it).
+
+    Accumulators that work on whole columns instead set `columnar = True` and implement `consume`,
+    which is called once with the HistoryTable (time sorted, if `ordered`) rather than `add` for every play.
+    """
+    ordered = False
+    keyed = False
+    columnar = False
+
+    def add(self, item: Play, track: str) -> None:
+        raise NotImplementedError
+
+    def consume(self, table: HistoryTable) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+def _as_table(streaming_history: Union[HistoryTable, list[History]]) -> HistoryTable:
+    if isinstance(streaming_history, HistoryTable):
+        return streaming_history
+    return HistoryTable.from_records(streaming_history)
+
+
+def restrict(streaming_history: Union[HistoryTable, list[History]], window: Window = None) -> HistoryTable:
+    """
+    The streaming history as a table, cut down to the plays within `window` if one is given.
+    """
+    table = _as_table(streaming_history)
+    if window is None:
+        return table
+
+    start, end = (None if bound is None else to_epoch(bound) for bound in window)
+    return table.sort_by_time().between(start, end)
+
+
+def _feed(table: HistoryTable, accumulators: list[Accumulator]) -> None:
+    if not accumulators:
+        return
+
+    adders = [a.add for a in accumulators]
+    if any(a.keyed for a in accumulators):
+        # one string per distinct artist/track pair, shared by all of its plays
+        tracks = _labelled(table, 'artist_track')
+    else:
+        tracks = repeat(None)
+
+    for item, track in zip(table.plays(), tracks):
+        for add in adders:
+            add(item, track)
+
+
+def _labelled(table: HistoryTable, name: str) -> Iterator[str]:
+    # display names of the entity of every play, in chunks so the ids never become one big list
+    ids = table.codes(name)[0]
+    labels = table.labels(name)
+    for start in range(0, len(ids), 65536):
+        yield from map(labels.__getitem__, ids[start:start + 65536].tolist())
+
+
+def scan(streaming_history: Union[HistoryTable, list[History]], *accumulators: Accumulator,
+         window: Window = None) -> list:
+    """
+    Feeds every accumulator from a single scan of the streaming history (or the part of it within `window`)
+    and returns their results in the order the accumulators were given.
+
+    The history is only sorted (once, for all of them) if an accumulator needs time order
+    and the history is not already in time order.
+
+    While profiling (see instrumentation) the plays are handed to one accumulator at a time instead,
+    a chunk at a time, so the time of every statistic can be told apart.
+    """
+    with phase('stats.window'):
+        table = restrict(streaming_history, window)
+        in_order = table.sort_by_time() if any(a.ordered for a in accumulators) else table
+    ordered = [a for a in accumulators if a.ordered and not a.columnar]
+    unordered = [a for a in accumulators if not a.ordered and not a.columnar]
+    if enabled():
+        return _profiled_scan(table, in_order, unordered, ordered, accumulators)
+
+    for a in accumulators:
+        if a.columnar:
+            a.consume(in_order if a.ordered else table)
+    if in_order is not table:
+        _feed(table, unordered)
+        _feed(in_order, ordered)
+    else:
+        _feed(table, unordered + ordered)
+
+    return [a.result() for a in accumulators]
+
+
+def _profiled_scan(table: HistoryTable, in_order: HistoryTable, unordered: list[Accumulator],
+                   ordered: list[Accumulator], accumulators: tuple[Accumulator, ...]) -> list:
+    # every accumulator's part of the scan is a phase of its own, named after it; its phases add up in the summary
+    def name(a):
+        return f'stats.{type(a).__name__}'
+
+    for a in accumulators:
+        if a.columnar:
+            with phase(name(a)):
+                a.consume(in_order if a.ordered else table)
+
+    scans = [(table, unordered + ordered)] if in_order is table else [(table, unordered), (in_order, ordered)]
+    for source, fed in scans:
+        if not fed:
+            continue
+        tracks = _labelled(source, 'artist_track') if any(a.keyed for a in fed) else repeat(None)
+        plays = zip(source.plays(), tracks)
+        while True:
+            with phase('stats.plays'):
+                chunk = list(islice(plays, _PROFILED_CHUNK))
+            if not chunk:
+                break
+            for a in fed:
+                with phase(name(a)):
+                    add = a.add
+                    for item, track in chunk:
+                        add(item, track)
+
+    results = []
+    for a in accumulators:
+        with phase(name(a)):
+            results.append(a.result())
+    return results
+
+
+def aggregate(streaming_history: Union[HistoryTable, list[History]], accumulator: Accumulator,
+              window: Window = None) -> Any:
+    """
+    Runs a single accumulator over the streaming history (within `window`) and returns its result.
+    """
+    return scan(streaming_history, accumulator, window=window)[0]
+
+
+def compute(streaming_history: Union[HistoryTable, list[History]], window: Window = None,
+            **accumulators: Accumulator) -> dict[str, Any]:
+    """
+    Runs all named accumulators in one pass over the streaming history (within `window`).
+
+    :return: dictionary of the accumulator names to their results
+    """
+    return dict(zip(accumulators, scan(streaming_history, *accumulators.values(), window=window)))
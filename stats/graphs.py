@@ -392,26 +392,31 @@ def plot_artist_radar(data: dict, title: str):
     
     return fig
 
-def create_text_pages(text: str, lines_per_page: int = 60):
+def split_text_pages(text: str, lines_per_page: int = 60) -> list[str]:
     """
-    Converts a long string of text into a list of matplotlib figures,
-    each representing a page of text.
+    Splits a long string of text into the text of its pages.
     """
     lines = text.split('\n')
-    pages = []
-    
-    for i in range(0, len(lines), lines_per_page):
-        chunk = lines[i:i + lines_per_page]
-        page_text = '\n'.join(chunk)
-        
-        fig = plt.figure(figsize=(8.27, 11.69)) # A4 size
-        plt.axis('off')
-        # Use a monospace font to preserve alignment
-        plt.text(0.05, 0.95, page_text, transform=fig.transFigure, 
-                 fontsize=8, family='monospace', verticalalignment='top')
-        pages.append(fig)
-        
-    return pages
+    return ['\n'.join(lines[i:i + lines_per_page]) for i in range(0, len(lines), lines_per_page)]
+
+def plot_text_page(page_text: str):
+    """
+    Lays out the text of one page on an A4 sized figure.
+    """
+    fig = plt.figure(figsize=(8.27, 11.69)) # A4 size
+    plt.axis('off')
+    # Use a monospace font to preserve alignment
+    plt.text(0.05, 0.95, page_text, transform=fig.transFigure, 
+             fontsize=8, family='monospace', verticalalignment='top')
+    return fig
+
+def create_text_pages(text: str, lines_per_page: int = 60):
+    """
+    Converts a long string of text into matplotlib figures,
+    each representing a page of text, plotted one by one as they are iterated.
+    """
+    for page_text in split_text_pages(text, lines_per_page):
+        yield plot_text_page(page_text)
 
 def plot_longest_played_tracks(data: dict, title: str, n: int = 10):
     """
@@ -0,0 +1,30 @@
+from typing import Optional
+
+import numpy as np
+
+from filemgr.table import HistoryTable, first_rows
+
+
+def count_by(table: HistoryTable, name: str, mask: Optional[np.ndarray] = None, labels: bool = False) -> dict:
+    """
+    Number of plays per value of the text column or entity `name` (see HistoryTable.codes), counted on its codes.
+    Only rows where the boolean `mask` is set are counted, if one is given.
+
+    :param labels: key entities by their display names ("Artist - Track", see HistoryTable.labels) instead of
+                   their values; pairs that read the same are counted together
+    :return: dictionary of the values to their counts, in the order the values first appear in the table
+    """
+    codes, values = table.codes(name)
+    if mask is not None:
+        codes = codes[mask]
+
+    counts = np.bincount(codes, minlength=len(values))
+    first = first_rows(codes, len(values))
+    seen = np.flatnonzero(counts)
+    seen = seen[np.argsort(first[seen], kind='stable')]
+
+    keys = table.labels(name) if labels else values
+    result = {}
+    for i, count in zip(seen.tolist(), counts[seen].tolist()):
+        result[keys[i]] = result.get(keys[i], 0) + count
+    return result
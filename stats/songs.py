@@ -0,0 +1,106 @@
+"""
+The per track rows of the song stats export, kept as columns instead of a dict per track, and turned into rows
+a chunk at a time as they are written.
+"""
+from typing import Iterator, Optional
+
+import numpy as np
+
+# the orders rows can be written in: by the play that first reached the track (as the export always was),
+# most played first, most recently played first, or by artist and track name
+SORT_ORDERS = ('first', 'plays', 'recent', 'name')
+FIELDS = ('Artist', 'Track Name', 'Times Played', 'First Played', 'Last Played', 'Skipped', 'Instant Skips',
+          'User Started')
+COUNTS = ('plays', 'skipped', 'instant_skips', 'user_started')
+
+_CHUNK = 65536
+
+
+def format_times(end_time: np.ndarray) -> list[str]:
+    """
+    Epoch seconds as 'YYYY-MM-DD HH:MM:SS' strings (UTC, as written in the export), all at once.
+    """
+    return np.char.replace(np.datetime_as_string(end_time.astype('datetime64[s]')), 'T', ' ').tolist()
+
+
+def _name_ranks(vocab: list[Optional[str]]) -> np.ndarray:
+    # position of every string of a vocabulary among them sorted, missing values (empty in the CSV) first
+    order = sorted(range(len(vocab)), key=lambda code: (vocab[code] is not None, vocab[code] or ''))
+    ranks = np.empty(len(vocab), dtype=np.int64)
+    ranks[order] = np.arange(len(vocab))
+    return ranks
+
+
+class SongTable:
+    """
+    Stats of every track, one entry per artist/track pair in the order the tracks were first played:
+    `artist` and `track` as codes into `vocab`, `first_played` and `last_played` as epoch seconds and the
+    counts of COUNTS, all numpy arrays of the same length.
+    """
+
+    def __init__(self, artist: np.ndarray, track: np.ndarray, vocab: dict[str, list[Optional[str]]],
+                 first_played: np.ndarray, last_played: np.ndarray, plays: np.ndarray, skipped: np.ndarray,
+                 instant_skips: np.ndarray, user_started: np.ndarray):
+        self.artist = artist
+        self.track = track
+        self.vocab = vocab
+        self.first_played = first_played
+        self.last_played = last_played
+        self.plays = plays
+        self.skipped = skipped
+        self.instant_skips = instant_skips
+        self.user_started = user_started
+
+    def __len__(self) -> int:
+        return len(self.plays)
+
+    def order(self, sort: str = 'first') -> np.ndarray:
+        """
+        Entries in the given sort order (see SORT_ORDERS); ties keep the order the tracks were first played in.
+        """
+        if sort == 'first':
+            return np.arange(len(self))
+        if sort == 'plays':
+            return np.argsort(-self.plays, kind='stable')
+        if sort == 'recent':
+            return np.argsort(-self.last_played, kind='stable')
+        if sort == 'name':
+            artists = _name_ranks(self.vocab['artist'])[self.artist]
+            tracks = _name_ranks(self.vocab['track'])[self.track]
+            return np.lexsort((tracks, artists))
+        raise ValueError(f"unknown sort order '{sort}', expected one of {', '.join(SORT_ORDERS)}")
+
+    def chunks(self, sort: str = 'first', size: int = _CHUNK) -> Iterator['SongTable']:
+        """
+        The table in the given sort order, cut into parts of at most `size` entries.
+        """
+        order = self.order(sort)
+        for start in range(0, len(order), size):
+            part = order[start:start + size]
+            yield SongTable(
+                self.artist[part], self.track[part], self.vocab, self.first_played[part],
+                self.last_played[part], *(getattr(self, name)[part] for name in COUNTS)
+            )
+
+    def rows(self, sort: str = 'first', size: int = _CHUNK) -> Iterator[list[tuple]]:
+        """
+        CSV rows (values of FIELDS, times formatted), in lists of at most `size` rows.
+        """
+        artists, tracks = self.vocab['artist'], self.vocab['track']
+        for chunk in self.chunks(sort, size):
+            yield list(zip(
+                [artists[code] for code in chunk.artist.tolist()],
+                [tracks[code] for code in chunk.track.tolist()],
+                chunk.plays.tolist(),
+                format_times(chunk.first_played),
+                format_times(chunk.last_played),
+                chunk.skipped.tolist(),
+                chunk.instant_skips.tolist(),
+                chunk.user_started.tolist(),
+            ))
+
+    def records(self, sort: str = 'first') -> list[dict]:
+        """
+        All rows as dicts of FIELDS, as get_full_song_stats returns them.
+        """
+        return [dict(zip(FIELDS, row)) for rows in self.rows(sort) for row in rows]
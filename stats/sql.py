@@ -0,0 +1,110 @@
+"""
+Heavier statistics as SQL queries over a HistoryDatabase, run from its indexes on disk instead of over the history
+in memory; they return what the functions of the same name in stats.functions return.
+
+Ties are settled as in the in-memory statistics, by the order plays first appear in (rowid order, see
+HistoryDatabase). Rows are fetched as they are iterated, so memory does not grow with the length of the history.
+"""
+import numpy as np
+
+from filemgr.database import HistoryDatabase
+
+from .accumulators import ACTIVE_REASONS, ArtistErasData
+from .engine import Window
+from .songs import SongTable
+
+
+def top_artist_per_month(database: HistoryDatabase, window: Window = None) -> dict[str, tuple[str, int]]:
+    """
+    Finds the most played artist for each month.
+    Returns: {'YYYY-MM': ('Artist Name', play_count), ...}
+    """
+    where, parameters = database.where(window)
+    rows = database.query(f'''
+        WITH counts AS (
+            SELECT month, artist, COUNT(*) AS plays, MIN(rowid) AS first FROM play WHERE {where} GROUP BY month, artist
+        ), ranked AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY month ORDER BY plays DESC, first) AS rank FROM counts
+        )
+        SELECT month, artist.name, plays FROM ranked JOIN artist ON artist.id = ranked.artist
+        WHERE rank = 1 ORDER BY month
+    ''', parameters)
+    return {f'{month // 100:04d}-{month % 100:02d}': (artist, plays) for month, artist, plays in rows}
+
+
+def quarterly_review(database: HistoryDatabase, window: Window = None) -> dict[int, tuple[str, int]]:
+    """
+    Top track for each Quarter (Q1-Q4).
+    """
+    where, parameters = database.where(window)
+    rows = database.query(f'''
+        WITH counts AS (
+            SELECT (month % 100 - 1) / 3 + 1 AS quarter, artist, track, COUNT(*) AS plays, MIN(rowid) AS first
+            FROM play WHERE {where} GROUP BY quarter, artist, track
+        ), labelled AS (
+            -- tracks are told apart by their "Artist - Track" name, as in the in-memory statistic
+            SELECT quarter, COALESCE(artist.name, 'None') || ' - ' || COALESCE(track.name, 'None') AS label,
+                   SUM(plays) AS plays, MIN(first) AS first
+            FROM counts JOIN artist ON artist.id = counts.artist JOIN track ON track.id = counts.track
+            GROUP BY quarter, label
+        ), ranked AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY quarter ORDER BY plays DESC, first) AS rank FROM labelled
+        )
+        SELECT quarter, label, plays FROM ranked WHERE rank = 1
+    ''', parameters)
+    results = {q: ("-", 0) for q in range(1, 5)}
+    results.update((quarter, (label, plays)) for quarter, label, plays in rows)
+    return results
+
+
+def artist_eras_data(database: HistoryDatabase, top_n: int = 20, normalize: bool = True,
+                     window: Window = None) -> tuple[list[list[float]], list[str], list[str]]:
+    """
+    Prepares data for Top Artists vs Month (Eras) heatmap.
+    Returns (matrix, artists, time_labels).
+    If normalize is True, each artist's row is scaled 0-1 based on their peak month.
+    """
+    where, parameters = database.where(window)
+    # the counts of the top artists only, laid out by the in-memory statistic
+    eras = ArtistErasData(top_n, normalize)
+    eras.first, eras.last = next(database.query(f'SELECT MIN(end_time), MAX(end_time) FROM play WHERE {where}',
+                                                parameters))
+    top = f'''
+        SELECT artist, COUNT(*) AS plays, MIN(rowid) AS first FROM play WHERE {where}
+        GROUP BY artist ORDER BY plays DESC, first LIMIT ?
+    '''
+    rows = database.query(f'''
+        WITH top AS ({top})
+        SELECT artist.name, top.plays FROM top JOIN artist ON artist.id = top.artist ORDER BY top.plays DESC, top.first
+    ''', (*parameters, top_n))
+    eras.artist_counts.update(rows)
+    rows = database.query(f'''
+        WITH top AS ({top})
+        SELECT artist.name, play.month, COUNT(*) FROM play JOIN artist ON artist.id = play.artist
+        WHERE {where} AND play.artist IN (SELECT artist FROM top) GROUP BY play.artist, play.month
+    ''', (*parameters, top_n, *parameters))
+    for artist, month, plays in rows:
+        eras.monthly[(artist, month // 100, month % 100)] = plays
+    return eras.result()
+
+
+def get_full_song_stats(database: HistoryDatabase, window: Window = None, compact: bool = False) -> list[dict]:
+    """
+    Aggregates stats for all songs for CSV export.
+    Returns a list of dicts with keys:
+    Artist, Track Name, Times Played, First Played, Last Played, Skipped, Instant Skips, User Started
+    (the SongTable they are made from with compact=True, see stats.songs)
+    """
+    where, parameters = database.where(window)
+    active = ', '.join('?' * len(ACTIVE_REASONS))
+    rows = database.query(f'''
+        SELECT artist, track, MIN(end_time), MAX(end_time), COUNT(*), TOTAL(skipped = 1),
+               TOTAL(skipped = 1 AND ms_played < 1000),
+               TOTAL(reason_start IN (SELECT id FROM reason_start WHERE name IN ({active})))
+        FROM play WHERE {where} GROUP BY artist, track ORDER BY MIN(rowid)
+    ''', (*sorted(ACTIVE_REASONS), *parameters))
+    columns = np.array(list(rows), dtype=np.int64).reshape(-1, 8).T
+    vocab = {column: [name for name, in database.query(f'SELECT name FROM {column} ORDER BY id')]
+             for column in ('artist', 'track')}
+    songs = SongTable(columns[0], columns[1], vocab, *columns[2:])
+    return songs if compact else songs.records()
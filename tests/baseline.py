@@ -0,0 +1,124 @@
+"""
+Results of the statistics as the original stats/functions.py (before the single pass engine) computes them
+for the fixture history in tests/data, which test_baseline holds the engine to.
+
+usage: python tests/baseline.py BASELINE [--fixture]
+
+BASELINE is a checkout of the original code, e.g. made with `git worktree add /tmp/baseline 8335bb4`.
+With --fixture the fixture history is written anew (with benchmarks/synthetic.py) before the results are.
+"""
+import argparse
+import calendar
+import gzip
+import json
+import math
+import os
+import sys
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from time import struct_time
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+FIXTURE = os.path.join(DATA, 'my_spotify_data.zip')
+EXPECTED = os.path.join(DATA, 'baseline.json.gz')
+
+# the statistics taking nothing but the history, each compared as a whole
+STATS = [
+    'history_range', 'play_time', 'play_counts', 'play_counts_by_artist', 'play_counts_by_album',
+    'platform_usage', 'listening_by_hour', 'skipped_ratio', 'location_counts', 'most_skipped_artist',
+    'most_skipped_track', 'longest_played_artist', 'top_artist_per_month', 'listening_by_day_of_week',
+    'discovery_rate', 'seasonal_listening', 'one_hit_wonders', 'day_night_split', 'longest_listening_streak',
+    'true_skip_rate', 'most_consecutive_plays', 'album_loyalty', 'longest_artist_relationship',
+    'forgotten_favorites', 'hourly_heatmap_data', 'most_musical_day', 'weekend_vs_weekday', 'immediate_skips',
+    'variety_score', 'listening_velocity', 'the_comeback', 'clockwork_artists', 'session_analysis',
+    'skipless_albums', 'sampler_vs_completionist', 'commute_heroes', 'marathon_tracks', 'one_week_wonders',
+    'sound_of_silence', 'calendar_heatmap_data', 'picky_grid_data', 'device_habits_data', 'artist_eras_data',
+    'control_freak_data', 'shuffle_paradox_data', 'natural_death_data', 'active_listening_heatmap_data',
+    'active_listening_trend_data', 'get_artist_traits', 'longest_played_tracks', 'night_shift_artists',
+    'new_years_transitions', 'consistency_king', 'alphabet_challenge', 'obsession_score', 'early_bird_artists',
+    'nine_to_five_artists', 'party_animal_tracks', 'sunday_scaries_tracks', 'unskippable_streak', 'artist_hopper',
+    'discovery_peak', 'comfort_zone', 'single_day_record', 'manual_laborer', 'shuffle_roulette', 'session_starter',
+    'session_closer', 'quick_fix', 'skippers_remorse', 'remix_junkie', 'live_fanatic', 'short_king', 'epic_saga',
+    'collaborator', 'alphabet_artists', 'spelling_bee', 'same_name_game', 'midnight_club', 'lunch_break',
+    'monday_blues', 'hump_day_hero', 'quarterly_review', 'album_purist', 'instant_skips', 'get_full_song_stats',
+]
+# artists artist_history_over_time is asked for, the first of play_counts_by_artist
+ARTISTS = 10
+# epoch seconds of the first and last play (inclusive) of the window the statistics are also computed for,
+# 2021-01-01 to the end of 2022-06-30 in UTC
+WINDOW = (1609459200, 1656633599)
+
+
+def plain(value):
+    """
+    A result as JSON would hand it back: times as text (struct_time down to the second), durations in
+    seconds, tuples as lists and keys as strings. Results of both versions are compared in this form.
+    """
+    if isinstance(value, struct_time):
+        return list(value)[:6]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, dict):
+        return {str(plain(key)) if not isinstance(key, str) else key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    if hasattr(value, 'item'):
+        # a numpy scalar
+        return value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return repr(value)
+    return value
+
+
+def results(stats, history, **options) -> dict:
+    """
+    Every statistic of the `stats` module given over the history, in plain form;
+    `options` are passed on to every statistic (the original ones take none).
+    """
+    computed = {name: plain(getattr(stats, name)(history, **options)) for name in STATS}
+    top = list(computed['play_counts_by_artist'])[:ARTISTS]
+    computed['artist_history_over_time'] = plain(stats.artist_history_over_time(history, top, **options))
+    return computed
+
+
+def _write_fixture() -> None:
+    sys.path.insert(0, os.path.join(os.path.dirname(DATA), os.pardir, 'benchmarks'))
+    from synthetic import generate_export, zip_export
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = generate_export(directory, rows=3000, artists=100, start='2019-01-01', years=5, playlists=0,
+                                rows_per_file=600, seed=7)
+        zip_export(directory, files, FIXTURE)
+
+
+def main(baseline: str) -> None:
+    sys.path.insert(0, baseline)
+    import stats
+    from filemgr.data import MyData
+
+    with tempfile.TemporaryDirectory() as directory:
+        with zipfile.ZipFile(FIXTURE) as archive:
+            for name in archive.namelist():
+                # the original loader reads the files of a directory
+                with open(os.path.join(directory, os.path.basename(name)), 'wb') as f:
+                    f.write(archive.read(name))
+        history = MyData(root_path=directory + os.sep).streaming_history
+
+    start, end = WINDOW
+    window = [play for play in history if start <= calendar.timegm(play['endTime']) <= end]
+    with gzip.open(EXPECTED, 'wt', encoding='UTF-8') as f:
+        json.dump({'full': results(stats, history), 'window': results(stats, window)}, f)
+    print(f'results of {len(history)} plays, {len(window)} in the window, written to {EXPECTED}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='write the results of the original statistics for the fixture')
+    parser.add_argument('baseline', help='checkout of the original code')
+    parser.add_argument('--fixture', action='store_true', help='write the fixture history anew first')
+    arguments = parser.parse_args()
+    if arguments.fixture:
+        _write_fixture()
+    main(arguments.baseline)
@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the modules live at the top of the repository, which is not a package
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic import generate_export, zip_export  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def archive(tmp_path_factory):
+    """
+    A small synthetic Data Package, zipped like the export.
+    """
+    directory = tmp_path_factory.mktemp('export')
+    files = generate_export(str(directory), rows=3000, artists=80, years=1, rows_per_file=1000)
+    path = str(directory / 'my_spotify_data.zip')
+    zip_export(str(directory), files, path)
+    return path
+
+
+def rows(table):
+    """
+    Every play of a HistoryTable as a tuple of its values, in a fixed order.
+    """
+    text = [table.decode(name, getattr(table, name)) for name in ('artist', 'album', 'track', 'platform', 'country',
+                                                                  'reason_start', 'reason_end')]
+    return sorted(zip(table.end_time.tolist(), table.ms_played.tolist(), table.shuffle.tolist(),
+                      table.skipped.tolist(), *text), key=repr)
@@ -0,0 +1,92 @@
+import gzip
+import inspect
+import json
+import math
+from time import gmtime
+
+import pytest
+
+import report
+import stats
+from baseline import EXPECTED, FIXTURE, STATS, WINDOW, plain, results
+from filemgr import load_zipped_data
+from stats.engine import compute
+
+NAMES = STATS + ['artist_history_over_time']
+# the statistics that take top_k, and the sizes they are cut to
+RANKED = [name for name in STATS if 'top_k' in inspect.signature(getattr(stats, name)).parameters]
+TOP_K = (1, 3, 10)
+WINDOWS = {'full': None, 'window': WINDOW}
+
+
+@pytest.fixture(scope='module')
+def history():
+    return load_zipped_data(FIXTURE, cache=False).streaming_history
+
+
+@pytest.fixture(scope='module')
+def expected():
+    with gzip.open(EXPECTED, 'rt', encoding='UTF-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def computed(history):
+    return {part: results(stats, history, window=window) for part, window in WINDOWS.items()}
+
+
+def _assert_same(actual, expected, path=''):
+    if isinstance(expected, float) or isinstance(actual, float):
+        assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9), path
+    elif isinstance(expected, dict):
+        # the order of a ranking is part of the result
+        assert list(actual) == list(expected), path
+        for key in expected:
+            _assert_same(actual[key], expected[key], f'{path}[{key!r}]')
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            _assert_same(a, e, f'{path}[{i}]')
+    else:
+        assert actual == expected, path
+
+
+def _first(result, top_k):
+    # a full ranking cut down to what the same statistic returns with top_k
+    if isinstance(result, dict):
+        return dict(list(result.items())[:top_k])
+    if result and all(isinstance(part, dict) for part in result):
+        return [_first(part, top_k) for part in result]
+    return result[:top_k]
+
+
+def test_fixture_has_plays_in_and_out_of_the_window(history):
+    inside = history.between(*WINDOW)
+    assert 0 < len(inside) < len(history)
+
+
+@pytest.mark.parametrize('part', WINDOWS)
+@pytest.mark.parametrize('name', NAMES)
+def test_statistics_match_the_original(computed, expected, part, name):
+    _assert_same(computed[part][name], expected[part][name], name)
+
+
+@pytest.mark.parametrize('part', WINDOWS)
+@pytest.mark.parametrize('top_k', TOP_K)
+@pytest.mark.parametrize('name', RANKED)
+def test_top_k_is_the_start_of_the_full_ranking(history, expected, part, top_k, name):
+    result = plain(getattr(stats, name)(history, window=WINDOWS[part], top_k=top_k))
+    _assert_same(result, _first(expected[part][name], top_k), name)
+
+
+@pytest.mark.parametrize('part', WINDOWS)
+def test_fused_report_matches_the_original(history, expected, part):
+    # every statistic of the report in one scan, as the report computes them (some cut to the top entries)
+    accumulators = report.accumulators(report.GROUPS, gmtime(0), gmtime())
+    # the graph asks for more eras than the function gives by default
+    del accumulators['artist_eras_data']
+    fused = compute(history, window=WINDOWS[part], **accumulators)
+    for name, accumulator in accumulators.items():
+        top_k = getattr(accumulator, 'top_k', None)
+        wanted = expected[part][name] if top_k is None else _first(expected[part][name], top_k)
+        _assert_same(plain(fused[name]), wanted, name)
@@ -0,0 +1,76 @@
+import glob
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import filemgr.cache
+import stats
+from conftest import rows
+from filemgr import load_zipped_data
+from filemgr.cache import HistoryCache
+
+
+@pytest.fixture
+def cached(archive, tmp_path):
+    # a copy of the archive with its cache written, and the history parsed without one
+    path = str(tmp_path / 'my_spotify_data.zip')
+    shutil.copy(archive, path)
+    parsed = load_zipped_data(path, cache=False).streaming_history
+    load_zipped_data(path)
+    return path, parsed
+
+
+def _column(path, name):
+    return glob.glob(os.path.join(os.path.splitext(path)[0] + '.statipy', f'{name}.*.bin'))[0]
+
+
+def _overwrite(file, values):
+    # same size, other content
+    assert os.path.getsize(file) == values.nbytes
+    with open(file, 'r+b') as f:
+        f.write(values.tobytes())
+
+
+def test_unchanged_cache_is_loaded_without_reading_the_columns(cached, monkeypatch):
+    path, parsed = cached
+    monkeypatch.setattr(filemgr.cache, '_checksum', lambda column: pytest.fail('column read'))
+    history = HistoryCache(path).load()
+    assert history is not None and history.time_sorted
+    assert rows(history) == rows(parsed)
+
+
+def test_unsorted_end_time_of_the_same_size_is_rebuilt(cached):
+    path, parsed = cached
+    end_time = np.fromfile(_column(path, 'end_time'), dtype='<i8')
+    _overwrite(_column(path, 'end_time'), end_time[::-1].copy())
+    assert HistoryCache(path).load() is None
+
+    history = load_zipped_data(path).streaming_history
+    assert rows(history) == rows(parsed)
+    assert stats.history_range(history) == stats.history_range(parsed)
+    # and the rebuilt cache is used from then on
+    assert rows(HistoryCache(path).load()) == rows(parsed)
+
+
+def test_text_codes_out_of_range_are_rebuilt(cached):
+    path, parsed = cached
+    artist = np.fromfile(_column(path, 'artist'), dtype='<i4')
+    _overwrite(_column(path, 'artist'), np.full_like(artist, 1 << 30))
+
+    history = load_zipped_data(path).streaming_history
+    assert rows(history) == rows(parsed)
+    assert stats.play_counts_by_artist(history) == stats.play_counts_by_artist(parsed)
+
+
+def test_touched_columns_with_the_same_content_are_checked_once(cached, monkeypatch):
+    path, parsed = cached
+    os.utime(_column(path, 'track'))
+    checked = []
+    checksum = filemgr.cache._checksum
+    monkeypatch.setattr(filemgr.cache, '_checksum', lambda column: checked.append(1) or checksum(column))
+
+    assert rows(HistoryCache(path).load()) == rows(parsed)
+    assert rows(HistoryCache(path).load()) == rows(parsed)
+    assert len(checked) == 1
@@ -0,0 +1,151 @@
+import os
+
+import matplotlib
+import pytest
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+from matplotlib.backends.backend_pdf import PdfPages  # noqa: E402
+
+import render  # noqa: E402
+from render import merge_pdfs, render_pdf, write_text_pdf  # noqa: E402
+
+
+def _figures_pdf(path, titles):
+    with PdfPages(path) as pdf:
+        for title in titles:
+            fig = plt.figure()
+            fig.suptitle(title)
+            fig.gca().plot([0, 1], [1, 0])
+            pdf.savefig(fig)
+            plt.close(fig)
+    return str(path)
+
+
+def _titled(title, done):
+    # a page plotted in a worker, that leaves a file behind once it is plotted
+    fig = plt.figure()
+    fig.suptitle(title)
+    open(os.path.join(done, title), 'w').close()
+    return fig
+
+
+def _nothing(title, done):
+    open(os.path.join(done, title), 'w').close()
+    return None
+
+
+def test_merge_keeps_every_page_in_order(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    text = str(tmp_path / 'text.pdf')
+    assert write_text_pdf('Statistics report\nTop Played Tracks:', text) == 1
+    first = _figures_pdf(tmp_path / 'first.pdf', ['Alpha', 'Beta'])
+    second = _figures_pdf(tmp_path / 'second.pdf', ['Gamma'])
+    merged = tmp_path / 'merged.pdf'
+
+    merge_pdfs([text, first, second], str(merged))
+
+    reader = pypdf.PdfReader(merged, strict=True)
+    pages = [page.extract_text() for page in reader.pages]
+    assert len(pages) == 4
+    assert 'Statistics report' in pages[0] and 'Top Played Tracks:' in pages[0]
+    for page, title in zip(pages[1:], ['Alpha', 'Beta', 'Gamma']):
+        assert title in page
+
+
+def test_merge_of_one_file_matches_it(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    source = _figures_pdf(tmp_path / 'source.pdf', ['Only'])
+    merged = tmp_path / 'merged.pdf'
+
+    merge_pdfs([source], str(merged))
+
+    original = pypdf.PdfReader(source, strict=True).pages[0]
+    page = pypdf.PdfReader(merged, strict=True).pages[0]
+    assert page.mediabox == original.mediabox
+    assert page.extract_text() == original.extract_text()
+
+
+def test_parallel_render_keeps_page_order_and_takes_pages_as_they_are_plotted(tmp_path):
+    pypdf = pytest.importorskip('pypdf')
+    done = tmp_path / 'done'
+    done.mkdir()
+    workers = 2
+    titles = [f'Page {i:02}' for i in range(12)]
+
+    def pages():
+        for i, title in enumerate(titles):
+            # never more pages taken than are plotted, in flight or waiting for a worker
+            assert i - len(os.listdir(done)) <= render._PAGES_AHEAD * workers
+            yield (_nothing if i % 5 == 4 else _titled), (title, str(done))
+
+    path = tmp_path / 'report.pdf'
+    plotted = [title for i, title in enumerate(titles) if i % 5 != 4]
+    assert render_pdf(pages(), str(path), workers=workers) == len(plotted)
+    written = [page.extract_text() for page in pypdf.PdfReader(path, strict=True).pages]
+    assert len(written) == len(plotted)
+    for page, title in zip(written, plotted):
+        assert title in page
+
+
+def _replace(data, old, new):
+    # the same PDF with a part of it changed, and its cross-reference table still pointing at the right offsets
+    assert old in data
+    at = data.index(old)
+    xref = int(data[data.rindex(b'startxref') + len(b'startxref'):].split()[0])
+    shift = len(new) - len(old) if at < xref else 0
+    data = data[:at] + new + data[at + len(old):]
+    xref += shift
+    table, rest = data[xref:].split(b'trailer', 1)
+    entries = [
+        b'%010d%s' % (int(line[:10]) + shift, line[10:]) if line.endswith(b' n ') and int(line[:10]) > at else line
+        for line in table.split(b'\n')
+    ]
+    rest = rest[:rest.rindex(b'startxref')] + b'startxref\n%d\n%%%%EOF\n' % xref
+    return data[:xref] + b'\n'.join(entries) + b'trailer' + rest
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    path = tmp_path / 'text.pdf'
+    write_text_pdf('Statistics report', str(path))
+    return path.read_bytes()
+
+
+@pytest.mark.parametrize('old, new, message', [
+    (b'/Root 1 0 R', b'/Root 1 0 R /Encrypt << /Filter /Standard >>', 'encryption'),
+    (b'/Root 1 0 R', b'/Root 1 0 R /Prev 9', 'incremental updates'),
+    (b'/Root 1 0 R', b'/Root 1 0 R /XRefStm 9', 'cross-reference stream'),
+    (b'<< /Type /Font /Subtype /Type0', b'<< /Type /ObjStm /N 0 /First 0 >> % /Type /Font /Subtype /Type0',
+     'object streams'),
+    (b'3 0 obj', b'3 1 obj', 'generation 0'),
+])
+def test_merge_rejects_what_it_cannot_renumber(tmp_path, text_pdf, old, new, message):
+    source = tmp_path / 'source.pdf'
+    source.write_bytes(_replace(text_pdf, old, new))
+    merged = tmp_path / 'merged.pdf'
+    merged.write_bytes(b'before')
+
+    with pytest.raises(ValueError, match=message):
+        merge_pdfs([str(source)], str(merged))
+    assert merged.read_bytes() == b'before'
+    assert sorted(os.listdir(tmp_path)) == ['merged.pdf', 'source.pdf', 'text.pdf']
+
+
+def test_merge_rejects_a_cross_reference_stream(tmp_path, text_pdf):
+    # startxref points at an object (the cross-reference stream) instead of a table
+    xref = text_pdf.rindex(b'startxref')
+    source = tmp_path / 'source.pdf'
+    source.write_bytes(text_pdf[:xref] + b'startxref\n%d\n%%%%EOF\n' % text_pdf.index(b'1 0 obj'))
+
+    with pytest.raises(ValueError, match='cross-reference stream'):
+        merge_pdfs([str(source)], str(tmp_path / 'merged.pdf'))
+
+
+def test_merge_accepts_what_it_wrote(tmp_path, text_pdf):
+    first = tmp_path / 'first.pdf'
+    first.write_bytes(text_pdf)
+    merge_pdfs([str(first), _figures_pdf(tmp_path / 'figures.pdf', ['Alpha'])], str(tmp_path / 'merged.pdf'))
+    # a merged file can be merged again
+    merge_pdfs([str(tmp_path / 'merged.pdf'), str(first)], str(tmp_path / 'again.pdf'))
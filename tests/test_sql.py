@@ -0,0 +1,77 @@
+from time import gmtime
+
+import pytest
+
+import report
+import stats
+from baseline import FIXTURE, WINDOW, plain
+from filemgr import HistoryDatabase, load_zipped_data
+from stats import sql
+
+WINDOWS = {'full': None, 'window': WINDOW, 'empty': (0, 1)}
+
+
+@pytest.fixture(scope='module')
+def history():
+    return load_zipped_data(FIXTURE, cache=False).streaming_history
+
+
+@pytest.fixture(scope='module')
+def database(history):
+    with HistoryDatabase(':memory:') as database:
+        database.load(history)
+        yield database
+
+
+@pytest.mark.parametrize('window', WINDOWS.values(), ids=list(WINDOWS))
+@pytest.mark.parametrize('name, options', [
+    ('top_artist_per_month', {}),
+    ('quarterly_review', {}),
+    ('artist_eras_data', {}),
+    ('artist_eras_data', {'top_n': 300, 'normalize': False}),
+    ('get_full_song_stats', {}),
+])
+def test_queries_match_the_statistics_in_memory(history, database, window, name, options):
+    expected = getattr(stats, name)(history, window=window, **options)
+    assert plain(getattr(sql, name)(database, window=window, **options)) == plain(expected)
+
+
+def test_song_stats_table_matches(history, database):
+    expected = stats.get_full_song_stats(history, window=WINDOW, compact=True)
+    assert sql.get_full_song_stats(database, window=WINDOW, compact=True).records() == expected.records()
+
+
+def test_report_from_the_database_matches(history, database):
+    start, end = gmtime(WINDOW[0]), gmtime(WINDOW[1])
+    expected = report.compute_report(history, start, end, song_stats=True)
+    queried = report.compute_report(history, start, end, song_stats=True, database=database)
+    assert list(queried) == list(expected)
+    for name in expected:
+        if name == report.SONG_STATS:
+            assert queried[name].records() == expected[name].records()
+        else:
+            assert plain(queried[name]) == plain(expected[name]), name
+
+
+def test_source_is_kept_until_the_next_load(history, tmp_path):
+    path = str(tmp_path / 'history.sqlite')
+    with HistoryDatabase(path) as database:
+        assert database.source() is None and not len(database)
+        database.load(history, 'first')
+    with HistoryDatabase(path) as database:
+        assert database.source() == 'first' and len(database) == len(history)
+        database.load(history.between(*WINDOW), 'second')
+    with HistoryDatabase(path) as database:
+        assert database.source() == 'second' and len(database) == len(history.between(*WINDOW))
+
+
+def test_report_queries_an_empty_database(history, monkeypatch):
+    queried = []
+    monkeypatch.setattr(report, 'SQL_STATS', {
+        name: lambda database, window, query=query: queried.append(query) or query(database, window)
+        for name, query in report.SQL_STATS.items()
+    })
+    with HistoryDatabase(':memory:') as database:
+        database.load(history.between(0, 1))
+        report.compute_report(history.between(0, 1), gmtime(0), gmtime(1), database=database)
+    assert len(queried) == len(set(report.SQL_STATS) - {report.SONG_STATS})
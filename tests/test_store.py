@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+import stats
+from conftest import rows as _rows
+from filemgr import HistoryStore, load_zipped_data
+
+
+def _assert_aggregates_recomputed(store):
+    history = store.history()
+    assert list(store.play_counts().items()) == list(stats.play_counts(history).items())
+    assert list(store.artist_time().items()) == list(stats.longest_played_artist(history).items())
+    assert store.most_musical_day() == stats.most_musical_day(history)
+
+    days, inverse = np.unique(history.end_time // 86400, return_inverse=True)
+    day_ms = np.bincount(inverse, weights=history.ms_played).astype(np.int64)
+    assert store.daily_time() == {date(1970, 1, 1) + timedelta(days=int(day)): timedelta(milliseconds=int(ms))
+                                  for day, ms in zip(days, day_ms)}
+
+
+def test_same_archive_twice_adds_nothing(archive, tmp_path):
+    path = str(tmp_path / 'store')
+    parsed = load_zipped_data(archive, cache=False).streaming_history
+
+    first = load_zipped_data(archive, cache=False, store=path).streaming_history
+    second = load_zipped_data(archive, cache=False, store=path).streaming_history
+
+    store = HistoryStore(path)
+    assert [source['added'] for source in store.sources] == [len(parsed), 0]
+    assert len(store) == len(first) == len(second) == len(parsed)
+    assert _rows(second) == _rows(parsed)
+    _assert_aggregates_recomputed(store)
+
+
+def test_overlapping_packages_are_merged(archive, tmp_path):
+    history = load_zipped_data(archive, cache=False).streaming_history
+    n = len(history)
+    store = HistoryStore(str(tmp_path / 'store'))
+
+    # a later package repeats the end of the earlier one, and the same package comes again
+    assert store.ingest(history[:2 * n // 3], 'first') == 2 * n // 3
+    assert store.ingest(history[n // 3:], 'second') == n - 2 * n // 3
+    assert store.ingest(history, 'again') == 0
+
+    reopened = HistoryStore(str(tmp_path / 'store'))
+    assert _rows(reopened.history()) == _rows(history)
+    _assert_aggregates_recomputed(reopened)
+
+
+def test_plays_a_package_holds_twice_are_kept_twice(archive, tmp_path):
+    history = load_zipped_data(archive, cache=False).streaming_history
+    doubled = history.take(np.sort(np.r_[np.arange(len(history)), [5, 5, 7]]))
+    store = HistoryStore(str(tmp_path / 'store'))
+
+    store.ingest(history, 'single')
+    assert store.ingest(doubled, 'doubled') == 3
+    assert store.ingest(doubled, 'doubled') == 0
+    assert _rows(store.history()) == _rows(doubled)
+    _assert_aggregates_recomputed(store)
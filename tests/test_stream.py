@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+from filemgr.stream import iter_json_array, iter_json_members
+
+CHUNK_SIZES = [1, 2, 3, 5, 7, 13, 64, 1 << 16]
+
+# records as the export writes them, one per line; chunks cut the escapes (and the surrogate pairs of characters
+# outside the BMP, written as two escapes) apart at every small chunk size
+LINES = [
+    '{"ts": "2015-01-31T23:59:59Z", "ms_played": 1234, "shuffle": true, "skipped": null, "offline": false}',
+    '{"master_metadata_track_name": "Caf\\u00e9 \\"Live\\" \\\\ \\/ \\n\\t \\ud83c\\udfb5 \\ud834\\udd1e", "n": -1.5e-3}',
+    '{"master_metadata_track_name": "raw \U0001f3b5 and \u00e9", "nested": {"a": [1, [2, {"b": []}]], "c": {}}}',
+    '[]', '{}', '0', '-12', '3.25', '1E10', '"string"', 'true', 'false', 'null',
+]
+TEXT = '[\n' + ',\n'.join(LINES) + '\n]'
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_array_matches_json_loads(chunk_size):
+    assert list(iter_json_array(io.StringIO(TEXT), chunk_size)) == json.loads(TEXT)
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('text', ['[]', ' [ ] ', '[1]', '[ "a" , "b" ]\n', '[[], {}, [[]]]', '["\\ud83c\\udfb5"]'])
+def test_small_arrays_match_json_loads(text, chunk_size):
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == json.loads(text)
+
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_members_match_json_loads(chunk_size):
+    text = json.dumps({
+        'playlists': [{'name': 'Café \U0001f3b5', 'items': [{'addedDate': '2020-01-01'}]}, {'name': 'b'}],
+        'empty': [],
+        'count': 12,
+        'other': {'nested': ['x', 'y']},
+        'tracks': ['\\"quoted\\"', 'a\nb'],
+    }, ensure_ascii=chunk_size % 2 == 0)
+    expected = []
+    for name, value in json.loads(text).items():
+        expected += [(name, element) for element in value] if isinstance(value, list) else [(name, value)]
+    assert list(iter_json_members(io.StringIO(text), chunk_size)) == expected
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 1 << 16])
+@pytest.mark.parametrize('text', [
+    '', '[', '[1', '[1,', '[1,]', '[1 2]', '["abc', '[1.]', '[1] junk', '[1]]', '[tru]',
+])
+def test_array_rejects_what_json_loads_rejects(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO(text), chunk_size))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 1 << 16])
+@pytest.mark.parametrize('text', ['', '{', '{"a"', '{"a": [1}', '{"a": 1,}', '{a: 1}', '{"a": 1} x'])
+def test_members_reject_what_json_loads_rejects(text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_members(io.StringIO(text), chunk_size))
+
+
+def test_other_documents_are_rejected():
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(io.StringIO('{"a": [1]}')))
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_members(io.StringIO('[1]')))
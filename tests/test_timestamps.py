@@ -0,0 +1,51 @@
+from calendar import timegm
+from time import strptime
+
+import numpy as np
+import pytest
+
+from filemgr.timestamps import FORMAT, parse_timestamps
+
+
+def _expected(values):
+    return [timegm(strptime(value, FORMAT)) for value in values]
+
+
+def test_matches_strptime_over_many_dates():
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(0, 4_102_444_800, 5000)  # 1970 to 2100
+    values = [f'{t}Z' for t in np.datetime_as_string(seconds.astype('datetime64[s]')).tolist()]
+    assert parse_timestamps(values).tolist() == _expected(values) == seconds.tolist()
+
+
+@pytest.mark.parametrize('value', [
+    '1970-01-01T00:00:00Z', '1999-12-31T23:59:59Z', '2000-02-29T12:00:00Z', '2016-02-29T23:59:59Z',
+    '2100-03-01T00:00:00Z', '2015-06-30T23:59:60Z', '2015-12-31T23:59:61Z', '1969-12-31T23:59:59Z',
+])
+def test_edge_dates_match_strptime(value):
+    assert parse_timestamps([value]).tolist() == _expected([value])
+
+
+@pytest.mark.parametrize('value', [
+    # not the fixed layout, which strptime still reads
+    '2015-1-31T23:59:59Z', '2015-01-31T3:05:09Z', '2015-01-31T23:59:5Z',
+])
+def test_other_layouts_go_through_strptime(value):
+    values = ['2015-01-31T23:59:59Z', value, '2015-02-01T00:00:00Z']
+    assert parse_timestamps(values).tolist() == _expected(values)
+
+
+@pytest.mark.parametrize('value', [
+    '2015-02-29T00:00:00Z', '2015-13-01T00:00:00Z', '2015-00-10T00:00:00Z', '2015-04-31T00:00:00Z',
+    '2015-01-01T24:00:00Z', '2015-01-01T00:60:00Z', '2015-01-01 00:00:00Z', '2015-01-01T00:00:00X',
+    'abcd-ef-ghTij:kl:mnZ', '2015-01-01T00:00:00Zx',
+])
+def test_invalid_values_raise_like_strptime(value):
+    with pytest.raises(ValueError):
+        strptime(value, FORMAT)
+    with pytest.raises(ValueError):
+        parse_timestamps(['2015-01-31T23:59:59Z', value])
+
+
+def test_empty():
+    assert parse_timestamps([]).tolist() == []